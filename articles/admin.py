@@ -1,8 +1,81 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from .models import CustomUser, Publisher, Article, Newsletter
+from .moderation import approve_articles, reject_articles, delete_articles
+from .newsletters import queue_newsletters
+from .pagination import EstimatedCountPaginator
 
-# Register your models here.
-admin.site.register(CustomUser)
-admin.site.register(Publisher)
-admin.site.register(Article)
-admin.site.register(Newsletter)
+
+# ---------------------------
+# Shared changelist settings
+# ---------------------------
+# Built for large tables: estimated page counts, no second COUNT(*) for
+# "x of y selected", explicit columns instead of __str__, related rows
+# joined up front, and autocomplete widgets instead of <select>s that list
+# every user or publisher.
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(CustomUser)
+class CustomUserAdmin(ScalableAdmin):
+    list_display = ['username', 'email', 'role', 'is_staff', 'date_joined',
+                    'subscriber_count', 'approved_article_count']
+    list_filter = ['role', 'is_staff']  # customuser_role_idx
+    # Ordering and prefix matches stay on the unique username index.
+    ordering = ['username']
+    search_fields = ['^username']
+    autocomplete_fields = ['subscribed_publishers', 'subscribed_journalists']
+    filter_horizontal = ['groups', 'user_permissions']
+    # Maintained by articles.counters; fix drift with reconcile_counters.
+    readonly_fields = ['subscriber_count', 'approved_article_count']
+
+
+@admin.register(Publisher)
+class PublisherAdmin(ScalableAdmin):
+    list_display = ['name', 'owner', 'subscriber_count', 'approved_article_count']
+    list_select_related = ['owner']
+    ordering = ['name']
+    readonly_fields = ['subscriber_count', 'approved_article_count']
+    search_fields = ['^name']
+    autocomplete_fields = ['owner', 'editors', 'journalists']
+
+
+@admin.register(Newsletter)
+class NewsletterAdmin(ScalableAdmin):
+    list_display = ['title', 'author', 'created_at']
+    list_select_related = ['author']
+    autocomplete_fields = ['author']
+    actions = ['send_selected']
+
+    @admin.action(description='Send selected newsletters to followers')
+    def send_selected(self, request, queryset):
+        newsletters = list(queryset)
+        queue_newsletters(newsletters)
+        self.message_user(request, f'Queued {len(newsletters)} newsletter(s) for sending.', messages.SUCCESS)
+
+
+@admin.register(Article)
+class ArticleAdmin(ScalableAdmin):
+    list_display = ['title', 'author', 'publisher', 'approved', 'created_at']
+    list_select_related = ['author', 'publisher']
+    # approved and publisher lead article_approved_created_idx and
+    # article_pub_approved_idx; created_at drill-down uses article_created_idx.
+    list_filter = ['approved', 'publisher']
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ['author', 'publisher']
+    actions = ['approve_selected', 'reject_selected']
+
+    @admin.action(description='Approve selected articles')
+    def approve_selected(self, request, queryset):
+        count = approve_articles(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f'Approved {count} article(s).', messages.SUCCESS)
+
+    @admin.action(description='Withdraw approval of selected articles')
+    def reject_selected(self, request, queryset):
+        count = reject_articles(list(queryset.values_list('id', flat=True)))
+        self.message_user(request, f'Rejected {count} article(s).', messages.SUCCESS)
+
+    def delete_queryset(self, request, queryset):
+        delete_articles(list(queryset.values_list('id', flat=True)))
@@ -4,6 +4,8 @@ from django.apps import AppConfig
 class ArticlesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'articles'
-    
-def ready(self):
-        import core.signals
+
+    def ready(self):
+        # instrumentation: the query timer must be on connections opened
+        # before the first request reaches the middleware.
+        from . import instrumentation, signals  # noqa: F401
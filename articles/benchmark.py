@@ -0,0 +1,298 @@
+import math
+import statistics
+import time
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import urls
+from .cache import get_cache
+from .models import Article, CustomUser, Newsletter, Publisher
+from .profiles import UserProfile
+
+# Drives the portal's URLs in-process with the test client. Timings include
+# middleware, view, ORM and template rendering but not the network or the
+# WSGI server, so compare runs against each other, not against production.
+
+# (label, url name, role of the logged-in user or None, query string)
+SCENARIOS = [
+    ("home:anonymous", "home", None, {}),
+    ("home:reader", "home", "reader", {}),
+    ("home:editor", "home", "editor", {}),
+    ("register", "register", None, {}),
+    ("create_article", "create_article", "journalist", {}),
+    ("article_detail:anonymous", "article_detail", None, {}),
+    ("article_detail:reader", "article_detail", "reader", {}),
+    ("update_article", "update_article", "editor", {}),
+    ("delete_article", "delete_article", "editor", {}),
+    ("register_publisher", "register_publisher", "publisher", {}),
+    ("editor_dashboard", "editor_dashboard", "editor", {}),
+    ("subscriptions", "subscriptions", "reader", {}),
+    ("newsletter_list", "newsletter_list", "journalist", {}),
+    ("newsletter_create", "newsletter_create", "journalist", {}),
+    ("newsletter_update", "newsletter_update", "journalist", {}),
+    ("newsletter_delete", "newsletter_delete", "journalist", {}),
+    ("search", "search", None, {"q": "election"}),
+    ("get_subscribed_articles", "get_subscribed_articles", "reader", {}),
+    ("get_subscribed_articles:full", "get_subscribed_articles", "reader", {"full": "1"}),
+    ("api_search", "api_search", None, {"q": "election"}),
+]
+
+# GETs that change state; benchmarking them would skew the dataset.
+MUTATING = {
+    "approve_article": "approves an article on GET",
+    "bulk_moderate": "POST only",
+    "subscribe_publisher": "changes subscriptions on GET",
+    "unsubscribe_publisher": "changes subscriptions on GET",
+    "subscribe_journalist": "changes subscriptions on GET",
+    "unsubscribe_journalist": "changes subscriptions on GET",
+}
+
+
+def percentile(values, pct):
+    # Nearest-rank percentile over an already sorted list.
+    if not values:
+        return None
+    index = min(len(values), max(1, math.ceil(pct / 100 * len(values)))) - 1
+    return values[index]
+
+
+# ---------------------------
+# Fixtures picked from the current database
+# ---------------------------
+def pick_fixtures():
+    # The busiest reader and journalist: worst case rather than average.
+    reader = (
+        CustomUser.objects.filter(role="reader")
+        .annotate(entries=Count("feed_entries"))
+        .order_by("-entries", "id")
+        .first()
+    )
+    journalist = (
+        CustomUser.objects.filter(role="journalist")
+        .annotate(written=Count("article"))
+        .order_by("-written", "id")
+        .first()
+    )
+    article = Article.objects.filter(approved=True).order_by("-created_at", "-id").first()
+    return {
+        "users": {
+            "reader": reader,
+            "journalist": journalist,
+            "editor": CustomUser.objects.filter(role="editor").order_by("id").first(),
+            "publisher": CustomUser.objects.filter(role="publisher").order_by("id").first(),
+        },
+        "pk": {
+            "article": article.pk if article else None,
+            "newsletter": Newsletter.objects.filter(author=journalist).values_list("pk", flat=True).first(),
+        },
+    }
+
+
+def _kwargs(pattern, fixtures):
+    kwargs = {}
+    for name in pattern.pattern.converters:
+        if name == "pk":
+            kind = "newsletter" if pattern.name.startswith("newsletter") else "article"
+            kwargs[name] = fixtures["pk"][kind]
+        elif name == "article_id":
+            kwargs[name] = fixtures["pk"]["article"]
+        elif name == "publisher_id":
+            kwargs[name] = Publisher.objects.values_list("pk", flat=True).first()
+        elif name == "journalist_id":
+            user = fixtures["users"]["journalist"]
+            kwargs[name] = user.pk if user else None
+        else:
+            kwargs[name] = None
+    return kwargs
+
+
+def _client():
+    host = next((h for h in settings.ALLOWED_HOSTS if h and "*" not in h), "localhost")
+    # A broken view is reported as a 500 rather than aborting the run.
+    return Client(raise_request_exception=False, HTTP_HOST=host.lstrip("."))
+
+
+def _timed_get(client, url, params):
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        response = client.get(url, params)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        elapsed = time.perf_counter() - started
+    return response.status_code, elapsed * 1000, len(queries)
+
+
+@contextmanager
+def isolated_cache():
+    # Every configured cache alias replaced by one private locmem store, so
+    # clearing it between iterations cannot flush a shared Redis/memcached
+    # (version stamps, profiles, pages) that live traffic depends on.
+    private = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "news-portal-benchmark",
+    }
+    with override_settings(CACHES={alias: dict(private) for alias in settings.CACHES}):
+        get_cache().clear()
+        yield
+
+
+# ---------------------------
+# Runner
+# ---------------------------
+def run(iterations=50, warmup=5, cold=False, only=None):
+    # Cold runs clear the cache before every request, so they use a
+    # private one; warm runs measure the configured backend.
+    with isolated_cache() if cold else nullcontext():
+        return _run(iterations, warmup, cold, only)
+
+
+def _run(iterations, warmup, cold, only):
+    fixtures = pick_fixtures()
+    patterns = {p.name: p for p in urls.urlpatterns if getattr(p, "name", None)}
+    results = []
+    skipped = dict(MUTATING)
+    covered = set()
+
+    for label, name, role, params in SCENARIOS:
+        if name not in patterns:
+            continue
+        covered.add(name)
+        if only and label not in only and name not in only:
+            continue
+        kwargs = _kwargs(patterns[name], fixtures)
+        if None in kwargs.values():
+            skipped[label] = "no matching object in the database"
+            continue
+        user = fixtures["users"].get(role) if role else None
+        if role and user is None:
+            skipped[label] = f"no {role} in the database"
+            continue
+
+        client = _client()
+        if user is not None:
+            client.force_login(user)
+        url = reverse(name, kwargs=kwargs)
+        for _ in range(warmup):
+            client.get(url, params)
+
+        timings, counts, statuses = [], [], set()
+        for _ in range(iterations):
+            if cold:
+                get_cache().clear()
+            status, elapsed, queries = _timed_get(client, url, params)
+            timings.append(elapsed)
+            counts.append(queries)
+            statuses.add(status)
+        timings.sort()
+        results.append({
+            "name": label,
+            "url": url,
+            "role": role or "anonymous",
+            "status": sorted(statuses),
+            "requests": iterations,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "queries": {
+                "min": min(counts),
+                "median": statistics.median(counts),
+                "max": max(counts),
+            },
+        })
+
+    for name in patterns:
+        if name not in covered and name not in skipped:
+            skipped[name] = "no benchmark scenario"
+
+    return {
+        "meta": {
+            "iterations": iterations,
+            "warmup": warmup,
+            "cold_cache": cold,
+            "cache": "isolated locmem" if cold else settings.CACHES[settings.PAGE_CACHE_ALIAS]["BACKEND"],
+            "database": connection.vendor,
+            "rows": {
+                "users": CustomUser.objects.count(),
+                "publishers": Publisher.objects.count(),
+                "articles": Article.objects.count(),
+            },
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+# ---------------------------
+# Card rendering
+# ---------------------------
+def _card_fixtures(cards, words):
+    # Unsaved objects with ids: rendering touches neither the database nor
+    # the dataset, only templates and the fragment cache.
+    now = timezone.now()
+    publishers = [Publisher(id=i, name=f"Publisher {i}") for i in range(1, 6)]
+    authors = [CustomUser(id=i, username=f"journalist{i}", role="journalist") for i in range(1, 11)]
+    body = " ".join(f"word{i % 50}" for i in range(words))
+    articles = []
+    for i in range(1, cards + 1):
+        article = Article(
+            id=i, title=f"Article {i}", content=body, approved=True,
+            created_at=now, updated_at=now,
+            author=authors[i % len(authors)], publisher=publishers[i % len(publishers)],
+        )
+        article.refresh_precomputed()  # filled by save(), which these never see
+        articles.append(article)
+    reader = CustomUser(id=10**9, username="reader", role="reader")
+    subscriptions = UserProfile(reader.id, "reader", [p.id for p in publishers[:2]], [a.id for a in authors[:3]])
+    return articles, reader, subscriptions
+
+
+def render_cards(cards=100, iterations=20, words=300):
+    # Renders a reader's homepage list of `cards` cards with every card
+    # fragment missing from the cache ("cold", what each request paid
+    # before fragment caching) and with every fragment cached ("warm").
+    articles, reader, subscriptions = _card_fixtures(cards, words)
+    request = RequestFactory().get("/")
+    request.user = reader
+    context = {"articles": articles, "user": reader, "subscriptions": subscriptions}
+
+    def render():
+        started = time.perf_counter()
+        render_to_string("article_list.html", context, request=request)
+        return (time.perf_counter() - started) * 1000
+
+    results = {}
+    for mode in ("cold", "warm"):
+        with isolated_cache():
+            render()  # parse templates (cached loader) and, for "warm", fill the cache
+            timings = []
+            for _ in range(iterations):
+                if mode == "cold":
+                    get_cache().clear()
+                timings.append(render())
+        timings.sort()
+        results[mode] = {
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+        }
+
+    return {
+        "meta": {
+            "cards": cards,
+            "iterations": iterations,
+            "words_per_article": words,
+            "cached_loader": not settings.DEBUG,
+        },
+        "results": results,
+        "speedup": round(results["cold"]["mean_ms"] / results["warm"]["mean_ms"], 2),
+    }
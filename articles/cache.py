@@ -0,0 +1,174 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.template.loader import render_to_string
+
+from .models import Article
+
+# Cached pages are keyed by version stamps rather than deleted on change:
+# bumping a stamp makes every key built from it unreachable, which works
+# the same on locmem, file-based and shared (Redis/Memcached) backends.
+# A stamp that was evicted is re-created with a fresh value, so an
+# eviction can never resurrect stale content. Stamps live for
+# CACHE_STAMP_TIMEOUT: forever on a shared backend, briefly on locmem, where
+# a bump only reaches the process that made it.
+
+SITE = "site"
+HOMEPAGE = "homepage"
+FEEDS = "feeds"
+
+
+def get_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _stamp_key(name):
+    return f"stamp:{name}"
+
+
+def stamps(*names):
+    cache = get_cache()
+    keys = [_stamp_key(name) for name in names]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    for key, value in missing.items():
+        cache.add(key, value, timeout=settings.CACHE_STAMP_TIMEOUT)
+    if missing:
+        found.update(cache.get_many(list(missing)))
+    return [found.get(key, missing.get(key)) for key in keys]
+
+
+async def astamps(*names):
+    cache = get_cache()
+    keys = [_stamp_key(name) for name in names]
+    found = await cache.aget_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    for key, value in missing.items():
+        await cache.aadd(key, value, timeout=settings.CACHE_STAMP_TIMEOUT)
+    if missing:
+        found.update(await cache.aget_many(list(missing)))
+    return [found.get(key, missing.get(key)) for key in keys]
+
+
+def bump(*names):
+    get_cache().set_many(
+        {_stamp_key(name): time.time_ns() for name in names}, timeout=settings.CACHE_STAMP_TIMEOUT
+    )
+
+
+def article_stamp(pk):
+    return f"article:{pk}"
+
+
+def publisher_feed_stamp(pk):
+    return f"feed:publisher:{pk}"
+
+
+def journalist_feed_stamp(pk):
+    return f"feed:journalist:{pk}"
+
+
+# ---------------------------
+# Keys
+# ---------------------------
+def article_detail_key(pk):
+    site, article = stamps(SITE, article_stamp(pk))
+    return f"article_detail:{pk}:{site}:{article}"
+
+
+def homepage_key(cursor):
+    site, homepage = stamps(SITE, HOMEPAGE)
+    return f"homepage:{site}:{homepage}:{cursor or 'first'}"
+
+
+async def aarticle_detail_key(pk):
+    site, article = await astamps(SITE, article_stamp(pk))
+    return f"article_detail:{pk}:{site}:{article}"
+
+
+async def ahomepage_key(cursor):
+    site, homepage = await astamps(SITE, HOMEPAGE)
+    return f"homepage:{site}:{homepage}:{cursor or 'first'}"
+
+
+# ---------------------------
+# Invalidation
+# ---------------------------
+def invalidate_article(pk):
+    bump(article_stamp(pk), HOMEPAGE)
+
+
+def invalidate_articles(pks):
+    bump(*(article_stamp(pk) for pk in pks), HOMEPAGE)
+
+
+def invalidate_site():
+    bump(SITE)
+
+
+def invalidate_feeds(scopes):
+    # `scopes` are (publisher_id, author_id) pairs of articles that entered,
+    # left or changed in the public feeds. Other publishers' and
+    # journalists' feeds keep their validators.
+    names = {FEEDS}
+    for publisher_id, author_id in scopes:
+        names.add(publisher_feed_stamp(publisher_id))
+        names.add(journalist_feed_stamp(author_id))
+    bump(*names)
+
+
+# ---------------------------
+# Read-through helper
+# ---------------------------
+def get_or_build(key, build):
+    cache = get_cache()
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        if value is not None:
+            cache.set(key, value, settings.PAGE_CACHE_TIMEOUT)
+    return value
+
+
+async def aget_or_build(key, build):
+    # `build` is a coroutine function.
+    cache = get_cache()
+    value = await cache.aget(key)
+    if value is None:
+        value = await build()
+        if value is not None:
+            await cache.aset(key, value, settings.PAGE_CACHE_TIMEOUT)
+    return value
+
+
+# ---------------------------
+# Article detail snapshot
+# ---------------------------
+def article_snapshot(pk):
+    # The article (with author and publisher) plus its rendered body, or
+    # None if it does not exist.
+    def build():
+        article = (
+            Article.objects.select_related("author", "publisher").filter(pk=pk).first()
+        )
+        return _snapshot(article)
+
+    return get_or_build(article_detail_key(pk), build)
+
+
+async def aarticle_snapshot(pk):
+    async def build():
+        article = await (
+            Article.objects.select_related("author", "publisher").filter(pk=pk).afirst()
+        )
+        return _snapshot(article)
+
+    return await aget_or_build(await aarticle_detail_key(pk), build)
+
+
+def _snapshot(article):
+    if article is None:
+        return None
+    body = render_to_string("article_body.html", {"article": article})
+    return {"article": article, "body": str(body)}
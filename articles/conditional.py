@@ -0,0 +1,137 @@
+import datetime
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .cache import HOMEPAGE, SITE, article_snapshot, stamps
+from .models import FeedEntry
+from .subscriptions import get_subscription_state
+
+# Validators for conditional GET. Each one is far cheaper than the view it
+# guards: cache stamps (no database), or one aggregate over the reader's
+# feed index. Pages also depend on who is looking (nav bar, subscribe
+# buttons), so the viewer is part of every ETag.
+
+
+def _etag(*parts):
+    return hashlib.md5("|".join(str(p) for p in parts).encode()).hexdigest()
+
+
+def _viewer(request):
+    user = request.user
+    if not user.is_authenticated:
+        return ("anonymous",)
+    return (user.pk, user.username, getattr(user, "role", ""))
+
+
+def _is_reader(user):
+    return user.is_authenticated and getattr(user, "role", None) == "reader"
+
+
+def _subscriptions(request):
+    state = get_subscription_state(request)
+    return sorted(state.publisher_ids), sorted(state.journalist_ids)
+
+
+def feed_version(reader):
+    # Index-only on feed_reader_sort_idx: changes whenever an entry is
+    # added (approval, subscribe) or removed (unsubscribe, retraction).
+    row = FeedEntry.objects.filter(reader=reader).aggregate(
+        count=Count("id"), newest=Max("sort_key")
+    )
+    return row["count"], row["newest"]
+
+
+# ---------------------------
+# Homepage
+# ---------------------------
+def home_etag(request):
+    # The homepage stamp moves on every Article save/delete, edits included.
+    parts = [*stamps(SITE, HOMEPAGE), request.GET.get("cursor", ""), *_viewer(request)]
+    if _is_reader(request.user):
+        parts += [*feed_version(request.user), *_subscriptions(request)]
+    return _etag(*parts)
+
+
+# ---------------------------
+# Subscribed-articles API
+# ---------------------------
+def subscribed_articles_etag(request):
+    if not _is_reader(request.user):
+        return None
+    return _etag(
+        *stamps(SITE, HOMEPAGE),
+        request.GET.get("cursor", ""),
+        request.user.pk,
+        *feed_version(request.user),
+        *_subscriptions(request),
+    )
+
+
+# ---------------------------
+# Article detail
+# ---------------------------
+def _cached_article(pk):
+    # Warms the same snapshot the view renders from.
+    snapshot = article_snapshot(pk)
+    return snapshot["article"] if snapshot else None
+
+
+def article_last_modified(request, pk):
+    if request.user.is_authenticated:
+        # Subscribe buttons can change without the article changing.
+        return None
+    article = _cached_article(pk)
+    return article.updated_at if article else None
+
+
+def article_etag(request, pk):
+    article = _cached_article(pk)
+    if article is None:
+        return None
+    parts = [*stamps(SITE), pk, article.updated_at.isoformat(), *_viewer(request)]
+    if _is_reader(request.user):
+        parts += _subscriptions(request)
+    return _etag(*parts)
+
+
+# ---------------------------
+# Async views
+# ---------------------------
+def acondition(etag_func=None, last_modified_func=None):
+    # Django's @condition calls its validators inline, which the ORM refuses
+    # inside an event loop. This variant runs the same validators in one
+    # sync_to_async hop, then awaits the view only if the client is stale.
+    def validate(request, *args, **kwargs):
+        last_modified = etag = None
+        if last_modified_func:
+            if dt := last_modified_func(request, *args, **kwargs):
+                if not timezone.is_aware(dt):
+                    dt = timezone.make_aware(dt, datetime.timezone.utc)
+                last_modified = int(dt.timestamp())
+        if etag_func:
+            etag = etag_func(request, *args, **kwargs)
+        return (quote_etag(etag) if etag is not None else None), last_modified
+
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag, last_modified = await sync_to_async(validate)(request, *args, **kwargs)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                if last_modified and not response.has_header("Last-Modified"):
+                    response.headers["Last-Modified"] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+            return response
+
+        return inner
+
+    return decorator
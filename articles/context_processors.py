@@ -0,0 +1,6 @@
+from .subscriptions import get_subscription_state
+
+
+def subscriptions(request):
+    # Lazy: the ID sets are only queried if a template actually asks.
+    return {"subscriptions": get_subscription_state(request)}
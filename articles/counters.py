@@ -0,0 +1,158 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Article, CustomUser, Publisher
+from .profiles import JournalistSubscription, PublisherSubscription
+
+# Subscriber and approved-article counts stored on Publisher and CustomUser,
+# so pages can show and sort by them without COUNT(*) over the
+# subscription and article tables. Signal handlers (signals.py) and bulk
+# moderation apply deltas as UPDATE ... SET n = n + delta, which is atomic
+# under concurrent writers; paths that bypass both (queryset updates, raw
+# SQL, bulk_create of subscription rows) leave drift that
+# reconcile_counters repairs.
+
+# through model -> (counted model, subscriber column, target column)
+SUBSCRIPTIONS = {
+    PublisherSubscription: (Publisher, "customuser_id", "publisher_id"),
+    JournalistSubscription: (CustomUser, "from_customuser_id", "to_customuser_id"),
+}
+
+
+def adjust(model, field, deltas):
+    # deltas: {pk: delta}. One UPDATE per distinct delta, not per row.
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    for delta, pks in by_delta.items():
+        value = F(field) + delta
+        if delta < 0:
+            # Never below zero, even if the stored count had drifted low.
+            value = Greatest(value, 0)
+        model.objects.filter(pk__in=pks).update(**{field: value})
+
+
+# ---------------------------
+# Approved articles
+# ---------------------------
+def count_articles(added=(), removed=()):
+    # added/removed: (publisher_id, author_id) of articles entering or
+    # leaving the approved set. An edit that keeps both nets out to nothing.
+    publishers, authors = Counter(), Counter()
+    for sign, rows in ((1, added), (-1, removed)):
+        for publisher_id, author_id in rows:
+            publishers[publisher_id] += sign
+            authors[author_id] += sign
+    adjust(Publisher, "approved_article_count", publishers)
+    adjust(CustomUser, "approved_article_count", authors)
+
+
+# ---------------------------
+# Subscriptions
+# ---------------------------
+def existing_targets(through, instance, reverse, pk_set=None):
+    # Targets of the subscription rows a remove()/clear() is about to
+    # delete, one per row. remove() reports every pk it was given, whether
+    # or not the row existed, so this reads them before they go.
+    _, subscriber, target = SUBSCRIPTIONS[through]
+    own, other = (target, subscriber) if reverse else (subscriber, target)
+    rows = through.objects.filter(**{own: instance.pk})
+    if pk_set is not None:
+        rows = rows.filter(**{f"{other}__in": pk_set})
+    return list(rows.values_list(target, flat=True))
+
+
+def added_targets(instance, reverse, pk_set):
+    # add() reports only the rows it actually inserted.
+    return [instance.pk] * len(pk_set) if reverse else list(pk_set)
+
+
+def count_subscriptions(through, added=(), removed=()):
+    model = SUBSCRIPTIONS[through][0]
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    adjust(model, "subscriber_count", deltas)
+
+
+def forget_subscriber(user_id):
+    # A deleted user's subscription rows go by cascade, without m2m_changed.
+    for through, (_, subscriber, target) in SUBSCRIPTIONS.items():
+        count_subscriptions(
+            through,
+            removed=through.objects.filter(**{subscriber: user_id}).values_list(target, flat=True),
+        )
+
+
+# ---------------------------
+# Reconciliation
+# ---------------------------
+def _sources():
+    # counted model -> {counter field: (rows counted, column holding its pk)}
+    approved = Article.objects.filter(approved=True)
+    return {
+        Publisher: {
+            "subscriber_count": (PublisherSubscription.objects.all(), "publisher_id"),
+            "approved_article_count": (approved, "publisher_id"),
+        },
+        CustomUser: {
+            "subscriber_count": (JournalistSubscription.objects.all(), "to_customuser_id"),
+            "approved_article_count": (approved, "author_id"),
+        },
+    }
+
+
+def _actual_counts(rows, column, ids):
+    return dict(
+        rows.filter(**{f"{column}__in": ids})
+        .order_by()
+        .values(column)
+        .annotate(n=Count("*"))
+        .values_list(column, "n")
+    )
+
+
+def reconcile_counters(batch_size=1000, dry_run=False, progress=None):
+    # Recounts in primary key batches. Each batch locks its rows first, so a
+    # concurrent F() update either lands before the recount (and is counted)
+    # or waits and is applied on top of the corrected value.
+    repaired = {}
+    for model, counters in _sources().items():
+        fields = list(counters)
+        last_id = fixed = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    model.objects.select_for_update()
+                    .filter(pk__gt=last_id)
+                    .order_by("pk")
+                    .only("pk", *fields)[:batch_size]
+                )
+                if not batch:
+                    break
+                ids = [obj.pk for obj in batch]
+                actual = {
+                    field: _actual_counts(rows, column, ids)
+                    for field, (rows, column) in counters.items()
+                }
+                drifted = []
+                for obj in batch:
+                    changed = False
+                    for field in fields:
+                        value = actual[field].get(obj.pk, 0)
+                        if getattr(obj, field) != value:
+                            setattr(obj, field, value)
+                            changed = True
+                    if changed:
+                        drifted.append(obj)
+                if drifted and not dry_run:
+                    model.objects.bulk_update(drifted, fields)
+            last_id = ids[-1]
+            fixed += len(drifted)
+            if progress:
+                progress(model, last_id, fixed)
+        repaired[model._meta.label] = fixed
+    return repaired
@@ -0,0 +1,123 @@
+import logging
+from datetime import timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Max, Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import CustomUser, FeedEntry
+
+logger = logging.getLogger(__name__)
+
+# Digests are built from the readers' materialized feeds: every FeedEntry
+# an approval wrote since a reader's watermark is news to them. Backfilled
+# entries (subscribing, feed rebuilds, imports) get fresh ids for old
+# articles, so they are skipped. One query covers all
+# due readers of a frequency, ordered by reader so each reader's entries
+# arrive together.
+
+PERIODS = {
+    "hourly": timedelta(hours=1),
+    "daily": timedelta(days=1),
+}
+# Cron jitter: a run a few seconds early still counts as "due".
+GRACE = timedelta(minutes=5)
+
+
+def reset_watermark(user):
+    # Readers switching to a digest start from now: articles they were
+    # already emailed about individually are not repeated.
+    user.digest_watermark = FeedEntry.objects.aggregate(last=Max("id"))["last"] or 0
+
+
+def digest_rows(frequency, now):
+    cutoff = now - PERIODS[frequency] + GRACE
+    return (
+        FeedEntry.objects.filter(
+            reader__digest_frequency=frequency,
+            id__gt=F("reader__digest_watermark"),
+            backfilled=False,
+        )
+        .filter(Q(reader__last_digest_at__isnull=True) | Q(reader__last_digest_at__lte=cutoff))
+        .exclude(reader__email="")
+        .order_by("reader_id", "-sort_key", "-article_id")
+        .values_list(
+            "id",
+            "reader_id",
+            "reader__username",
+            "reader__email",
+            "article_id",
+            "article__title",
+            "article__author__username",
+            "article__publisher__name",
+            "sort_key",
+        )
+    )
+
+
+def _build_message(frequency, username, email, rows, connection):
+    limit = settings.DIGEST_MAX_ARTICLES
+    articles = [
+        {
+            "title": title,
+            "author": author,
+            "publisher": publisher,
+            "created_at": created_at,
+            "url": settings.SITE_URL + reverse("article_detail", args=[article_id]),
+        }
+        for _, _, _, _, article_id, title, author, publisher, created_at in rows[:limit]
+    ]
+    body = render_to_string("digest_email.txt", {
+        "username": username,
+        "frequency": frequency,
+        "articles": articles,
+        "more": max(len(rows) - limit, 0),
+    })
+    return EmailMessage(
+        subject=f"Your {frequency} digest: {len(rows)} new article{'s' if len(rows) != 1 else ''}",
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+        connection=connection,
+    )
+
+
+def _flush(connection, messages, readers):
+    # Watermarks move only after the batch went out: a failed send is
+    # retried on the next run.
+    sent = connection.send_messages(messages) or 0
+    CustomUser.objects.bulk_update(readers, ["digest_watermark", "last_digest_at"])
+    return sent
+
+
+def send_digests(frequency, batch_size=None, now=None):
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    now = now or timezone.now()
+    sent = 0
+    messages, readers = [], []
+    connection = get_connection()
+    connection.open()
+    try:
+        rows = digest_rows(frequency, now).iterator(chunk_size=2000)
+        for reader_id, group in groupby(rows, key=lambda row: row[1]):
+            group = list(group)
+            _, _, username, email, *_ = group[0]
+            messages.append(_build_message(frequency, username, email, group, connection))
+            readers.append(CustomUser(
+                id=reader_id,
+                digest_watermark=max(row[0] for row in group),
+                last_digest_at=now,
+            ))
+            if len(messages) >= batch_size:
+                sent += _flush(connection, messages, readers)
+                messages, readers = [], []
+        if messages:
+            sent += _flush(connection, messages, readers)
+    finally:
+        connection.close()
+    logger.info("Sent %s %s digests", sent, frequency)
+    return sent
@@ -0,0 +1,131 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Article, CustomUser, FeedEntry
+
+# Rows per INSERT when writing feed entries.
+BATCH_SIZE = 1000
+
+
+def _insert(rows, backfilled=False):
+    batch = []
+    inserted = 0
+    for reader_id, article_id, sort_key in rows:
+        batch.append(
+            FeedEntry(
+                reader_id=reader_id, article_id=article_id, sort_key=sort_key,
+                backfilled=backfilled,
+            )
+        )
+        if len(batch) >= BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        inserted += len(batch)
+    return inserted
+
+
+# ---------------------------
+# Reads
+# ---------------------------
+def reader_feed(reader):
+    # Feed pages show the stored excerpt; the body stays in the database.
+    return (
+        FeedEntry.objects.filter(reader=reader)
+        .select_related("article__author", "article__publisher")
+        .defer("article__content")
+        .order_by("-sort_key", "-article_id")
+    )
+
+
+# ---------------------------
+# Fan-out on approval
+# ---------------------------
+def fan_out_articles(articles, backfilled=False):
+    # Batched fan-out: two queries for all readers of the whole set, not
+    # two per article. Imports pass backfilled=True: archived articles are
+    # not news for digests.
+    articles = [article for article in articles if article.approved]
+    publisher_readers = defaultdict(set)
+    for reader_id, publisher_id in CustomUser.subscribed_publishers.through.objects.filter(
+        publisher_id__in={article.publisher_id for article in articles}
+    ).values_list("customuser_id", "publisher_id"):
+        publisher_readers[publisher_id].add(reader_id)
+    journalist_readers = defaultdict(set)
+    for reader_id, journalist_id in CustomUser.subscribed_journalists.through.objects.filter(
+        to_customuser_id__in={article.author_id for article in articles}
+    ).values_list("from_customuser_id", "to_customuser_id"):
+        journalist_readers[journalist_id].add(reader_id)
+
+    return _insert(
+        (
+            (reader_id, article.id, article.created_at)
+            for article in articles
+            for reader_id in publisher_readers[article.publisher_id] | journalist_readers[article.author_id]
+        ),
+        backfilled,
+    )
+
+
+def retract_articles(article_ids):
+    return FeedEntry.objects.filter(article_id__in=article_ids).delete()[0]
+
+
+# ---------------------------
+# Backfill / cleanup on (un)subscribe
+# ---------------------------
+def _backfill(reader, articles):
+    rows = articles.filter(approved=True).values_list("id", "created_at")
+    return _insert(
+        (
+            (reader.id, article_id, created_at)
+            for article_id, created_at in rows.iterator(chunk_size=BATCH_SIZE)
+        ),
+        backfilled=True,
+    )
+
+
+def backfill_publisher(reader, publisher):
+    return _backfill(reader, Article.objects.filter(publisher=publisher))
+
+
+def backfill_journalist(reader, journalist):
+    return _backfill(reader, Article.objects.filter(author=journalist))
+
+
+def remove_publisher(reader, publisher):
+    # Keep articles the reader still receives through a followed journalist.
+    return (
+        FeedEntry.objects.filter(reader=reader, article__publisher=publisher)
+        .exclude(article__author__in=reader.subscribed_journalists.all())
+        .delete()[0]
+    )
+
+
+def remove_journalist(reader, journalist):
+    # Keep articles the reader still receives through a subscribed publisher.
+    return (
+        FeedEntry.objects.filter(reader=reader, article__author=journalist)
+        .exclude(article__publisher__in=reader.subscribed_publishers.all())
+        .delete()[0]
+    )
+
+
+# ---------------------------
+# Full rebuild
+# ---------------------------
+def rebuild_reader_feed(reader):
+    publisher_ids = list(reader.subscribed_publishers.values_list("id", flat=True))
+    journalist_ids = list(reader.subscribed_journalists.values_list("id", flat=True))
+    with transaction.atomic():
+        FeedEntry.objects.filter(reader=reader).delete()
+        if not publisher_ids and not journalist_ids:
+            return 0
+        articles = Article.objects.filter(
+            Q(publisher_id__in=publisher_ids) | Q(author_id__in=journalist_ids)
+        )
+        return _backfill(reader, articles)
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from .digests import reset_watermark
 from .models import Article, Publisher, Newsletter
 
 User = get_user_model()
@@ -93,3 +94,24 @@ class NewsletterForm(forms.ModelForm):
 
 
 
+
+
+class DigestPreferenceForm(forms.ModelForm):
+    class Meta:
+        model = User
+        fields = ['digest_frequency']
+        labels = {
+            'digest_frequency': 'Email me about new articles'
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['digest_frequency'].widget.attrs.update({'class': 'form-select'})
+
+    def save(self, commit=True):
+        user = super().save(commit=False)
+        if 'digest_frequency' in self.changed_data and user.digest_frequency != 'immediate':
+            reset_watermark(user)
+        if commit:
+            user.save(update_fields=['digest_frequency', 'digest_watermark'])
+        return user
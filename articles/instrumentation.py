@@ -0,0 +1,226 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+# Per-request cost accounting: SQL (via execute wrappers), template
+# rendering (via the template backend below) and the view itself. Only a
+# sampled fraction of requests pays for it; the rest skip straight through.
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    __slots__ = ("queries", "db", "template", "view", "total", "_render_depth")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.view = 0.0
+        self.total = 0.0
+        self._render_depth = 0
+
+    def as_dict(self):
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db * 1000, 2),
+            "template_ms": round(self.template * 1000, 2),
+            "view_ms": round(self.view * 1000, 2),
+            "total_ms": round(self.total * 1000, 2),
+        }
+
+
+def current_metrics():
+    return _current.get()
+
+
+# ---------------------------
+# SQL
+# ---------------------------
+# The timer sits on every connection, not just those of the thread running
+# the middleware: under ASGI the ORM runs in sync_to_async worker threads,
+# each with its own connections, and sees the request's metrics through
+# the copied context. Outside a sampled request it costs one ContextVar
+# lookup per query.
+def _query_timer(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db += time.perf_counter() - started
+        metrics.queries += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    # connection_created fires again on reconnect; install once per wrapper.
+    if _query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _query_timer)
+
+
+connection_created.connect(install_query_timer)
+
+
+# ---------------------------
+# Templates
+# ---------------------------
+class InstrumentedTemplate:
+    def __init__(self, template):
+        self._template = template
+
+    def __getattr__(self, name):
+        return getattr(self._template, name)
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return self._template.render(context, request)
+        # Count only the outermost render; nested render_to_string calls
+        # are already inside its time.
+        metrics._render_depth += 1
+        started = time.perf_counter()
+        try:
+            return self._template.render(context, request)
+        finally:
+            metrics._render_depth -= 1
+            if not metrics._render_depth:
+                metrics.template += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return InstrumentedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return InstrumentedTemplate(super().get_template(template_name))
+
+
+# ---------------------------
+# Middleware
+# ---------------------------
+@contextmanager
+def measure():
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    started = time.perf_counter()
+    try:
+        yield metrics
+    finally:
+        metrics.total = time.perf_counter() - started
+        _current.reset(token)
+
+
+def server_timing(metrics):
+    return ", ".join([
+        f'db;dur={metrics.db * 1000:.1f};desc="{metrics.queries} queries"',
+        f"tpl;dur={metrics.template * 1000:.1f}",
+        f"view;dur={metrics.view * 1000:.1f}",
+        f"total;dur={metrics.total * 1000:.1f}",
+    ])
+
+
+def query_budget(queries):
+    # Per-view INSTRUMENTATION_QUERY_BUDGET, for views whose query count is
+    # high by design (e.g. moderation: feeds, outboxes, search index and
+    # counters in one transaction). Apply outermost.
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+def over_budget(metrics, queries_allowed=None):
+    if queries_allowed is None:
+        queries_allowed = settings.INSTRUMENTATION_QUERY_BUDGET
+    reasons = []
+    if queries_allowed and metrics.queries > queries_allowed:
+        reasons.append("queries")
+    if settings.INSTRUMENTATION_LATENCY_BUDGET_MS and metrics.total * 1000 > settings.INSTRUMENTATION_LATENCY_BUDGET_MS:
+        reasons.append("latency")
+    return reasons
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            # Avoid a thread hop per request for a timestamp.
+            self.process_view = self._aprocess_view
+
+    def sampled(self):
+        rate = settings.INSTRUMENTATION_SAMPLE_RATE
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        with measure() as metrics:
+            request.metrics = metrics
+            response = self.get_response(request)
+            self._view_done(request, metrics)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        with measure() as metrics:
+            request.metrics = metrics
+            response = await self.get_response(request)
+            self._view_done(request, metrics)
+        return self.finish(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # View time runs from here until the response is back in __call__,
+        # so it also covers the response phase of middleware listed below.
+        request._view_started = time.perf_counter()
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+
+    def _view_done(self, request, metrics):
+        if hasattr(request, "_view_started"):
+            metrics.view = time.perf_counter() - request._view_started
+
+    def finish(self, request, response, metrics):
+        if settings.INSTRUMENTATION_SERVER_TIMING:
+            response["Server-Timing"] = server_timing(metrics)
+        self.log(request, response, metrics)
+        return response
+
+    def log(self, request, response, metrics):
+        view = getattr(request.resolver_match, "func", None)
+        reasons = over_budget(metrics, getattr(view, "query_budget", None))
+        level = logging.WARNING if reasons else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": getattr(request.resolver_match, "view_name", None),
+            "status": response.status_code,
+            **metrics.as_dict(),
+        }
+        if reasons:
+            record["over_budget"] = reasons
+        logger.log(level, json.dumps(record), extra={"metrics": record})
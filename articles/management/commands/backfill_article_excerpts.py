@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from articles.models import Article
+
+
+class Command(BaseCommand):
+    help = "Fill Article.excerpt, word_count and reading_time from the article bodies."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Articles read and updated per round trip.",
+        )
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Recompute every article, not only those never computed.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Article.objects.only("id", "content")
+        if not options["all"]:
+            queryset = queryset.filter(word_count=0).exclude(content="")
+        batch_size = options["batch_size"]
+
+        # Keyset over id: each batch is an index range scan, and rows the
+        # previous batch filled no longer match when --all is not given.
+        last_id = updated = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id).order_by("id")[:batch_size])
+            if not batch:
+                break
+            for article in batch:
+                article.refresh_precomputed()
+            Article.objects.bulk_update(batch, Article.PRECOMPUTED_FIELDS)
+            last_id = batch[-1].id
+            updated += len(batch)
+            self.stdout.write(f"{updated} articles updated...")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {updated} articles."))
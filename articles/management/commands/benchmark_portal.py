@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from articles.benchmark import run
+
+
+class Command(BaseCommand):
+    help = "Benchmark every articles URL with the test client and print latency and query counts as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50, help="Timed requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per scenario.")
+        parser.add_argument(
+            "--cold", action="store_true",
+            help="Clear the page cache before every timed request.",
+        )
+        parser.add_argument(
+            "--only", action="append",
+            help="Scenario label or URL name to run (repeatable).",
+        )
+        parser.add_argument("--output", help="Write the report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        report = run(
+            iterations=options["iterations"],
+            warmup=options["warmup"],
+            cold=options["cold"],
+            only=options["only"],
+        )
+        data = json.dumps(report, indent=2, default=str)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(data + "\n")
+            self.stderr.write(f"Wrote {len(report['results'])} results to {options['output']}.")
+        else:
+            self.stdout.write(data)
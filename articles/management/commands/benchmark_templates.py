@@ -0,0 +1,18 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from articles.benchmark import render_cards
+
+
+class Command(BaseCommand):
+    help = "Time rendering a homepage card list with cold and warm card fragment caches; prints JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=100, help="Article cards in the list.")
+        parser.add_argument("--iterations", type=int, default=20, help="Timed renders per mode.")
+        parser.add_argument("--words", type=int, default=300, help="Words in each article body.")
+
+    def handle(self, *args, **options):
+        report = render_cards(options["cards"], options["iterations"], options["words"])
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.transfer import import_articles
+
+
+class Command(BaseCommand):
+    help = "Bulk-import articles from a JSONL or CSV file (streamed, batched, resumable)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL or CSV file with title, content, author, publisher, approved, created_at.")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT and per transaction.")
+        parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint).")
+        parser.add_argument("--resume", action="store_true", help="Continue after the rows recorded in the checkpoint.")
+        parser.add_argument("--skip-feeds", action="store_true", help="Do not fan approved articles out to reader feeds.")
+        parser.add_argument("--skip-index", action="store_true", help="Do not add approved articles to the search index.")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+        try:
+            result = import_articles(
+                options["path"],
+                fmt=options["format"],
+                batch_size=options["batch_size"],
+                checkpoint=options["checkpoint"],
+                resume=options["resume"],
+                update_feeds=not options["skip_feeds"],
+                update_index=not options["skip_index"],
+                progress=lambda rows, imported, rate: self.stdout.write(
+                    f"{rows} rows read, {imported} imported ({rate:.0f} rows/s)..."
+                ),
+                on_error=lambda line, e: self.stderr.write(f"Row {line} skipped: {e}"),
+            )
+        except FileNotFoundError as e:
+            raise CommandError(e)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['imported']} articles from {result['rows'] - result['skipped']} rows "
+                f"({result['failed']} failed, {result['skipped']} skipped by checkpoint) "
+                f"at {result['rows_per_second']:.0f} rows/s."
+            )
+        )
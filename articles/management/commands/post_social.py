@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from articles.social import process_posts
+
+
+class Command(BaseCommand):
+    help = "Post queued approved articles to Twitter/X within the rate limit."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=None,
+            help="Maximum number of posts per pass (default: remaining quota).",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling for new posts instead of exiting when idle.",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=30.0,
+            help="Seconds to sleep between polls when idle (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.TWITTER_ENABLED:
+            self.stdout.write("TWITTER_ENABLED is off; nothing to do.")
+            return
+        while True:
+            claimed, posted = process_posts(options["limit"])
+            if claimed:
+                self.stdout.write(f"Posted {posted} of {claimed} queued articles.")
+            if not claimed:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
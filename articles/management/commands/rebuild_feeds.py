@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from articles.fanout import rebuild_reader_feed
+from articles.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized reader feeds from current subscriptions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reader",
+            action="append",
+            type=int,
+            dest="readers",
+            help="Only rebuild the feed of this reader id (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        readers = CustomUser.objects.all()
+        if options["readers"]:
+            readers = readers.filter(id__in=options["readers"])
+        else:
+            # Readers without subscriptions only need their stale rows cleared.
+            readers = readers.filter(
+                Q(subscribed_publishers__isnull=False)
+                | Q(subscribed_journalists__isnull=False)
+                | Q(feed_entries__isnull=False)
+            ).distinct()
+
+        total_readers = 0
+        total_entries = 0
+        for reader in readers.only("id").iterator():
+            total_entries += rebuild_reader_feed(reader)
+            total_readers += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {total_readers} feeds ({total_entries} entries)."
+            )
+        )
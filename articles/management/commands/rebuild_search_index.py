@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from articles.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for articles and newsletters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=500,
+            help="Documents tokenized and inserted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = rebuild_index(
+            chunk_size=options["chunk_size"],
+            progress=lambda n: self.stdout.write(f"Indexed {n} documents..."),
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {total} documents in {elapsed:.1f}s.")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from articles.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recount subscriber and approved-article counters and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Publishers/users recounted and locked per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Report drifted rows without writing.",
+        )
+
+    def handle(self, *args, **options):
+        repaired = reconcile_counters(options["batch_size"], options["dry_run"])
+        verb = "Would repair" if options["dry_run"] else "Repaired"
+        for label, count in repaired.items():
+            self.stdout.write(self.style.SUCCESS(f"{verb} {count} {label} rows."))
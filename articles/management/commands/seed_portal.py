@@ -0,0 +1,194 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from articles.counters import reconcile_counters
+from articles.fanout import fan_out_articles
+from articles.models import Article, CustomUser, Publisher
+from articles.search import rebuild_index
+
+WORDS = (
+    "market election city council storm season league budget school health "
+    "transport energy housing climate court police festival theatre museum "
+    "harbour airport startup factory union strike vote policy report study "
+    "science research hospital river bridge road railway farm village region"
+).split()
+
+
+def zipf_weights(count, exponent):
+    # A few publishers/journalists attract most readers and most articles.
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic portal dataset (users, publishers, articles, subscriptions)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=1000)
+        parser.add_argument("--journalists", type=int, default=100)
+        parser.add_argument("--editors", type=int, default=5)
+        parser.add_argument("--publishers", type=int, default=20)
+        parser.add_argument("--articles", type=int, default=10000)
+        parser.add_argument(
+            "--subscriptions", type=float, default=8.0,
+            help="Average subscriptions per reader, split between publishers and journalists.",
+        )
+        parser.add_argument(
+            "--approved-ratio", type=float, default=0.9,
+            help="Fraction of articles that are approved.",
+        )
+        parser.add_argument(
+            "--skew", type=float, default=1.1,
+            help="Zipf exponent for publisher/journalist popularity.",
+        )
+        parser.add_argument("--days", type=int, default=365, help="Spread articles over this many days.")
+        parser.add_argument("--words", type=int, default=400, help="Average article length in words.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--password", default="password", help="Password for every generated user.")
+        parser.add_argument("--skip-feeds", action="store_true", help="Do not build reader feeds.")
+        parser.add_argument("--index", action="store_true", help="Rebuild the search index afterwards.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.tag = uuid.uuid4().hex[:6]
+        started = time.monotonic()
+
+        password = make_password(options["password"])
+        readers = self._users("reader", options["readers"], password)
+        journalists = self._users("journalist", options["journalists"], password)
+        self._users("editor", options["editors"], password)
+        owners = self._users("publisher", options["publishers"], password)
+        publishers = self._publishers(owners)
+
+        article_ids = self._articles(options, journalists, publishers)
+        edges = self._subscriptions(options, readers, journalists, publishers)
+        # Everything above was bulk-inserted, past the counter signals.
+        reconcile_counters(self.batch_size)
+
+        if not options["skip_feeds"]:
+            entries = 0
+            for start in range(0, len(article_ids), self.batch_size):
+                chunk = Article.objects.filter(
+                    id__in=article_ids[start:start + self.batch_size], approved=True
+                ).only("id", "author_id", "publisher_id", "created_at", "approved")
+                entries += fan_out_articles(chunk)
+            self.stdout.write(f"Built {entries} feed entries.")
+        if options["index"]:
+            self.stdout.write(f"Indexed {rebuild_index()} documents.")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(readers)} readers, {len(journalists)} journalists, "
+                f"{len(publishers)} publishers, {len(article_ids)} articles and "
+                f"{edges} subscriptions (tag {self.tag}) in {time.monotonic() - started:.1f}s."
+            )
+        )
+
+    def _users(self, role, count, password):
+        prefix = f"seed_{self.tag}_{role}_"
+        users = [
+            CustomUser(
+                username=f"{prefix}{i}", email=f"{prefix}{i}@example.com",
+                password=password, role=role,
+            )
+            for i in range(count)
+        ]
+        CustomUser.objects.bulk_create(users, batch_size=self.batch_size)
+        # bulk_create does not return primary keys on MySQL.
+        return list(
+            CustomUser.objects.filter(username__startswith=prefix).order_by("id").values_list("id", flat=True)
+        )
+
+    def _publishers(self, owner_ids):
+        Publisher.objects.bulk_create(
+            [
+                Publisher(name=f"Seed {self.tag} Press {i}", owner_id=owner_id)
+                for i, owner_id in enumerate(owner_ids)
+            ],
+            batch_size=self.batch_size,
+        )
+        return list(
+            Publisher.objects.filter(owner_id__in=owner_ids).order_by("id").values_list("id", flat=True)
+        )
+
+    def _text(self, words):
+        count = max(5, int(self.rng.gauss(words, words / 3)))
+        return " ".join(self.rng.choices(WORDS, k=count))
+
+    def _articles(self, options, journalists, publishers):
+        count = options["articles"]
+        if not count or not journalists or not publishers:
+            return []
+        journalist_weights = zipf_weights(len(journalists), options["skew"])
+        publisher_weights = zipf_weights(len(publishers), options["skew"])
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            authors = self.rng.choices(journalists, journalist_weights, k=size)
+            houses = self.rng.choices(publishers, publisher_weights, k=size)
+            batch = [
+                Article(
+                    title=self._text(8).capitalize(),
+                    content=self._text(options["words"]),
+                    author_id=author_id,
+                    publisher_id=publisher_id,
+                    approved=self.rng.random() < options["approved_ratio"],
+                )
+                for author_id, publisher_id in zip(authors, houses)
+            ]
+            # bulk_create skips save(), which fills these.
+            for article in batch:
+                article.refresh_precomputed()
+            Article.objects.bulk_create(batch)
+
+        ids = list(
+            Article.objects.filter(author_id__in=journalists).order_by("id").values_list("id", flat=True)
+        )
+        # auto_now_add stamps every row with "now"; spread them over the
+        # requested window, oldest first so id order follows time order.
+        now = timezone.now()
+        offsets = sorted(
+            (self.rng.uniform(0, options["days"] * 86400) for _ in ids), reverse=True
+        )
+        for start in range(0, len(ids), self.batch_size):
+            batch = [
+                Article(id=pk, created_at=now - timedelta(seconds=offset), updated_at=now - timedelta(seconds=offset))
+                for pk, offset in zip(ids[start:start + self.batch_size], offsets[start:start + self.batch_size])
+            ]
+            Article.objects.bulk_update(batch, ["created_at", "updated_at"])
+        return ids
+
+    def _subscriptions(self, options, readers, journalists, publishers):
+        publisher_weights = zipf_weights(len(publishers), options["skew"])
+        journalist_weights = zipf_weights(len(journalists), options["skew"])
+        PublisherEdge = CustomUser.subscribed_publishers.through
+        JournalistEdge = CustomUser.subscribed_journalists.through
+        mean = options["subscriptions"] / 2
+
+        edges = 0
+        for start in range(0, len(readers), self.batch_size):
+            publisher_edges = []
+            journalist_edges = []
+            for reader_id in readers[start:start + self.batch_size]:
+                if publishers:
+                    k = min(len(publishers), int(self.rng.expovariate(1 / mean)) if mean else 0)
+                    for publisher_id in set(self.rng.choices(publishers, publisher_weights, k=k)):
+                        publisher_edges.append(PublisherEdge(customuser_id=reader_id, publisher_id=publisher_id))
+                if journalists:
+                    k = min(len(journalists), int(self.rng.expovariate(1 / mean)) if mean else 0)
+                    for journalist_id in set(self.rng.choices(journalists, journalist_weights, k=k)):
+                        journalist_edges.append(
+                            JournalistEdge(from_customuser_id=reader_id, to_customuser_id=journalist_id)
+                        )
+            with transaction.atomic():
+                PublisherEdge.objects.bulk_create(publisher_edges, ignore_conflicts=True)
+                JournalistEdge.objects.bulk_create(journalist_edges, ignore_conflicts=True)
+            edges += len(publisher_edges) + len(journalist_edges)
+        return edges
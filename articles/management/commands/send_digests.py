@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from articles.digests import PERIODS, send_digests
+
+
+class Command(BaseCommand):
+    help = "Email hourly/daily digests of new articles to readers who chose them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--frequency", choices=sorted(PERIODS), action="append",
+            help="Digest frequency to send (repeatable; default: all). "
+                 "Readers are skipped until their period has elapsed, so "
+                 "running this every few minutes is safe.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=None,
+            help="Digests per send_messages() call "
+                 "(default: NOTIFICATION_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        for frequency in options["frequency"] or sorted(PERIODS):
+            sent = send_digests(frequency, options["batch_size"])
+            self.stdout.write(f"Sent {sent} {frequency} digests.")
@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.models import Newsletter
+from articles.newsletters import process_dispatches, queue_newsletter, retry_failed
+
+
+class Command(BaseCommand):
+    help = "Send queued newsletters to their authors' followers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--newsletter", type=int, action="append", default=[],
+            help="Queue this newsletter id before sending (repeatable).",
+        )
+        parser.add_argument(
+            "--retry-failed", action="store_true",
+            help="With --newsletter, send again to recipients that failed.",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=10,
+            help="Maximum number of dispatches to claim per pass.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=None,
+            help="Recipients loaded and sent per chunk (default: NEWSLETTER_CHUNK_SIZE).",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Sender threads, each with its own connection (default: NEWSLETTER_WORKERS).",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling for new dispatches instead of exiting when idle.",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5.0,
+            help="Seconds to sleep between polls when idle (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        for pk in options["newsletter"]:
+            try:
+                dispatch = queue_newsletter(Newsletter.objects.get(pk=pk))
+            except Newsletter.DoesNotExist:
+                raise CommandError(f"Newsletter {pk} does not exist.")
+            if options["retry_failed"]:
+                retry_failed(dispatch)
+
+        while True:
+            results = process_dispatches(options["limit"], options["chunk_size"], options["workers"])
+            for stats in results:
+                self.stdout.write(
+                    f"Newsletter {stats['newsletter']}: sent {stats['sent']}, failed {stats['failed']} "
+                    f"in {stats['seconds']}s ({stats['messages_per_second']} msg/s, "
+                    f"render {stats['render_ms']}ms)."
+                )
+            if len(results) < options["limit"]:
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
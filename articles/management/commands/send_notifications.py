@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from articles.notifications import process_jobs
+
+
+class Command(BaseCommand):
+    help = "Drain the subscriber notification outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=100,
+            help="Maximum number of jobs to claim per pass.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=None,
+            help="Recipients per send_messages() call "
+                 "(default: NOTIFICATION_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling for new jobs instead of exiting when idle.",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5.0,
+            help="Seconds to sleep between polls when idle (with --loop).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            jobs, sent = process_jobs(options["limit"], options["batch_size"])
+            if jobs:
+                self.stdout.write(f"Processed {jobs} jobs, sent {sent} emails.")
+            if jobs < options["limit"]:
+                # Outbox drained for now.
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
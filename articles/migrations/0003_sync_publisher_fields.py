@@ -0,0 +1,89 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import migrations, models
+
+
+def assign_owners(apps, schema_editor):
+    # Existing publishers get a publisher-role account that owns nothing
+    # yet, or a placeholder account (unusable password) an admin can hand
+    # over later.
+    Publisher = apps.get_model('articles', 'Publisher')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    spare = iter(list(
+        User.objects.filter(role='publisher', owned_publisher__isnull=True)
+        .order_by('id')
+        .values_list('id', flat=True)
+    ))
+    for publisher in Publisher.objects.filter(owner__isnull=True).order_by('id'):
+        owner_id = next(spare, None)
+        if owner_id is None:
+            owner_id = User.objects.create(
+                username=f'publisher-{publisher.pk}-owner',
+                password=make_password(None),
+                role='publisher',
+            ).pk
+        publisher.owner_id = owner_id
+        publisher.save(update_fields=['owner'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0002_remove_customuser_subscriptions_to_journalists_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='article',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.AlterModelOptions(
+            name='newsletter',
+            options={'ordering': ['-created_at'], 'verbose_name': 'Newsletter', 'verbose_name_plural': 'Newsletters'},
+        ),
+        migrations.AddField(
+            model_name='publisher',
+            name='description',
+            field=models.TextField(blank=True),
+        ),
+        # Nullable until assign_owners has run; 0015 makes it required.
+        migrations.AddField(
+            model_name='publisher',
+            name='owner',
+            field=models.OneToOneField(null=True, limit_choices_to={'role': 'publisher'}, on_delete=django.db.models.deletion.CASCADE, related_name='owned_publisher', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(assign_owners, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='article',
+            name='author',
+            field=models.ForeignKey(limit_choices_to={'role': 'journalist'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='role',
+            field=models.CharField(choices=[('reader', 'Reader'), ('editor', 'Editor'), ('journalist', 'Journalist'), ('publisher', 'Publisher')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='newsletter',
+            name='author',
+            field=models.ForeignKey(limit_choices_to={'role': 'journalist'}, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='publisher',
+            name='editors',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'role': 'editor'}, related_name='editor_publishers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='publisher',
+            name='journalists',
+            field=models.ManyToManyField(blank=True, limit_choices_to={'role': 'journalist'}, related_name='journalist_publishers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='publisher',
+            name='name',
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_sync_publisher_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sort_key', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='articles.article')),
+                ('reader', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['reader', '-sort_key', '-article'], name='feed_reader_sort_idx')],
+                'constraints': [models.UniqueConstraint(fields=('reader', 'article'), name='unique_feed_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_socialpost'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['approved', 'created_at', 'id'], name='article_approved_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['publisher', 'approved', 'created_at', 'id'], name='article_pub_approved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['author', 'approved', 'created_at', 'id'], name='article_author_approved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsletter',
+            index=models.Index(fields=['author', 'created_at'], name='newsletter_author_created_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0010_admin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterDispatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent')], default='pending', max_length=20)),
+                ('leased_until', models.DateTimeField(default=django.utils.timezone.now)),
+                ('enrolled_through', models.BigIntegerField(default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('newsletter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dispatch', to='articles.newsletter')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NewsletterDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='newsletter_deliveries', to=settings.AUTH_USER_MODEL)),
+                ('dispatch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='articles.newsletterdispatch')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='newsletterdispatch',
+            index=models.Index(fields=['status', 'leased_until'], name='newsletter_dispatch_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newsletterdelivery',
+            index=models.Index(fields=['dispatch', 'status', 'recipient'], name='newsletter_delivery_todo_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='newsletterdelivery',
+            constraint=models.UniqueConstraint(fields=('dispatch', 'recipient'), name='unique_newsletter_delivery'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0011_newsletter_dispatch'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='digest_frequency',
+            field=models.CharField(choices=[('immediate', 'Immediately'), ('hourly', 'Hourly digest'), ('daily', 'Daily digest')], default='immediate', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='digest_watermark',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='last_digest_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['digest_frequency', 'last_digest_at'], name='customuser_digest_idx'),
+        ),
+    ]
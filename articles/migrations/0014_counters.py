@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0013_article_precomputed_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='approved_article_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='subscriber_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='publisher',
+            name='approved_article_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='publisher',
+            name='subscriber_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='publisher',
+            index=models.Index(fields=['-subscriber_count', 'name'], name='publisher_popularity_idx'),
+        ),
+    ]
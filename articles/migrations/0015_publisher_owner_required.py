@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0014_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='publisher',
+            name='owner',
+            field=models.OneToOneField(limit_choices_to={'role': 'publisher'}, on_delete=django.db.models.deletion.CASCADE, related_name='owned_publisher', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0015_publisher_owner_required'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedentry',
+            name='backfilled',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0016_feedentry_backfilled'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='import_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
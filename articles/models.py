@@ -1,4 +1,9 @@
+import math
+
 from django.db import models
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import Truncator
 from django.contrib.auth.models import AbstractUser, Group, Permission
 
 
@@ -19,6 +24,23 @@ class CustomUser(AbstractUser):
         'self', blank=True, symmetrical=False, related_name='followers'
     )
 
+    # How a reader hears about new articles: one email per article, or a
+    # periodic digest built by `manage.py send_digests`.
+    DIGEST_CHOICES = [
+        ('immediate', 'Immediately'),
+        ('hourly', 'Hourly digest'),
+        ('daily', 'Daily digest'),
+    ]
+    digest_frequency = models.CharField(max_length=20, choices=DIGEST_CHOICES, default='immediate')
+    # Last FeedEntry id covered by a digest; the next one starts after it.
+    digest_watermark = models.BigIntegerField(default=0)
+    last_digest_at = models.DateTimeField(null=True, blank=True)
+
+    # Denormalized counts, kept current by articles.counters; repair drift
+    # with `manage.py reconcile_counters`.
+    subscriber_count = models.PositiveIntegerField(default=0)  # followers
+    approved_article_count = models.PositiveIntegerField(default=0)
+
     # Override groups/permissions to avoid clashes with AbstractUser
     groups = models.ManyToManyField(
         Group,
@@ -31,6 +53,14 @@ class CustomUser(AbstractUser):
         blank=True
     )
 
+    class Meta(AbstractUser.Meta):
+        # Admin changelist: filter on role, ordered by username.
+        indexes = [
+            models.Index(fields=['role', 'username'], name='customuser_role_idx'),
+            # send_digests: readers of one frequency whose digest is due.
+            models.Index(fields=['digest_frequency', 'last_digest_at'], name='customuser_digest_idx'),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
@@ -56,14 +86,33 @@ class Publisher(models.Model):
         blank=True,
         limit_choices_to={'role': 'journalist'}
     )
+    # Denormalized counts, see CustomUser.
+    subscriber_count = models.PositiveIntegerField(default=0)
+    approved_article_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Publishers listed by popularity.
+        indexes = [
+            models.Index(fields=['-subscriber_count', 'name'], name='publisher_popularity_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+# Card excerpts and reading time, precomputed on save.
+EXCERPT_WORDS = 30
+WORDS_PER_MINUTE = 200
+
+
 class Article(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
+    # Derived from content in save() (refresh_precomputed), so list pages
+    # can defer the body; backfill with `manage.py backfill_article_excerpts`.
+    excerpt = models.TextField(blank=True, default='')
+    word_count = models.PositiveIntegerField(default=0)
+    reading_time = models.PositiveSmallIntegerField(default=0)  # minutes
     author = models.ForeignKey(
         CustomUser,
         on_delete=models.CASCADE,
@@ -72,13 +121,60 @@ class Article(models.Model):
     publisher = models.ForeignKey(Publisher, on_delete=models.CASCADE)
     approved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set by import_articles where bulk_create cannot return primary keys
+    # (MySQL): "<run>:<row>", read back to map each row to its new id.
+    import_key = models.CharField(max_length=64, null=True, blank=True, unique=True, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        # Every list path filters on approval (plus publisher or author)
+        # and pages newest-first on (created_at, id).
+        indexes = [
+            models.Index(
+                fields=['approved', 'created_at', 'id'],
+                name='article_approved_created_idx'
+            ),
+            models.Index(
+                fields=['publisher', 'approved', 'created_at', 'id'],
+                name='article_pub_approved_idx'
+            ),
+            models.Index(
+                fields=['author', 'approved', 'created_at', 'id'],
+                name='article_author_approved_idx'
+            ),
+            # Unfiltered admin changelist and its date hierarchy
+            # (min/max and year/month ranges on created_at).
+            models.Index(
+                fields=['created_at', 'id'],
+                name='article_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({'Approved' if self.approved else 'Pending'})"
 
+    PRECOMPUTED_FIELDS = ('excerpt', 'word_count', 'reading_time')
+
+    def refresh_precomputed(self):
+        self.word_count = len(self.content.split())
+        self.excerpt = Truncator(self.content).words(EXCERPT_WORDS)
+        self.reading_time = math.ceil(self.word_count / WORDS_PER_MINUTE)
+
+    def save(self, *args, **kwargs):
+        # Skipped when content is deferred or not being saved.
+        update_fields = kwargs.get('update_fields')
+        if 'content' not in self.get_deferred_fields() and (
+            update_fields is None or 'content' in update_fields
+        ):
+            self.refresh_precomputed()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.PRECOMPUTED_FIELDS}
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse('article_detail', args=[self.pk])
+
 
 class Newsletter(models.Model):
     title = models.CharField(max_length=200)
@@ -94,8 +190,245 @@ class Newsletter(models.Model):
         ordering = ['-created_at']
         verbose_name = "Newsletter"
         verbose_name_plural = "Newsletters"
+        indexes = [
+            models.Index(
+                fields=['author', 'created_at'],
+                name='newsletter_author_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class FeedEntry(models.Model):
+    # Materialized reader feed: one row per (reader, approved article),
+    # written on approval so feed reads are a single index range scan.
+    reader = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    article = models.ForeignKey(
+        Article,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    sort_key = models.DateTimeField()
+    # Written by a subscribe backfill, feed rebuild or import rather than
+    # by an approval: part of the feed, but not news for digests.
+    backfilled = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reader', 'article'], name='unique_feed_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['reader', '-sort_key', '-article'],
+                name='feed_reader_sort_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.reader_id} -> {self.article_id}"
+
+
+class NotificationJob(models.Model):
+    # Outbox row written in the same transaction as the approval; the
+    # send_notifications worker drains it outside the request cycle.
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    article = models.OneToOneField(
+        Article,
+        on_delete=models.CASCADE,
+        related_name='notification_job'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Recipients are sent in id order; a retry resumes after this id.
+    last_recipient_id = models.BigIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='notify_job_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Notify #{self.article_id} ({self.status})"
+
+
+class SocialPost(models.Model):
+    # One syndication attempt record per approved article, drained by the
+    # post_social worker so editors never wait on the Twitter/X API.
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('posted', 'Posted'),
+        ('failed', 'Failed'),
+    ]
+    article = models.OneToOneField(
+        Article,
+        on_delete=models.CASCADE,
+        related_name='social_post'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    external_id = models.CharField(max_length=64, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    posted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='social_post_due_idx'
+            ),
+            models.Index(fields=['posted_at'], name='social_post_posted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Post #{self.article_id} ({self.status})"
+
+
+class SearchTerm(models.Model):
+    # Vocabulary of the inverted index; doc_count is the term's document
+    # frequency, kept current as documents are (re)indexed.
+    term = models.CharField(max_length=64, unique=True)
+    doc_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.term
+
+
+class SearchDocument(models.Model):
+    KIND_CHOICES = [
+        ('article', 'Article'),
+        ('newsletter', 'Newsletter'),
+    ]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    length = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'], name='unique_search_document'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.object_id}"
+
+
+class SearchPosting(models.Model):
+    # One row per (term, document). Postings are read in impact order
+    # (highest term frequency first), so a query only touches the head of
+    # each list; doc_length is copied here to score without a join.
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='postings')
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='postings')
+    frequency = models.PositiveIntegerField()
+    doc_length = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'document'], name='unique_search_posting'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['term', '-frequency'],
+                name='search_posting_impact_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.term_id} in {self.document_id} x{self.frequency}"
+
+
+class NewsletterDispatch(models.Model):
+    # One send of a newsletter to its author's followers. Recipients are
+    # enrolled as NewsletterDelivery rows in id order (enrolled_through is
+    # the watermark), so an interrupted run resumes without resending.
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+    ]
+    newsletter = models.OneToOneField(
+        Newsletter,
+        on_delete=models.CASCADE,
+        related_name='dispatch'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Claimed runs are invisible to other workers until the lease expires.
+    leased_until = models.DateTimeField(default=timezone.now)
+    enrolled_through = models.BigIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'leased_until'],
+                name='newsletter_dispatch_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Dispatch #{self.newsletter_id} ({self.status})"
+
+
+class NewsletterDelivery(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    dispatch = models.ForeignKey(
+        NewsletterDispatch,
+        on_delete=models.CASCADE,
+        related_name='deliveries'
+    )
+    recipient = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name='newsletter_deliveries'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dispatch', 'recipient'], name='unique_newsletter_delivery'
+            ),
+        ]
+        indexes = [
+            # Pending deliveries of a dispatch, in recipient order.
+            models.Index(
+                fields=['dispatch', 'status', 'recipient'],
+                name='newsletter_delivery_todo_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dispatch_id} -> {self.recipient_id} ({self.status})"
@@ -0,0 +1,89 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import invalidate_articles, invalidate_feeds
+from .counters import count_articles
+from .fanout import fan_out_articles, retract_articles
+from .models import Article
+from .notifications import cancel_articles, enqueue_articles
+from .push import publish_articles
+from .search import index_articles, remove_documents
+from .social import cancel_posts, enqueue_posts
+
+# Bulk moderation. Each action is one UPDATE/DELETE inside a transaction;
+# because queryset updates bypass post_save, the side effects that the
+# signal handlers perform for single saves are applied here once for the
+# whole set.
+
+ACTIONS = ("approve", "reject", "delete")
+
+
+@transaction.atomic
+def approve_articles(article_ids):
+    articles = list(
+        Article.objects.select_for_update()
+        .filter(id__in=article_ids, approved=False)
+        .order_by("id")
+    )
+    if not articles:
+        return 0
+    now = timezone.now()
+    Article.objects.filter(id__in=[a.id for a in articles]).update(
+        approved=True, updated_at=now
+    )
+    for article in articles:
+        article.approved = True
+        article.updated_at = now
+
+    count_articles(added=[(a.publisher_id, a.author_id) for a in articles])
+    fan_out_articles(articles)
+    enqueue_articles(articles)
+    enqueue_posts(articles)
+    index_articles(articles)
+    transaction.on_commit(lambda: invalidate_articles([a.id for a in articles]))
+    transaction.on_commit(lambda: invalidate_feeds({(a.publisher_id, a.author_id) for a in articles}))
+    transaction.on_commit(lambda: publish_articles(articles))
+    return len(articles)
+
+
+@transaction.atomic
+def reject_articles(article_ids):
+    # Withdraws approval: the articles leave feeds, search and the outboxes.
+    rows = list(
+        Article.objects.select_for_update()
+        .filter(id__in=article_ids, approved=True)
+        .values_list("id", "publisher_id", "author_id")
+    )
+    if not rows:
+        return 0
+    ids = [pk for pk, _, _ in rows]
+    Article.objects.filter(id__in=ids).update(approved=False, updated_at=timezone.now())
+    count_articles(removed=[(publisher_id, author_id) for _, publisher_id, author_id in rows])
+    retract_articles(ids)
+    cancel_articles(ids)
+    cancel_posts(ids)
+    remove_documents("article", ids)
+    transaction.on_commit(lambda: invalidate_articles(ids))
+    transaction.on_commit(lambda: invalidate_feeds({(publisher_id, author_id) for _, publisher_id, author_id in rows}))
+    return len(ids)
+
+
+@transaction.atomic
+def delete_articles(article_ids):
+    ids = list(Article.objects.filter(id__in=article_ids).values_list("id", flat=True))
+    if not ids:
+        return 0
+    # Clear the index in bulk so the per-row delete handlers find nothing;
+    # they still adjust the approved-article counters.
+    remove_documents("article", ids)
+    Article.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def moderate(action, article_ids):
+    handler = {
+        "approve": approve_articles,
+        "reject": reject_articles,
+        "delete": delete_articles,
+    }[action]
+    return handler(article_ids)
@@ -0,0 +1,318 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import CustomUser, NewsletterDelivery, NewsletterDispatch
+
+logger = logging.getLogger(__name__)
+
+# Same lease scheme as the notification outbox: a worker that dies
+# mid-dispatch lets the lease lapse and the next run carries on from the
+# deliveries still pending. A live worker renews its lease before every
+# chunk and every HEARTBEAT_SECONDS while a chunk is being sent, and
+# stops once another worker holds it.
+LEASE = timedelta(minutes=5)
+HEARTBEAT_SECONDS = LEASE.total_seconds() / 3
+
+Follow = CustomUser.subscribed_journalists.through
+
+
+class LeaseLost(Exception):
+    pass
+
+
+# ---------------------------
+# Enqueue
+# ---------------------------
+def queue_newsletter(newsletter):
+    # One dispatch per newsletter, so queueing twice sends once.
+    dispatch, _ = NewsletterDispatch.objects.get_or_create(newsletter=newsletter)
+    return dispatch
+
+
+def queue_newsletters(newsletters):
+    NewsletterDispatch.objects.bulk_create(
+        [NewsletterDispatch(newsletter=newsletter) for newsletter in newsletters],
+        ignore_conflicts=True,
+    )
+
+
+def retry_failed(dispatch):
+    with transaction.atomic():
+        count = NewsletterDelivery.objects.filter(dispatch=dispatch, status="failed").update(status="pending")
+        if count:
+            NewsletterDispatch.objects.filter(pk=dispatch.pk).update(
+                status="pending", leased_until=timezone.now(), finished_at=None,
+                failed_count=F("failed_count") - count,
+            )
+    return count
+
+
+# ---------------------------
+# Recipients
+# ---------------------------
+def enroll(dispatch, chunk_size):
+    # Pages through the author's followers by follow-row id: the follow
+    # table's index on to_customuser_id carries the id, so each chunk is a
+    # range scan. Re-enrolling a chunk after a crash is harmless.
+    while True:
+        rows = list(
+            Follow.objects.filter(
+                to_customuser_id=dispatch.newsletter.author_id,
+                id__gt=dispatch.enrolled_through,
+            )
+            .order_by("id")
+            .values_list("id", "from_customuser_id", "from_customuser__email")[:chunk_size]
+        )
+        if not rows:
+            return
+        with transaction.atomic():
+            NewsletterDelivery.objects.bulk_create(
+                [
+                    NewsletterDelivery(dispatch=dispatch, recipient_id=user_id)
+                    for _, user_id, email in rows
+                    if email
+                ],
+                ignore_conflicts=True,
+            )
+            dispatch.enrolled_through = rows[-1][0]
+            dispatch.save(update_fields=["enrolled_through"])
+        if len(rows) < chunk_size:
+            return
+
+
+def _pending(dispatch, after, chunk_size):
+    return list(
+        NewsletterDelivery.objects.filter(
+            dispatch=dispatch, status="pending", recipient_id__gt=after,
+        )
+        .order_by("recipient_id")
+        .values_list("id", "recipient_id", "recipient__email")[:chunk_size]
+    )
+
+
+# ---------------------------
+# Messages
+# ---------------------------
+def render_variants(newsletter):
+    # Rendered once per dispatch run; per-recipient messages only differ
+    # in their To: header.
+    context = {"newsletter": newsletter, "author": newsletter.author}
+    return {
+        "subject": newsletter.title,
+        "text": render_to_string("newsletter_email.txt", context),
+        "html": render_to_string("newsletter_email.html", context),
+    }
+
+
+def build_message(variants, email):
+    message = EmailMultiAlternatives(
+        subject=variants["subject"],
+        body=variants["text"],
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+    )
+    message.attach_alternative(variants["html"], "text/html")
+    return message
+
+
+class SenderPool:
+    # Worker threads that each keep one mail connection open for the whole
+    # run. Workers only talk to the mail server; delivery state is written
+    # by the calling thread.
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="newsletter")
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = get_connection()
+            connection.open()
+            self.local.connection = connection
+            with self.lock:
+                self.connections.add(connection)
+        return connection
+
+    def discard(self):
+        # A session that errored may be unusable; the next message opens
+        # a fresh one.
+        connection = self.local.__dict__.pop("connection", None)
+        if connection is not None:
+            with self.lock:
+                self.connections.discard(connection)
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _send(self, messages):
+        results = []
+        for delivery_id, message in messages:
+            try:
+                if not self.connection().send_messages([message]):
+                    raise RuntimeError("message not accepted")
+                results.append((delivery_id, None))
+            except Exception as e:
+                results.append((delivery_id, str(e) or e.__class__.__name__))
+                self.discard()
+        return results
+
+    def send(self, messages, heartbeat=None, interval=HEARTBEAT_SECONDS):
+        # heartbeat() runs in the calling thread every `interval` seconds
+        # while the workers are busy.
+        slices = [messages[i::self.workers] for i in range(self.workers)]
+        futures = [self.executor.submit(self._send, part) for part in slices if part]
+        if heartbeat is not None:
+            while wait(futures, timeout=interval).not_done:
+                heartbeat()
+        for future in futures:
+            yield from future.result()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for connection in self.connections:
+            connection.close()
+        self.connections.clear()
+
+
+def _held(dispatch):
+    return NewsletterDispatch.objects.filter(pk=dispatch.pk, leased_until=dispatch.leased_until)
+
+
+def renew_lease(dispatch):
+    # Compare-and-set on the lease this worker was given: fails once the
+    # lease lapsed and another worker claimed the dispatch.
+    until = timezone.now() + LEASE
+    if not _held(dispatch).update(leased_until=until):
+        raise LeaseLost(f"lease on newsletter dispatch {dispatch.pk} was lost")
+    dispatch.leased_until = until
+
+
+def _record(dispatch, results):
+    now = timezone.now()
+    sent = [delivery_id for delivery_id, error in results if error is None]
+    failed = defaultdict(list)
+    for delivery_id, error in results:
+        if error is not None:
+            failed[error[:1000]].append(delivery_id)
+
+    # Messages that went out are recorded even if the lease was lost, so
+    # the new holder skips them; "pending" keeps a recipient from being
+    # counted twice.
+    with transaction.atomic():
+        sent_count = NewsletterDelivery.objects.filter(id__in=sent, status="pending").update(
+            status="sent", sent_at=now, attempts=F("attempts") + 1, last_error="",
+        )
+        # One UPDATE per distinct error, not per recipient.
+        failed_count = 0
+        for error, ids in failed.items():
+            failed_count += NewsletterDelivery.objects.filter(id__in=ids, status="pending").update(
+                status="failed", attempts=F("attempts") + 1, last_error=error,
+            )
+        NewsletterDispatch.objects.filter(pk=dispatch.pk).update(
+            sent_count=F("sent_count") + sent_count,
+            failed_count=F("failed_count") + failed_count,
+        )
+        held = _held(dispatch).exists()
+    if not held:
+        raise LeaseLost(f"lease on newsletter dispatch {dispatch.pk} was lost")
+    return sent_count, failed_count
+
+
+# ---------------------------
+# Worker
+# ---------------------------
+def claim_dispatches(limit):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            NewsletterDispatch.objects.select_for_update(skip_locked=True)
+            .filter(status__in=("pending", "sending"), leased_until__lte=now)
+            .order_by("leased_until")
+            .values_list("id", flat=True)[:limit]
+        )
+        NewsletterDispatch.objects.filter(id__in=ids).update(
+            status="sending", leased_until=now + LEASE,
+        )
+    return list(NewsletterDispatch.objects.filter(id__in=ids).select_related("newsletter__author"))
+
+
+def run_dispatch(dispatch, chunk_size=None, workers=None):
+    chunk_size = chunk_size or settings.NEWSLETTER_CHUNK_SIZE
+    workers = workers or settings.NEWSLETTER_WORKERS
+    started = time.monotonic()
+    if dispatch.started_at is None:
+        dispatch.started_at = timezone.now()
+        dispatch.save(update_fields=["started_at"])
+
+    enroll(dispatch, chunk_size)
+    render_started = time.monotonic()
+    variants = render_variants(dispatch.newsletter)
+    render_ms = (time.monotonic() - render_started) * 1000
+
+    def heartbeat():
+        try:
+            renew_lease(dispatch)
+        except LeaseLost:
+            pass  # the chunk in flight is still recorded; _record then stops the run
+
+    sent = failed = 0
+    after = 0
+    with SenderPool(workers) as pool:
+        while todo := _pending(dispatch, after, chunk_size):
+            after = todo[-1][1]
+            renew_lease(dispatch)
+            messages = [(pk, build_message(variants, email)) for pk, _, email in todo]
+            results = list(pool.send(messages, heartbeat=heartbeat))
+            chunk_sent, chunk_failed = _record(dispatch, results)
+            sent += chunk_sent
+            failed += chunk_failed
+
+    dispatch.status = "sent"
+    dispatch.finished_at = timezone.now()
+    if not _held(dispatch).update(status="sent", finished_at=dispatch.finished_at):
+        raise LeaseLost(f"lease on newsletter dispatch {dispatch.pk} was lost")
+
+    seconds = time.monotonic() - started
+    stats = {
+        "newsletter": dispatch.newsletter_id,
+        "sent": sent,
+        "failed": failed,
+        "render_ms": round(render_ms, 2),
+        "seconds": round(seconds, 3),
+        "messages_per_second": round((sent + failed) / seconds, 1) if seconds else 0.0,
+    }
+    logger.info("Newsletter dispatch finished: %s", stats)
+    return stats
+
+
+def process_dispatches(limit=10, chunk_size=None, workers=None):
+    results = []
+    for dispatch in claim_dispatches(limit):
+        try:
+            results.append(run_dispatch(dispatch, chunk_size, workers))
+        except Exception as e:
+            # Left "sending"; picked up again when the lease expires.
+            logger.warning("Newsletter dispatch %s failed: %s", dispatch.id, e)
+    return results
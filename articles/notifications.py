@@ -0,0 +1,143 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CustomUser, NotificationJob
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed job stays invisible to other workers. A worker that
+# dies mid-job simply lets the lease expire and the job is picked up again.
+LEASE = timedelta(minutes=5)
+
+
+# ---------------------------
+# Enqueue
+# ---------------------------
+def enqueue_article(article):
+    # One job per article, so re-saving an approved article is a no-op.
+    job, _ = NotificationJob.objects.get_or_create(article=article)
+    return job
+
+
+def enqueue_articles(articles):
+    # One INSERT for a whole moderation batch; existing jobs are kept.
+    NotificationJob.objects.bulk_create(
+        [NotificationJob(article=article) for article in articles],
+        ignore_conflicts=True,
+    )
+
+
+def cancel_articles(article_ids):
+    NotificationJob.objects.filter(article_id__in=article_ids, status="pending").delete()
+
+
+# ---------------------------
+# Recipients
+# ---------------------------
+def recipient_ids(article):
+    ids = set(
+        CustomUser.subscribed_publishers.through.objects.filter(
+            publisher_id=article.publisher_id
+        ).values_list("customuser_id", flat=True)
+    )
+    ids.update(
+        CustomUser.subscribed_journalists.through.objects.filter(
+            to_customuser_id=article.author_id
+        ).values_list("from_customuser_id", flat=True)
+    )
+    return sorted(ids)
+
+
+def _recipient_batches(job, batch_size):
+    ids = [pk for pk in recipient_ids(job.article) if pk > job.last_recipient_id]
+    for start in range(0, len(ids), batch_size):
+        chunk = ids[start:start + batch_size]
+        # Digest readers hear about the article from send_digests instead.
+        users = (
+            CustomUser.objects.filter(id__in=chunk, digest_frequency="immediate")
+            .exclude(email="")
+            .order_by("id")
+            .values_list("id", "email")
+        )
+        yield chunk[-1], list(users)
+
+
+def _build_message(article, email, connection):
+    return EmailMessage(
+        subject=f"New Article: {article.title}",
+        body=article.content[:200],
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+        connection=connection,
+    )
+
+
+# ---------------------------
+# Worker
+# ---------------------------
+def claim_jobs(limit):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            NotificationJob.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        NotificationJob.objects.filter(id__in=ids).update(next_attempt_at=now + LEASE)
+    return list(NotificationJob.objects.filter(id__in=ids).select_related("article"))
+
+
+def backoff(attempts):
+    delay = settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.NOTIFICATION_RETRY_MAX_SECONDS))
+
+
+def deliver(job, connection, batch_size=None):
+    batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+    sent = 0
+    try:
+        for last_id, users in _recipient_batches(job, batch_size):
+            messages = [
+                _build_message(job.article, email, connection) for _, email in users
+            ]
+            if messages:
+                sent += connection.send_messages(messages) or 0
+            job.last_recipient_id = last_id
+            job.save(update_fields=["last_recipient_id"])
+    except Exception as e:
+        job.attempts += 1
+        job.last_error = str(e)
+        if job.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+            job.status = "failed"
+        else:
+            job.next_attempt_at = timezone.now() + backoff(job.attempts)
+        job.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+        logger.warning("Notification job %s failed: %s", job.id, e)
+        return sent
+
+    job.status = "sent"
+    job.last_error = ""
+    job.save(update_fields=["status", "last_error"])
+    return sent
+
+
+def process_jobs(limit=100, batch_size=None):
+    jobs = claim_jobs(limit)
+    if not jobs:
+        return 0, 0
+    sent = 0
+    # One SMTP connection for the whole run instead of one per message.
+    connection = get_connection()
+    connection.open()
+    try:
+        for job in jobs:
+            sent += deliver(job, connection, batch_size)
+    finally:
+        connection.close()
+    return len(jobs), sent
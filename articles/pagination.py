@@ -0,0 +1,155 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+# Newest-first keyset pagination. Each page is a range scan that starts at
+# the (timestamp, id) position encoded in the cursor, so page N costs the
+# same as page 1 (no OFFSET).
+DEFAULT_KEYS = ("created_at", "id")
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(position, reverse=False):
+    stamp, pk = position
+    payload = {"t": stamp.isoformat(), "i": pk}
+    if reverse:
+        payload["r"] = 1
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        position = (datetime.fromisoformat(payload["t"]), int(payload["i"]))
+        return position, bool(payload.get("r"))
+    except (ValueError, TypeError, KeyError):
+        raise Http404("Invalid cursor")
+
+
+def _page_query(queryset, cursor, page_size, keys):
+    stamp_field, id_field = keys
+    reverse = False
+    if cursor:
+        (stamp, pk), reverse = decode_cursor(cursor)
+        op = "gt" if reverse else "lt"
+        queryset = queryset.filter(
+            Q(**{f"{stamp_field}__{op}": stamp})
+            | Q(**{stamp_field: stamp, f"{id_field}__{op}": pk})
+        )
+
+    if reverse:
+        ordering = (stamp_field, id_field)
+    else:
+        ordering = (f"-{stamp_field}", f"-{id_field}")
+    return queryset.order_by(*ordering)[: page_size + 1], reverse
+
+
+def _build_page(rows, cursor, reverse, page_size, keys):
+    stamp_field, id_field = keys
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+
+    def position(obj):
+        if isinstance(obj, dict):  # .values() rows
+            return obj[stamp_field], obj[id_field]
+        return getattr(obj, stamp_field), getattr(obj, id_field)
+
+    # Walking backwards we always came from a later page, and vice versa.
+    if reverse:
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, bool(cursor)
+
+    next_cursor = previous_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(position(rows[-1]))
+    if rows and has_previous:
+        previous_cursor = encode_cursor(position(rows[0]), reverse=True)
+    return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def paginate(queryset, cursor=None, page_size=None, keys=DEFAULT_KEYS):
+    page_size = page_size or settings.ARTICLES_PAGE_SIZE
+    query, reverse = _page_query(queryset, cursor, page_size, keys)
+    return _build_page(list(query), cursor, reverse, page_size, keys)
+
+
+async def apaginate(queryset, cursor=None, page_size=None, keys=DEFAULT_KEYS):
+    page_size = page_size or settings.ARTICLES_PAGE_SIZE
+    query, reverse = _page_query(queryset, cursor, page_size, keys)
+    rows = [row async for row in query]
+    return _build_page(rows, cursor, reverse, page_size, keys)
+
+
+# ---------------------------
+# Estimated counts (admin changelists)
+# ---------------------------
+# COUNT(*) over a large InnoDB table walks a whole index. The admin only
+# needs the count to size its page links, so unfiltered tables use the
+# optimizer's row estimate and filtered querysets stop counting at a cap.
+COUNT_CAP = 10000
+
+TABLE_ESTIMATE_SQL = {
+    "mysql": (
+        "SELECT TABLE_ROWS FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+    ),
+    "postgresql": "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+}
+
+
+def table_estimate(model, using="default"):
+    connection = connections[using]
+    sql = TABLE_ESTIMATE_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [model._meta.db_table])
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None and row[0] >= 0 else None
+
+
+def estimated_count(queryset, cap=COUNT_CAP):
+    if not queryset.query.where:
+        estimate = table_estimate(queryset.model, queryset.db)
+        if estimate is not None and estimate > cap:
+            return estimate
+    # COUNT over a LIMITed subquery: reads at most `cap` index entries.
+    return queryset.order_by().values("pk")[:cap].count()
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
@@ -0,0 +1,101 @@
+from django.conf import settings
+
+from .cache import astamps, bump, get_cache, stamps
+from .models import CustomUser
+
+# Who a user is and whom they follow, as one small immutable object cached
+# under the user's version stamp. Subscribing, unsubscribing or editing the
+# user bumps the stamp (see signals.py), so a cached profile is never
+# updated in place, only replaced.
+
+
+class UserProfile:
+    __slots__ = ("user_id", "role", "publisher_ids", "journalist_ids")
+
+    def __init__(self, user_id, role, publisher_ids=(), journalist_ids=()):
+        set_ = object.__setattr__
+        set_(self, "user_id", user_id)
+        set_(self, "role", role)
+        set_(self, "publisher_ids", frozenset(publisher_ids))
+        set_(self, "journalist_ids", frozenset(journalist_ids))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserProfile is immutable")
+
+    def __reduce__(self):
+        return UserProfile, (self.user_id, self.role, self.publisher_ids, self.journalist_ids)
+
+    def __repr__(self):
+        return f"<UserProfile {self.user_id} {self.role}>"
+
+    def follows_publisher(self, publisher_id):
+        return publisher_id in self.publisher_ids
+
+    def follows_journalist(self, journalist_id):
+        return journalist_id in self.journalist_ids
+
+
+ANONYMOUS = UserProfile(None, None)
+
+PublisherSubscription = CustomUser.subscribed_publishers.through
+JournalistSubscription = CustomUser.subscribed_journalists.through
+
+
+def profile_stamp(user_id):
+    return f"user:{user_id}"
+
+
+def _key(user_id, version):
+    return f"profile:{user_id}:{version}"
+
+
+def invalidate_profiles(user_ids):
+    if user_ids:
+        bump(*(profile_stamp(pk) for pk in user_ids))
+
+
+# ---------------------------
+# Lookup
+# ---------------------------
+def get_profile(user):
+    if not user.is_authenticated:
+        return ANONYMOUS
+    cache = get_cache()
+    [version] = stamps(profile_stamp(user.pk))
+    key = _key(user.pk, version)
+    profile = cache.get(key)
+    if profile is None:
+        profile = UserProfile(
+            user.pk,
+            user.role,
+            PublisherSubscription.objects.filter(customuser_id=user.pk)
+            .values_list("publisher_id", flat=True),
+            JournalistSubscription.objects.filter(from_customuser_id=user.pk)
+            .values_list("to_customuser_id", flat=True),
+        )
+        cache.set(key, profile, settings.PROFILE_CACHE_TIMEOUT)
+    return profile
+
+
+async def aget_profile(user):
+    if not user.is_authenticated:
+        return ANONYMOUS
+    cache = get_cache()
+    [version] = await astamps(profile_stamp(user.pk))
+    key = _key(user.pk, version)
+    profile = await cache.aget(key)
+    if profile is None:
+        profile = UserProfile(
+            user.pk,
+            user.role,
+            [
+                pk async for pk in PublisherSubscription.objects.filter(customuser_id=user.pk)
+                .values_list("publisher_id", flat=True)
+            ],
+            [
+                pk async for pk in JournalistSubscription.objects.filter(from_customuser_id=user.pk)
+                .values_list("to_customuser_id", flat=True)
+            ],
+        )
+        await cache.aset(key, profile, settings.PROFILE_CACHE_TIMEOUT)
+    return profile
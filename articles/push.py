@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.utils.module_loading import import_string
+
+from .profiles import get_profile
+
+logger = logging.getLogger(__name__)
+
+# Push of newly approved articles to connected readers (Server-Sent Events
+# at /api/events/, WebSocket at /ws/articles/; ASGI only).
+#
+# Every open connection is an asyncio.Queue registered under the
+# publishers and journalists the reader followed when connecting, so an
+# approval touches only the queues of its own audience. An idle connection
+# costs one queue, one suspended coroutine and its index entries: no task
+# wakes up until an event or a heartbeat is due.
+
+
+class Connection:
+    __slots__ = ("queue", "keys", "dropped")
+
+    def __init__(self, keys):
+        self.queue = asyncio.Queue(maxsize=settings.PUSH_QUEUE_SIZE)
+        self.keys = keys
+        self.dropped = 0
+
+
+def subscription_keys(profile):
+    return [("publisher", pk) for pk in profile.publisher_ids] + [
+        ("journalist", pk) for pk in profile.journalist_ids
+    ]
+
+
+def event_keys(event):
+    return [("publisher", event["publisher_id"]), ("journalist", event["author_id"])]
+
+
+# ---------------------------
+# Backends
+# ---------------------------
+class InProcessBackend:
+    # Delivers to connections held by this process only. A backend for
+    # several processes (e.g. Redis pub/sub) implements the same two
+    # methods: start() once the event loop is known, publish() from any
+    # thread, calling `deliver` on the loop for every event it receives.
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        self.loop = None
+
+    def start(self, loop):
+        self.loop = loop
+
+    def publish(self, event):
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return  # nobody connected to this process
+        # Approvals run in a worker thread (sync view or sync_to_async);
+        # the index is only ever touched on the loop.
+        loop.call_soon_threadsafe(self.deliver, event)
+
+
+class Broadcaster:
+    def __init__(self):
+        self.index = defaultdict(set)
+        self.loop = None
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = import_string(settings.PUSH_BACKEND)(self.deliver)
+        return self._backend
+
+    def connect(self, profile):
+        # Called on the event loop.
+        loop = asyncio.get_running_loop()
+        if loop is not self.loop:
+            self.loop = loop
+            self.backend.start(loop)
+        connection = Connection(subscription_keys(profile))
+        for key in connection.keys:
+            self.index[key].add(connection)
+        return connection
+
+    def disconnect(self, connection):
+        for key in connection.keys:
+            connections = self.index.get(key)
+            if connections is not None:
+                connections.discard(connection)
+                if not connections:
+                    del self.index[key]
+
+    def deliver(self, event):
+        targets = set()
+        for key in event_keys(event):
+            targets.update(self.index.get(key, ()))
+        for connection in targets:
+            try:
+                connection.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A client that stopped reading; it catches up from the
+                # API when it reconnects.
+                connection.dropped += 1
+        return len(targets)
+
+    def publish(self, event):
+        self.backend.publish(event)
+
+    def connection_count(self):
+        return len({c for connections in self.index.values() for c in connections})
+
+
+broadcaster = Broadcaster()
+
+
+# ---------------------------
+# Publishing
+# ---------------------------
+def article_event(article):
+    return {
+        "type": "article",
+        "id": article.id,
+        "title": article.title,
+        "publisher_id": article.publisher_id,
+        "author_id": article.author_id,
+        "url": article.get_absolute_url(),
+    }
+
+
+def publish_articles(articles):
+    for article in articles:
+        broadcaster.publish(article_event(article))
+
+
+async def next_event(connection):
+    # The next event, or None when a heartbeat is due.
+    try:
+        return await asyncio.wait_for(connection.queue.get(), settings.PUSH_HEARTBEAT_SECONDS)
+    except asyncio.TimeoutError:
+        return None
+
+
+# ---------------------------
+# Server-Sent Events
+# ---------------------------
+async def sse_stream(profile):
+    connection = broadcaster.connect(profile)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            event = await next_event(connection)
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        broadcaster.disconnect(connection)
+
+
+# ---------------------------
+# WebSocket (plain ASGI, routed from news_portal/asgi.py)
+# ---------------------------
+WEBSOCKET_PATH = "/ws/articles/"
+
+
+def _headers(scope):
+    return {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+
+
+def _same_origin(headers):
+    # Browsers send Origin on WebSocket handshakes; refuse other sites
+    # riding on the reader's session cookie.
+    origin = headers.get("origin")
+    return origin is None or urlsplit(origin).netloc == headers.get("host")
+
+
+def _websocket_profile(headers):
+    cookie = SimpleCookie(headers.get("cookie", ""))
+    morsel = cookie.get(settings.SESSION_COOKIE_NAME)
+    if morsel is None:
+        return None
+    store = import_module(settings.SESSION_ENGINE).SessionStore(morsel.value)
+    user = get_user(SimpleNamespace(session=store))
+    if not user.is_authenticated or user.role != "reader":
+        return None
+    return get_profile(user)
+
+
+async def websocket_application(scope, receive, send):
+    if (await receive())["type"] != "websocket.connect":
+        return
+    headers = _headers(scope)
+    profile = None
+    if scope["path"] == WEBSOCKET_PATH and _same_origin(headers):
+        profile = await sync_to_async(_websocket_profile)(headers)
+    if profile is None:
+        await send({"type": "websocket.close", "code": 4403})
+        return
+
+    await send({"type": "websocket.accept"})
+    connection = broadcaster.connect(profile)
+    closed = asyncio.Event()
+
+    async def watch():
+        # Client frames are ignored; only the disconnect matters.
+        while (await receive())["type"] != "websocket.disconnect":
+            pass
+        closed.set()
+
+    watcher = asyncio.ensure_future(watch())
+    waiter = asyncio.ensure_future(closed.wait())
+    try:
+        while not closed.is_set():
+            getter = asyncio.ensure_future(next_event(connection))
+            await asyncio.wait({getter, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if closed.is_set():
+                getter.cancel()
+                break
+            event = getter.result()
+            text = json.dumps(event if event is not None else {"type": "keepalive"})
+            await send({"type": "websocket.send", "text": text})
+    finally:
+        broadcaster.disconnect(connection)
+        watcher.cancel()
+        waiter.cancel()
@@ -0,0 +1,145 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Reads go to a replica only inside views marked @read_replica, and only
+# while the user has not written recently: a write anywhere in the request
+# pins the rest of it to the primary, and ReplicaPinMiddleware carries the
+# pin over to the user's next requests with a short-lived cookie, so
+# nobody reads a replica that has not caught up with their own change.
+
+_state = ContextVar("db_routing", default=None)
+
+
+class RoutingState:
+    __slots__ = ("replica_ok", "pinned", "wrote")
+
+    def __init__(self, pinned=False):
+        self.replica_ok = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replicas():
+    return settings.DATABASE_REPLICAS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if (
+            state is None
+            or not state.replica_ok
+            or state.pinned
+            or state.wrote
+            or not replicas()
+            # Reads inside a transaction must see its writes.
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+
+# ---------------------------
+# View decorator
+# ---------------------------
+def _enter_replica_scope():
+    state = _state.get()
+    token = None
+    if state is None:  # outside ReplicaPinMiddleware, e.g. RequestFactory
+        state = RoutingState()
+        token = _state.set(state)
+    previous, state.replica_ok = state.replica_ok, True
+    return state, token, previous
+
+
+def _leave_replica_scope(state, token, previous):
+    state.replica_ok = previous
+    if token is not None:
+        _state.reset(token)
+
+
+def read_replica(view):
+    # Lets the view's reads (and its ETag validators, when applied
+    # outermost) use a replica.
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            scope = _enter_replica_scope()
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _leave_replica_scope(*scope)
+    else:
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            scope = _enter_replica_scope()
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _leave_replica_scope(*scope)
+    return inner
+
+
+# ---------------------------
+# Middleware
+# ---------------------------
+class ReplicaPinMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    def start(self, request):
+        pinned = (
+            request.method not in ("GET", "HEAD", "OPTIONS")
+            or settings.REPLICA_PIN_COOKIE in request.COOKIES
+        )
+        state = RoutingState(pinned=pinned)
+        return state, _state.set(state)
+
+    def finish(self, state, response):
+        if state.wrote and settings.REPLICA_PIN_SECONDS:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, "1",
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax",
+            )
+        return response
@@ -0,0 +1,305 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, F
+
+from .models import Article, Newsletter, SearchDocument, SearchPosting, SearchTerm
+
+try:
+    import snowballstemmer
+except ImportError:  # pragma: no cover - optional, pinned in requirements.txt
+    snowballstemmer = None
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+# Title words count this many times towards a document's term frequencies.
+TITLE_WEIGHT = 3
+# Postings read per query term, highest frequency first. Bounds query cost
+# for very common terms at the price of exact ranking in the long tail.
+POSTINGS_PER_TERM = 5000
+BATCH_SIZE = 1000
+STATS_CACHE_KEY = "search:stats"
+STATS_CACHE_TIMEOUT = 300
+
+TOKEN_RE = re.compile(r"\w+")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have he her his i in is it its "
+    "of on or she that the their they this to was we were will with you".split()
+)
+
+if snowballstemmer is not None:
+    _stemmer = snowballstemmer.stemmer("english")
+
+    def stem_words(words):
+        return _stemmer.stemWords(words)
+else:
+    def stem_words(words):
+        return list(words)
+
+
+def tokenize(text):
+    words = [
+        word
+        for word in TOKEN_RE.findall(text.lower())
+        if word not in STOP_WORDS and len(word) <= 64
+    ]
+    return stem_words(words)
+
+
+def article_text(article):
+    return " ".join([article.title] * TITLE_WEIGHT + [article.content])
+
+
+newsletter_text = article_text
+
+
+# ---------------------------
+# Index maintenance
+# ---------------------------
+def _term_ids(terms):
+    terms = list(terms)
+    ids = {}
+    for start in range(0, len(terms), BATCH_SIZE):
+        chunk = terms[start:start + BATCH_SIZE]
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=term) for term in chunk], ignore_conflicts=True
+        )
+        ids.update(SearchTerm.objects.filter(term__in=chunk).values_list("term", "id"))
+    return ids
+
+
+def _stats_changed():
+    # Document count and average length feed every BM25 score; drop the
+    # cached pair once the change is visible to other connections.
+    transaction.on_commit(lambda: cache.delete(STATS_CACHE_KEY))
+
+
+def remove_document(kind, object_id):
+    document = SearchDocument.objects.filter(kind=kind, object_id=object_id).first()
+    if document is None:
+        return
+    term_ids = list(document.postings.values_list("term_id", flat=True))
+    SearchTerm.objects.filter(id__in=term_ids).update(doc_count=F("doc_count") - 1)
+    document.delete()
+    _stats_changed()
+
+
+@transaction.atomic
+def index_document(kind, object_id, text):
+    remove_document(kind, object_id)
+    frequencies = Counter(tokenize(text))
+    if not frequencies:
+        return
+    length = sum(frequencies.values())
+    document = SearchDocument.objects.create(kind=kind, object_id=object_id, length=length)
+    term_ids = _term_ids(frequencies)
+    SearchPosting.objects.bulk_create(
+        [
+            SearchPosting(
+                term_id=term_ids[term], document=document,
+                frequency=frequency, doc_length=length,
+            )
+            for term, frequency in frequencies.items()
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    SearchTerm.objects.filter(id__in=term_ids.values()).update(
+        doc_count=F("doc_count") + 1
+    )
+    _stats_changed()
+
+
+def index_article(article):
+    # Only approved articles are searchable.
+    if article.approved:
+        index_document("article", article.pk, article_text(article))
+    else:
+        remove_document("article", article.pk)
+
+
+def index_newsletter(newsletter):
+    index_document("newsletter", newsletter.pk, newsletter_text(newsletter))
+
+
+def remove_documents(kind, object_ids):
+    documents = SearchDocument.objects.filter(kind=kind, object_id__in=object_ids)
+    decrements = Counter(
+        SearchPosting.objects.filter(document__in=documents).values_list("term_id", flat=True)
+    )
+    _adjust_doc_counts(decrements, -1)
+    if documents.delete()[0]:
+        _stats_changed()
+
+
+def _adjust_doc_counts(term_counts, sign):
+    # One UPDATE per distinct delta rather than one per term.
+    by_delta = defaultdict(list)
+    for term_id, count in term_counts.items():
+        by_delta[count].append(term_id)
+    for delta, term_ids in by_delta.items():
+        for start in range(0, len(term_ids), BATCH_SIZE):
+            SearchTerm.objects.filter(id__in=term_ids[start:start + BATCH_SIZE]).update(
+                doc_count=F("doc_count") + sign * delta
+            )
+
+
+@transaction.atomic
+def index_articles(articles):
+    # Bulk counterpart of index_article for moderation batches.
+    remove_documents("article", [article.pk for article in articles])
+    chunk = []
+    for article in articles:
+        freqs = Counter(tokenize(article_text(article)))
+        if article.approved and freqs:
+            chunk.append((article.pk, freqs))
+    if not chunk:
+        return 0
+    document_frequency = Counter()
+    _index_chunk("article", chunk, document_frequency)
+    _adjust_doc_counts(document_frequency, 1)
+    _stats_changed()
+    return len(chunk)
+
+
+def _sources():
+    yield "article", Article.objects.filter(approved=True).only("id", "title", "content"), article_text
+    yield "newsletter", Newsletter.objects.only("id", "title", "content"), newsletter_text
+
+
+def _index_chunk(kind, chunk, document_frequency):
+    SearchDocument.objects.bulk_create(
+        [
+            SearchDocument(kind=kind, object_id=object_id, length=sum(freqs.values()))
+            for object_id, freqs in chunk
+        ]
+    )
+    # Re-read ids: bulk_create does not return primary keys on MySQL.
+    document_ids = dict(
+        SearchDocument.objects.filter(
+            kind=kind, object_id__in=[object_id for object_id, _ in chunk]
+        ).values_list("object_id", "id")
+    )
+    vocabulary = set()
+    for _, freqs in chunk:
+        vocabulary.update(freqs)
+    term_ids = _term_ids(vocabulary)
+
+    postings = []
+    for object_id, freqs in chunk:
+        length = sum(freqs.values())
+        for term, frequency in freqs.items():
+            postings.append(
+                SearchPosting(
+                    term_id=term_ids[term], document_id=document_ids[object_id],
+                    frequency=frequency, doc_length=length,
+                )
+            )
+            document_frequency[term_ids[term]] += 1
+    SearchPosting.objects.bulk_create(postings, batch_size=BATCH_SIZE)
+    return len(chunk)
+
+
+def rebuild_index(chunk_size=500, progress=None):
+    SearchPosting.objects.all().delete()
+    SearchDocument.objects.all().delete()
+    SearchTerm.objects.all().delete()
+
+    document_frequency = Counter()
+    total = 0
+    for kind, queryset, to_text in _sources():
+        chunk = []
+        for obj in queryset.iterator(chunk_size=chunk_size):
+            freqs = Counter(tokenize(to_text(obj)))
+            if freqs:
+                chunk.append((obj.pk, freqs))
+            if len(chunk) >= chunk_size:
+                with transaction.atomic():
+                    total += _index_chunk(kind, chunk, document_frequency)
+                chunk = []
+                if progress:
+                    progress(total)
+        if chunk:
+            with transaction.atomic():
+                total += _index_chunk(kind, chunk, document_frequency)
+            if progress:
+                progress(total)
+
+    SearchTerm.objects.bulk_update(
+        [SearchTerm(id=term_id, doc_count=count) for term_id, count in document_frequency.items()],
+        ["doc_count"],
+        batch_size=BATCH_SIZE,
+    )
+    cache.delete(STATS_CACHE_KEY)
+    return total
+
+
+# ---------------------------
+# Query
+# ---------------------------
+class SearchResult:
+    def __init__(self, kind, obj, score):
+        self.kind = kind
+        self.object = obj
+        self.score = score
+
+
+def corpus_stats():
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        row = SearchDocument.objects.aggregate(count=Count("id"), avg=Avg("length"))
+        stats = (row["count"], row["avg"] or 0.0)
+        if stats[0]:  # an empty index is about to change; don't pin it
+            cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def rank(query, kinds=None, limit=20):
+    # Returns [(document_id, score)] for the best `limit` matches (BM25).
+    terms = set(tokenize(query))
+    if not terms:
+        return []
+    count, avg_length = corpus_stats()
+    if not count:
+        return []
+
+    scores = defaultdict(float)
+    for term_id, doc_count in SearchTerm.objects.filter(
+        term__in=terms, doc_count__gt=0
+    ).values_list("id", "doc_count"):
+        idf = math.log(1 + (count - doc_count + 0.5) / (doc_count + 0.5))
+        postings = SearchPosting.objects.filter(term_id=term_id)
+        if kinds:
+            postings = postings.filter(document__kind__in=kinds)
+        postings = postings.order_by("-frequency").values_list(
+            "document_id", "frequency", "doc_length"
+        )[:POSTINGS_PER_TERM]
+        for document_id, frequency, length in postings:
+            norm = K1 * (1 - B + B * length / avg_length)
+            scores[document_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+    return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def search(query, kinds=None, limit=20):
+    ranked = rank(query, kinds, limit)
+    documents = SearchDocument.objects.in_bulk([document_id for document_id, _ in ranked])
+    wanted = defaultdict(list)
+    for document in documents.values():
+        wanted[document.kind].append(document.object_id)
+    objects = {
+        "article": Article.objects.select_related("author", "publisher").defer("content")
+        .in_bulk(wanted["article"]),
+        "newsletter": Newsletter.objects.select_related("author").in_bulk(wanted["newsletter"]),
+    }
+
+    results = []
+    for document_id, score in ranked:
+        document = documents.get(document_id)
+        obj = document and objects[document.kind].get(document.object_id)
+        if obj is not None:
+            results.append(SearchResult(document.kind, obj, score))
+    return results
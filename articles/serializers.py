@@ -1,8 +1,56 @@
 #serializers.py
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
 from rest_framework import serializers
 from .models import Article
 
 class ArticleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Article
-        fields = '__all__'
+        exclude = ['import_key']
+
+
+# ---------------------------
+# Summary representation
+# ---------------------------
+# List responses are built straight from .values() rows: no model
+# instances, no per-field serializer machinery, and the body never leaves
+# the database (the excerpt is stored on the article).
+SUMMARY_FIELDS = (
+    ("id", "id"),
+    ("title", "title"),
+    ("excerpt", "excerpt"),
+    ("author", "author__username"),
+    ("publisher", "publisher__name"),
+    ("created_at", "created_at"),
+)
+
+
+def summary_values(queryset, prefix="", extra=()):
+    # `prefix` reaches the article through a relation (e.g. "article__"
+    # on FeedEntry); `extra` adds columns the caller needs, such as
+    # pagination keys.
+    return queryset.values(*(prefix + path for _, path in SUMMARY_FIELDS), *extra)
+
+
+def article_summary(row, prefix=""):
+    return {name: row[prefix + path] for name, path in SUMMARY_FIELDS}
+
+
+def iter_json_array(items, encoder=DjangoJSONEncoder):
+    # Yields a JSON array one element at a time so memory stays flat.
+    yield "["
+    for i, item in enumerate(items):
+        yield ("," if i else "") + json.dumps(item, cls=encoder)
+    yield "]"
+
+
+async def aiter_json_array(items, encoder=DjangoJSONEncoder):
+    # Async counterpart of iter_json_array for async iterables.
+    yield "["
+    first = True
+    async for item in items:
+        yield ("" if first else ",") + json.dumps(item, cls=encoder)
+        first = False
+    yield "]"
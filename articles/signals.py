@@ -1,9 +1,18 @@
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, pre_delete, pre_save, post_save, post_delete
+from django.db import transaction
 from django.dispatch import receiver
-from .models import Article
-from django.core.mail import send_mail
+from .models import Article, CustomUser, Newsletter, Publisher
+from .cache import invalidate_article, invalidate_feeds, invalidate_site
+from .counters import (
+    added_targets, count_articles, count_subscriptions, existing_targets, forget_subscriber,
+)
+from .fanout import fan_out_articles, retract_articles
+from .profiles import invalidate_profiles
+from .search import index_article, index_newsletter, remove_document
+from .notifications import enqueue_article
+from .push import publish_articles
 
 def create_roles():
     reader_group, _ = Group.objects.get_or_create(name='Reader')
@@ -38,12 +47,139 @@ def create_roles():
 
 @receiver(post_save, sender=Article)
 def notify_subscribers(sender, instance, created, **kwargs):
+    # Only queue the job; the send_notifications worker does the SMTP work.
     if instance.approved:
-        subscribers = instance.author.subscriptions_to_journalists.all()
-        for user in subscribers:
-            send_mail(
-                subject=f"New Article: {instance.title}",
-                message=instance.content[:200],
-                from_email='news@portal.com',
-                recipient_list=[user.email],
-            )
+        enqueue_article(instance)
+
+
+@receiver([post_save, post_delete], sender=Article)
+def invalidate_article_pages(sender, instance, **kwargs):
+    invalidate_article(instance.pk)
+
+
+@receiver(pre_save, sender=Article)
+def remember_feed_scope(sender, instance, **kwargs):
+    # An edit can withdraw an article or move it to another publisher; the
+    # feeds it leaves must be invalidated as well as the ones it joins.
+    instance._previous_feed_scope = None
+    if instance.pk:
+        instance._previous_feed_scope = (
+            Article.objects.filter(pk=instance.pk, approved=True)
+            .values_list("publisher_id", "author_id")
+            .first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Article)
+def invalidate_article_feeds(sender, instance, **kwargs):
+    scopes = set()
+    if instance.approved:
+        scopes.add((instance.publisher_id, instance.author_id))
+    if getattr(instance, "_previous_feed_scope", None):
+        scopes.add(instance._previous_feed_scope)
+    if scopes:
+        invalidate_feeds(scopes)
+
+
+@receiver(post_save, sender=Article)
+def update_reader_feeds(sender, instance, **kwargs):
+    # Plain saves (admin change form, update_article); bulk moderation
+    # updates querysets and maintains the feeds itself.
+    previous = getattr(instance, "_previous_feed_scope", None)
+    current = (instance.publisher_id, instance.author_id) if instance.approved else None
+    if previous == current:
+        return
+    if previous:
+        retract_articles([instance.pk])
+    if current:
+        fan_out_articles([instance])
+
+
+@receiver(post_save, sender=Article)
+def count_approved_article(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_feed_scope", None)
+    count_articles(
+        added=[(instance.publisher_id, instance.author_id)] if instance.approved else [],
+        removed=[previous] if previous else [],
+    )
+
+
+@receiver(post_delete, sender=Article)
+def uncount_deleted_article(sender, instance, **kwargs):
+    if instance.approved:
+        count_articles(removed=[(instance.publisher_id, instance.author_id)])
+
+
+@receiver(post_save, sender=Article)
+def push_approved_article(sender, instance, **kwargs):
+    # Newly approved through a plain save (e.g. the admin change form);
+    # bulk approvals publish from articles.moderation.
+    if instance.approved and getattr(instance, "_previous_feed_scope", None) is None:
+        transaction.on_commit(lambda: publish_articles([instance]))
+
+
+@receiver([post_save, post_delete], sender=Publisher)
+def invalidate_publisher_pages(sender, instance, **kwargs):
+    # Publisher names appear on every card; drop the whole page cache.
+    invalidate_site()
+
+
+@receiver(post_save, sender=Article)
+def update_article_search_index(sender, instance, **kwargs):
+    index_article(instance)
+
+
+@receiver(post_delete, sender=Article)
+def remove_article_from_search_index(sender, instance, **kwargs):
+    remove_document("article", instance.pk)
+
+
+@receiver(post_save, sender=Newsletter)
+def update_newsletter_search_index(sender, instance, **kwargs):
+    index_newsletter(instance)
+
+
+@receiver(post_delete, sender=Newsletter)
+def remove_newsletter_from_search_index(sender, instance, **kwargs):
+    remove_document("newsletter", instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_user_profile(sender, instance, **kwargs):
+    # Role changes.
+    invalidate_profiles([instance.pk])
+
+
+@receiver(m2m_changed, sender=CustomUser.subscribed_publishers.through)
+@receiver(m2m_changed, sender=CustomUser.subscribed_journalists.through)
+def invalidate_subscriber_profiles(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        # user.subscribed_*.add/remove/clear: one subscriber changed.
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_profiles([instance.pk])
+        return
+    # publisher.subscribed_readers / journalist.followers: pk_set holds
+    # the subscribers, except for clear(), which must look them up first.
+    if action == "pre_clear":
+        related = "subscribed_readers" if sender is CustomUser.subscribed_publishers.through else "followers"
+        instance._cleared_subscribers = list(getattr(instance, related).values_list("pk", flat=True))
+    elif action == "post_clear":
+        invalidate_profiles(getattr(instance, "_cleared_subscribers", []))
+    elif action in ("post_add", "post_remove"):
+        invalidate_profiles(pk_set)
+
+
+@receiver(m2m_changed, sender=CustomUser.subscribed_publishers.through)
+@receiver(m2m_changed, sender=CustomUser.subscribed_journalists.through)
+def count_subscribers(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ("pre_remove", "pre_clear"):
+        instance._removed_subscriptions = existing_targets(sender, instance, reverse, pk_set)
+    elif action in ("post_remove", "post_clear"):
+        count_subscriptions(sender, removed=getattr(instance, "_removed_subscriptions", []))
+    elif action == "post_add" and pk_set:
+        count_subscriptions(sender, added=added_targets(instance, reverse, pk_set))
+
+
+@receiver(pre_delete, sender=CustomUser)
+def uncount_deleted_subscriber(sender, instance, **kwargs):
+    forget_subscriber(instance.pk)
@@ -0,0 +1,137 @@
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import SocialPost
+from .utils import post_to_twitter
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(minutes=5)
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_at):
+        super().__init__(f"Rate limited until {retry_at.isoformat()}")
+        self.retry_at = retry_at
+
+
+# ---------------------------
+# Enqueue
+# ---------------------------
+def enqueue_post(article):
+    if not settings.TWITTER_ENABLED:
+        return None
+    post, _ = SocialPost.objects.get_or_create(article=article)
+    return post
+
+
+def enqueue_posts(articles):
+    if not settings.TWITTER_ENABLED:
+        return
+    SocialPost.objects.bulk_create(
+        [SocialPost(article=article) for article in articles],
+        ignore_conflicts=True,
+    )
+
+
+def cancel_posts(article_ids):
+    SocialPost.objects.filter(article_id__in=article_ids, status="pending").delete()
+
+
+# ---------------------------
+# Rate limiting
+# ---------------------------
+def _window():
+    return timedelta(seconds=settings.TWITTER_RATE_WINDOW_SECONDS)
+
+
+def remaining_budget():
+    # Posts already made in the current window count against the quota,
+    # whichever worker made them.
+    used = SocialPost.objects.filter(
+        status="posted", posted_at__gte=timezone.now() - _window()
+    ).count()
+    return max(settings.TWITTER_POSTS_PER_WINDOW - used, 0)
+
+
+def _rate_limit_reset(error):
+    # tweepy.TooManyRequests carries the reset epoch in the response headers.
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) != 429:
+        return None
+    reset = getattr(response, "headers", {}).get("x-rate-limit-reset")
+    if reset:
+        return datetime.fromtimestamp(int(reset), tz=dt_timezone.utc)
+    return timezone.now() + _window()
+
+
+# ---------------------------
+# Worker
+# ---------------------------
+def claim_posts(limit):
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            SocialPost.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        SocialPost.objects.filter(id__in=ids).update(next_attempt_at=now + LEASE)
+    return list(SocialPost.objects.filter(id__in=ids).select_related("article"))
+
+
+def backoff(attempts):
+    delay = settings.TWITTER_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.TWITTER_RETRY_MAX_SECONDS))
+
+
+def deliver(post):
+    try:
+        post.external_id = post_to_twitter(post.article)
+    except Exception as e:
+        retry_at = _rate_limit_reset(e)
+        if retry_at is not None:
+            # Not the post's fault: don't burn an attempt.
+            post.next_attempt_at = retry_at
+            post.save(update_fields=["next_attempt_at"])
+            raise RateLimited(retry_at)
+        post.attempts += 1
+        post.last_error = str(e)
+        if post.attempts >= settings.TWITTER_MAX_ATTEMPTS:
+            post.status = "failed"
+        else:
+            post.next_attempt_at = timezone.now() + backoff(post.attempts)
+        post.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+        logger.warning("Social post %s failed: %s", post.id, e)
+        return False
+
+    post.status = "posted"
+    post.posted_at = timezone.now()
+    post.last_error = ""
+    post.save(update_fields=["status", "posted_at", "last_error", "external_id"])
+    return True
+
+
+def process_posts(limit=None):
+    if not settings.TWITTER_ENABLED:
+        return 0, 0
+    budget = remaining_budget()
+    if limit is not None:
+        budget = min(budget, limit)
+    posts = claim_posts(budget) if budget else []
+    posted = 0
+    for i, post in enumerate(posts):
+        try:
+            posted += deliver(post)
+        except RateLimited as e:
+            # Park the rest of the batch until the window resets.
+            remaining = [p.id for p in posts[i + 1:]]
+            SocialPost.objects.filter(id__in=remaining).update(next_attempt_at=e.retry_at)
+            logger.warning("Social posting paused: %s", e)
+            break
+    return len(posts), posted
@@ -0,0 +1,45 @@
+from .profiles import aget_profile, get_profile
+
+
+class SubscriptionState:
+    # Per-request view of who a user follows, backed by the cached
+    # UserProfile. It is fetched once, on first use, so templates can test
+    # membership for every article card without further lookups.
+
+    def __init__(self, user):
+        self.user = user
+        self._profile = None
+
+    @property
+    def profile(self):
+        if self._profile is None:
+            self._profile = get_profile(self.user)
+        return self._profile
+
+    @property
+    def publisher_ids(self):
+        return self.profile.publisher_ids
+
+    @property
+    def journalist_ids(self):
+        return self.profile.journalist_ids
+
+    async def aload(self):
+        # Async views load the profile up front; templates then only read it.
+        if self._profile is None:
+            self._profile = await aget_profile(self.user)
+        return self
+
+    def follows_publisher(self, publisher_id):
+        return publisher_id in self.publisher_ids
+
+    def follows_journalist(self, journalist_id):
+        return journalist_id in self.journalist_ids
+
+
+def get_subscription_state(request):
+    state = getattr(request, "_subscription_state", None)
+    if state is None:
+        state = SubscriptionState(request.user)
+        request._subscription_state = state
+    return state
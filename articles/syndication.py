@@ -0,0 +1,155 @@
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .cache import FEEDS, SITE, get_or_build, journalist_feed_stamp, publisher_feed_stamp, stamps
+from .models import Article, CustomUser, Publisher
+from .routers import read_replica
+
+# Public RSS/Atom feeds. A feed's validators are its cache stamps (see
+# cache.invalidate_feeds), so a poll from a feed reader that already has
+# the current version is answered with 304 from the cache alone; only the
+# first poll after an approval or edit builds the XML.
+
+
+# ---------------------------
+# Feeds
+# ---------------------------
+class LatestArticlesFeed(Feed):
+    title = "News Portal: latest articles"
+    description = "Newly approved articles from every publisher."
+
+    def link(self):
+        return reverse("home")
+
+    def items(self):
+        return self.latest(Article.objects.filter(approved=True))
+
+    @staticmethod
+    def latest(queryset):
+        # Feeds show the stored excerpt; bodies are never read.
+        return (
+            queryset.select_related("author", "publisher")
+            .defer("content")
+            .order_by("-created_at", "-id")[: settings.FEED_ITEMS]
+        )
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_categories(self, item):
+        return [item.publisher.name]
+
+    def item_pubdate(self, item):
+        return item.created_at
+
+    def item_updateddate(self, item):
+        return item.updated_at
+
+
+class PublisherArticlesFeed(LatestArticlesFeed):
+    def get_object(self, request, pk):
+        return get_object_or_404(Publisher, pk=pk)
+
+    def title(self, obj):
+        return f"News Portal: {obj.name}"
+
+    def description(self, obj):
+        return obj.description or f"Newly approved articles from {obj.name}."
+
+    def items(self, obj):
+        return self.latest(Article.objects.filter(approved=True, publisher=obj))
+
+
+class JournalistArticlesFeed(LatestArticlesFeed):
+    def get_object(self, request, pk):
+        return get_object_or_404(CustomUser, pk=pk, role="journalist")
+
+    def title(self, obj):
+        return f"News Portal: {obj.username}"
+
+    def description(self, obj):
+        return f"Newly approved articles by {obj.username}."
+
+    def items(self, obj):
+        return self.latest(Article.objects.filter(approved=True, author=obj))
+
+
+class LatestArticlesAtomFeed(LatestArticlesFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestArticlesFeed.description
+
+
+class PublisherArticlesAtomFeed(PublisherArticlesFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class JournalistArticlesAtomFeed(JournalistArticlesFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+# ---------------------------
+# Cached, conditional views
+# ---------------------------
+def _feed_stamps(request, scope, kwargs):
+    # Read once per request; the ETag, Last-Modified and cache key share them.
+    if not hasattr(request, "_feed_stamps"):
+        scope_stamp = FEEDS if scope is None else scope(kwargs["pk"])
+        request._feed_stamps = stamps(SITE, scope_stamp)
+    return request._feed_stamps
+
+
+def cached_feed(feed_class, scope=None):
+    feed = feed_class()
+    name = feed_class.__name__
+
+    def etag(request, **kwargs):
+        parts = [name, kwargs.get("pk", ""), *_feed_stamps(request, scope, kwargs)]
+        return hashlib.md5("|".join(str(p) for p in parts).encode()).hexdigest()
+
+    def last_modified(request, **kwargs):
+        # Stamps are the time of the last change, in nanoseconds.
+        newest = max(_feed_stamps(request, scope, kwargs))
+        return datetime.datetime.fromtimestamp(newest / 1e9, tz=datetime.timezone.utc)
+
+    def build(request, kwargs):
+        response = feed(request, **kwargs)
+        return {"content": response.content, "content_type": response["Content-Type"]}
+
+    @read_replica
+    @cache_control(public=True, max_age=settings.FEED_MAX_AGE)
+    @condition(etag_func=etag, last_modified_func=last_modified)
+    def view(request, **kwargs):
+        key = f"feed:{name}:{kwargs.get('pk', '')}:{etag(request, **kwargs)}"
+        cached = get_or_build(key, lambda: build(request, kwargs))
+        return HttpResponse(cached["content"], content_type=cached["content_type"])
+
+    return view
+
+
+latest_rss = cached_feed(LatestArticlesFeed)
+latest_atom = cached_feed(LatestArticlesAtomFeed)
+publisher_rss = cached_feed(PublisherArticlesFeed, publisher_feed_stamp)
+publisher_atom = cached_feed(PublisherArticlesAtomFeed, publisher_feed_stamp)
+journalist_rss = cached_feed(JournalistArticlesFeed, journalist_feed_stamp)
+journalist_atom = cached_feed(JournalistArticlesAtomFeed, journalist_feed_stamp)
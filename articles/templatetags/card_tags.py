@@ -0,0 +1,19 @@
+from django import template
+from django.conf import settings
+
+from articles.cache import SITE, stamps
+
+register = template.Library()
+
+
+@register.simple_tag
+def card_cache():
+    # Looked up once per list, not per card. Cards are keyed by article id
+    # and updated_at (every edit, approval or rejection moves it), plus the
+    # site stamp, which publisher renames bump, and the fragment version,
+    # which a deploy that changes the card markup bumps.
+    [site] = stamps(SITE)
+    return {
+        "timeout": settings.CARD_CACHE_TIMEOUT,
+        "version": f"{settings.FRAGMENT_CACHE_VERSION}:{site}",
+    }
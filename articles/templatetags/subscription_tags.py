@@ -0,0 +1,13 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def follows_publisher(subscriptions, publisher_id):
+    return subscriptions.follows_publisher(publisher_id)
+
+
+@register.filter
+def follows_journalist(subscriptions, journalist_id):
+    return subscriptions.follows_journalist(journalist_id)
@@ -1,12 +1,65 @@
-from django.test import TestCase
+import asyncio
+import json
+import re
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.db import connection
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
-from .models import Article, Publisher
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import CommandError, call_command
+from django.template.loader import render_to_string
+from django.urls import path, reverse
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+from news_portal.urls import urlpatterns as project_urlpatterns
+from . import views
+from .models import (
+    Article, Publisher, FeedEntry, Newsletter, NotificationJob, SocialPost, SearchPosting,
+    NewsletterDispatch, NewsletterDelivery,
+)
+from .newsletters import (
+    LeaseLost, SenderPool, claim_dispatches, enroll, queue_newsletter, run_dispatch,
+)
+from .digests import send_digests
+from .moderation import approve_articles, delete_articles, reject_articles
+from .search import corpus_stats, tokenize, search as search_index
+from .utils import reset_twitter_client
+from .routers import ReplicaRouter, read_replica
+from .profiles import UserProfile, get_profile
+from .push import broadcaster, websocket_application
+from .pagination import estimated_count
+from .benchmark import render_cards
+from .transfer import export_articles, import_articles
+
+
+# ---------------------------
+# Shared fixtures
+# ---------------------------
+def create_user(username, role, **fields):
+    # Every test user's password is 'pass'.
+    return get_user_model().objects.create_user(username=username, password='pass', role=role, **fields)
+
+
+def create_publisher(name='Daily', owner='owner'):
+    return Publisher.objects.create(name=name, owner=create_user(owner, 'publisher'))
+
 
 class ArticleTestCase(TestCase):
     def setUp(self):
-        User = get_user_model()
-        self.editor = User.objects.create_user(username='editor', password='pass', role='editor')
-        self.publisher = Publisher.objects.create(name='Test Publisher')
+        self.editor = create_user('editor', 'editor')
+        self.publisher = create_publisher('Test Publisher')
         self.article = Article.objects.create(
             title='Test Article',
             content='Test content',
@@ -19,3 +72,1616 @@ class ArticleTestCase(TestCase):
         self.article.save()
         self.assertTrue(self.article.approved)
 
+
+class FeedFanOutTestCase(TestCase):
+    def setUp(self):
+        self.editor = create_user('editor', 'editor')
+        self.reader = create_user('reader', 'reader')
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.article = Article.objects.create(
+            title='Pending',
+            content='Body',
+            author=self.journalist,
+            publisher=self.publisher
+        )
+
+    def test_approve_fans_out_to_subscribers(self):
+        self.reader.subscribed_publishers.add(self.publisher)
+        self.client.login(username='editor', password='pass')
+        self.client.get(reverse('approve_article', args=[self.article.id]))
+        self.assertTrue(
+            FeedEntry.objects.filter(reader=self.reader, article=self.article).exists()
+        )
+
+    def test_plain_save_maintains_feed(self):
+        # e.g. the admin change form, which bypasses articles.moderation.
+        self.reader.subscribed_journalists.add(self.journalist)
+        other = Publisher.objects.create(name='Weekly', owner=self.editor)
+        self.reader.subscribed_publishers.add(other)
+        self.article.approved = True
+        self.article.save()
+        self.assertTrue(FeedEntry.objects.filter(reader=self.reader, article=self.article).exists())
+
+        # Moved to a subscribed publisher: still in the feed, once.
+        self.article.publisher = other
+        self.article.save()
+        self.assertEqual(FeedEntry.objects.filter(article=self.article).count(), 1)
+
+        self.article.approved = False
+        self.article.save()
+        self.assertFalse(FeedEntry.objects.filter(article=self.article).exists())
+
+    def test_subscribe_backfills_and_unsubscribe_cleans_up(self):
+        self.article.approved = True
+        self.article.save()
+        self.client.login(username='reader', password='pass')
+
+        self.client.get(reverse('subscribe_journalist', args=[self.journalist.id]))
+        self.client.get(reverse('subscribe_publisher', args=[self.publisher.id]))
+        self.assertEqual(FeedEntry.objects.filter(reader=self.reader).count(), 1)
+
+        # Still reachable through the followed journalist.
+        self.client.get(reverse('unsubscribe_publisher', args=[self.publisher.id]))
+        self.assertEqual(FeedEntry.objects.filter(reader=self.reader).count(), 1)
+
+        self.client.get(reverse('unsubscribe_journalist', args=[self.journalist.id]))
+        self.assertFalse(FeedEntry.objects.filter(reader=self.reader).exists())
+
+    def test_home_and_api_read_from_feed(self):
+        self.article.approved = True
+        self.article.save()
+        self.reader.subscribed_publishers.add(self.publisher)
+        call_command('rebuild_feeds', stdout=StringIO())
+
+        self.client.login(username='reader', password='pass')
+        response = self.client.get(reverse('home'))
+        self.assertEqual(list(response.context['articles']), [self.article])
+        response = self.client.get(reverse('get_subscribed_articles'))
+        self.assertEqual([a['id'] for a in response.json()['results']], [self.article.id])
+
+
+@override_settings(ARTICLES_PAGE_SIZE=2)
+class KeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        journalist = create_user('journalist', 'journalist')
+        publisher = create_publisher()
+        self.articles = [
+            Article.objects.create(
+                title=f'Article {i}', content='Body', author=journalist,
+                publisher=publisher, approved=True
+            )
+            for i in range(5)
+        ]
+        # Newest first, with a created_at tie broken by id.
+        Article.objects.filter(id=self.articles[4].id).update(
+            created_at=self.articles[3].created_at
+        )
+        self.expected = [a.id for a in reversed(self.articles)]
+
+    def test_walk_forward_and_back(self):
+        from .pagination import paginate
+
+        queryset = Article.objects.filter(approved=True)
+        seen = []
+        cursor = None
+        pages = []
+        while True:
+            page = paginate(queryset, cursor)
+            pages.append(page)
+            seen.extend(a.id for a in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        back = paginate(queryset, pages[-1].previous_cursor)
+        self.assertEqual([a.id for a in back], [a.id for a in pages[-2]])
+        self.assertTrue(back.has_next)
+
+    def test_homepage_cursor(self):
+        response = self.client.get(reverse('home'))
+        page = response.context['page']
+        self.assertEqual([a.id for a in page], self.expected[:2])
+        response = self.client.get(reverse('home'), {'cursor': page.next_cursor})
+        self.assertEqual([a.id for a in response.context['articles']], self.expected[2:4])
+        self.assertEqual(self.client.get(reverse('home'), {'cursor': 'bogus'}).status_code, 404)
+
+
+class HomepageQueryCountTestCase(TestCase):
+    def setUp(self):
+        self.reader = create_user('reader', 'reader')
+        self.publisher = create_publisher()
+        self.reader.subscribed_publishers.add(self.publisher)
+        self.journalists = [
+            create_user(f'journalist{i}', 'journalist')
+            for i in range(6)
+        ]
+        self.reader.subscribed_journalists.add(self.journalists[0])
+
+    def _publish(self, count):
+        for journalist in self.journalists[:count]:
+            Article.objects.create(
+                title='Story', content='Body', author=journalist,
+                publisher=self.publisher, approved=True
+            )
+
+    def _home_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_independent_of_card_count(self):
+        self.client.login(username='reader', password='pass')
+        self._publish(2)
+        self._home_queries()  # warms the cached profile
+        few = self._home_queries()
+        self._publish(6)
+        self.assertEqual(self._home_queries(), few)
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP unavailable')
+
+
+class NotificationOutboxTestCase(TestCase):
+    def setUp(self):
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.readers = [
+            create_user(f'reader{i}', 'reader', email=f'reader{i}@example.com')
+            for i in range(3)
+        ]
+        self.readers[0].subscribed_publishers.add(self.publisher)
+        self.readers[1].subscribed_journalists.add(self.journalist)
+        # Subscribed both ways: still a single email.
+        self.readers[2].subscribed_publishers.add(self.publisher)
+        self.readers[2].subscribed_journalists.add(self.journalist)
+        self.article = Article.objects.create(
+            title='Breaking', content='Body', author=self.journalist, publisher=self.publisher
+        )
+
+    def test_approval_enqueues_without_sending(self):
+        self.article.approved = True
+        self.article.save()
+        self.article.save()
+        self.assertEqual(NotificationJob.objects.filter(article=self.article).count(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_worker_sends_one_email_per_subscriber(self):
+        self.article.approved = True
+        self.article.save()
+        call_command('send_notifications', '--batch-size', '2', stdout=StringIO())
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            [r.email for r in self.readers],
+        )
+        self.assertEqual(NotificationJob.objects.get().status, 'sent')
+
+    @override_settings(EMAIL_BACKEND='articles.tests.FailingEmailBackend')
+    def test_failed_delivery_is_retried_with_backoff(self):
+        self.article.approved = True
+        self.article.save()
+        call_command('send_notifications', stdout=StringIO())
+        job = NotificationJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertIn('SMTP unavailable', job.last_error)
+        self.assertGreater(job.next_attempt_at, job.created_at)
+
+
+class StubTwitterClient:
+    instances = 0
+    statuses = []
+    fail_with = None
+
+    def __init__(self):
+        StubTwitterClient.instances += 1
+
+    def update_status(self, status):
+        if StubTwitterClient.fail_with is not None:
+            raise StubTwitterClient.fail_with
+        StubTwitterClient.statuses.append(status)
+        return type('Status', (), {'id': len(StubTwitterClient.statuses)})()
+
+
+class RateLimitError(Exception):
+    response = type('Response', (), {'status_code': 429, 'headers': {'x-rate-limit-reset': '4102444800'}})()
+
+
+@override_settings(
+    TWITTER_ENABLED=True,
+    TWITTER_CLIENT_FACTORY='articles.tests.StubTwitterClient',
+    TWITTER_POSTS_PER_WINDOW=10,
+)
+class SocialPostingTestCase(TestCase):
+    def setUp(self):
+        reset_twitter_client()
+        StubTwitterClient.instances = 0
+        StubTwitterClient.statuses = []
+        StubTwitterClient.fail_with = None
+        create_user('editor', 'editor')
+        journalist = create_user('journalist', 'journalist')
+        publisher = create_publisher()
+        self.articles = [
+            Article.objects.create(title=f'Story {i}', content='Body', author=journalist, publisher=publisher)
+            for i in range(2)
+        ]
+        self.client.login(username='editor', password='pass')
+
+    def tearDown(self):
+        reset_twitter_client()
+
+    def _approve_all(self):
+        for article in self.articles:
+            self.client.get(reverse('approve_article', args=[article.id]))
+
+    def test_approval_queues_and_worker_posts_with_one_client(self):
+        self._approve_all()
+        self.assertEqual(SocialPost.objects.filter(status='pending').count(), 2)
+        self.assertEqual(StubTwitterClient.statuses, [])
+
+        call_command('post_social', stdout=StringIO())
+        self.assertEqual(SocialPost.objects.filter(status='posted').count(), 2)
+        self.assertEqual(StubTwitterClient.instances, 1)
+        self.assertIn(self.articles[0].get_absolute_url(), StubTwitterClient.statuses[0])
+
+    @override_settings(TWITTER_ENABLED=False)
+    def test_disabled_short_circuits(self):
+        self._approve_all()
+        self.assertFalse(SocialPost.objects.exists())
+
+    @override_settings(TWITTER_POSTS_PER_WINDOW=1)
+    def test_quota_limits_batch(self):
+        self._approve_all()
+        call_command('post_social', stdout=StringIO())
+        self.assertEqual(SocialPost.objects.filter(status='posted').count(), 1)
+
+    def test_rate_limit_parks_batch_without_using_attempts(self):
+        self._approve_all()
+        StubTwitterClient.fail_with = RateLimitError()
+        call_command('post_social', stdout=StringIO())
+        posts = SocialPost.objects.all()
+        self.assertTrue(all(p.status == 'pending' and p.attempts == 0 for p in posts))
+        self.assertTrue(all(p.next_attempt_at.year == 2100 for p in posts))
+
+
+COLUMN_RE = re.compile(r'[`"](\w+)[`"]\.[`"](\w+)[`"]( DESC| ASC)?')
+POSITION_RE = re.compile(r'\b(\d+)( DESC| ASC)?')
+
+
+def _select_list(sql):
+    # Top-level items between SELECT and FROM (commas inside calls kept).
+    head = sql[len('SELECT '):sql.index(' FROM ')]
+    items, depth, current = [], 0, ''
+    for char in head:
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if char == ',' and depth == 0:
+            items.append(current.strip())
+            current = ''
+        else:
+            current += char
+    return items + [current.strip()]
+
+
+def _order_columns(sql):
+    clause = sql.split(' ORDER BY ', 1)[1].split(' LIMIT ')[0]
+    columns = COLUMN_RE.findall(clause)
+    if not columns:
+        # Backends may order by select-list position when the column is selected.
+        select = _select_list(sql)
+        for position, direction in POSITION_RE.findall(clause):
+            table, column, _ = COLUMN_RE.findall(select[int(position) - 1])[0]
+            columns.append((table, column, direction))
+    return columns
+
+
+# Locks each list view to a fixed query count and to an ORDER BY that an
+# index on the filtered columns can serve without a sort (filesort on MySQL).
+class QueryPlanTestCase(TestCase):
+
+    def setUp(self):
+        self.reader = create_user('reader', 'reader')
+        create_user('editor', 'editor')
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.reader.subscribed_publishers.add(self.publisher)
+        for i in range(4):
+            Article.objects.create(
+                title=f'Story {i}', content='Body', author=self.journalist,
+                publisher=self.publisher, approved=i % 2 == 0
+            )
+
+    def _capture(self, url, user=None, data=None):
+        if user:
+            self.client.login(username=user, password='pass')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, data)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in ctx.captured_queries]
+
+    def assertIndexedOrdering(self, queries, model, equality_fields):
+        ordered = [sql for sql in queries if ' ORDER BY ' in sql]
+        self.assertEqual(len(ordered), 1, ordered)
+        sql = ordered[0]
+        where = sql.split(' ORDER BY ', 1)[0]
+        table = model._meta.db_table
+        order = _order_columns(sql)
+        self.assertTrue(order)
+        self.assertEqual({t for t, _, _ in order}, {table}, sql)
+        self.assertEqual(len({d.strip() or 'ASC' for _, _, d in order}), 1, 'mixed sort directions')
+        order_columns = [c for _, c, _ in order]
+
+        prefix = {model._meta.get_field(f).column for f in equality_fields}
+        for column in prefix:
+            self.assertIn(column, where)
+        for index in model._meta.indexes:
+            columns = [model._meta.get_field(f.lstrip('-')).column for f in index.fields]
+            head, tail = columns[:len(prefix)], columns[len(prefix):]
+            if set(head) == prefix and tail[:len(order_columns)] == order_columns:
+                break
+        else:
+            self.fail(f'No index on {table} serves {sorted(prefix)} ORDER BY {order_columns}')
+
+        if connection.vendor == 'mysql':
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN ' + sql)
+                self.assertNotIn('filesort', str(cursor.fetchall()))
+
+    def test_anonymous_home(self):
+        _, queries = self._capture(reverse('home'))
+        self.assertEqual(len(queries), 1)
+        self.assertIndexedOrdering(queries, Article, ['approved'])
+
+    def test_anonymous_home_next_page(self):
+        with self.settings(ARTICLES_PAGE_SIZE=1):
+            response, _ = self._capture(reverse('home'))
+            _, queries = self._capture(reverse('home'), data={'cursor': response.context['page'].next_cursor})
+        self.assertEqual(len(queries), 1)
+        self.assertIndexedOrdering(queries, Article, ['approved'])
+
+    def test_reader_home(self):
+        _, queries = self._capture(reverse('home'), 'reader')
+        # session, user, feed ETag aggregate, subscribed publisher ids and
+        # followed journalist ids (profile cache is cold), feed page
+        self.assertEqual(len(queries), 6)
+        self.assertIndexedOrdering(queries, FeedEntry, ['reader'])
+
+    def test_editor_dashboard(self):
+        _, queries = self._capture(reverse('editor_dashboard'), 'editor')
+        self.assertEqual(len(queries), 3)
+        self.assertIndexedOrdering(queries, Article, ['approved'])
+
+    def test_subscribed_articles_api(self):
+        _, queries = self._capture(reverse('get_subscribed_articles'), 'reader')
+        # session, user, feed ETag aggregate, subscribed publisher ids and
+        # followed journalist ids (profile cache is cold), feed page
+        self.assertEqual(len(queries), 6)
+        self.assertIndexedOrdering(queries, FeedEntry, ['reader'])
+
+    def test_article_detail(self):
+        article = Article.objects.filter(approved=True).first()
+        _, queries = self._capture(reverse('article_detail', args=[article.id]))
+        self.assertEqual(len(queries), 1)
+
+    def test_newsletter_list_queryset(self):
+        queryset = Newsletter.objects.filter(author=self.journalist)
+        with CaptureQueriesContext(connection) as ctx:
+            list(queryset)
+        self.assertIndexedOrdering([q['sql'] for q in ctx.captured_queries], Newsletter, ['author'])
+
+
+class PageCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.article = Article.objects.create(
+            title='Story', content='First draft', author=journalist,
+            publisher=self.publisher, approved=True
+        )
+        self.url = reverse('article_detail', args=[self.article.id])
+
+    def test_article_detail_served_from_cache_until_saved(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'First draft')
+
+        self.article.content = 'Second draft'
+        self.article.save()
+        self.assertContains(self.client.get(self.url), 'Second draft')
+
+    def test_deleted_article_is_not_served(self):
+        self.client.get(self.url)
+        self.article.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_public_homepage_fragment_invalidated_by_publisher_change(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('home'))
+        self.publisher.name = 'Nightly'
+        self.publisher.save()
+        self.assertContains(self.client.get(reverse('home')), 'Nightly')
+
+    def test_locmem_stamps_expire(self):
+        # A write in another worker bumps that worker's locmem copy only;
+        # here the page stays current until the stamp ages out.
+        with self.settings(CACHE_STAMP_TIMEOUT=60):
+            cache.clear()
+            self.client.get(self.url)
+            Article.objects.filter(pk=self.article.pk).update(content='Edited elsewhere')
+            self.assertContains(self.client.get(self.url), 'First draft')
+            with patch('django.core.cache.backends.locmem.time') as clock:
+                clock.time.return_value = time.time() + 61
+                self.assertContains(self.client.get(self.url), 'Edited elsewhere')
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+            with self.settings(CACHES={'default': backend}):
+                self.client.get(self.url)
+                with self.assertNumQueries(0):
+                    response = self.client.get(self.url)
+                self.assertContains(response, 'First draft')
+
+
+class ConditionalGetTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = create_user('reader', 'reader')
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.reader.subscribed_publishers.add(self.publisher)
+        self.article = self._publish('First')
+
+    def _publish(self, title):
+        article = Article.objects.create(
+            title=title, content='Body', author=self.journalist,
+            publisher=self.publisher, approved=True
+        )
+        return article
+
+    def _revalidate(self, url, response, **extra):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **extra)
+
+    def test_api_returns_304_until_feed_changes(self):
+        self.client.login(username='reader', password='pass')
+        url = reverse('get_subscribed_articles')
+        first = self.client.get(url)
+        # session, user, feed ETag aggregate: no page query, no serializer
+        with self.assertNumQueries(3):
+            self.assertEqual(self._revalidate(url, first).status_code, 304)
+
+        self._publish('Second')
+        self.assertEqual(self._revalidate(url, first).status_code, 200)
+
+    def test_edit_changes_validators(self):
+        url = reverse('article_detail', args=[self.article.id])
+        first = self.client.get(url)
+        self.assertTrue(first.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self._revalidate(url, first).status_code, 304)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304
+        )
+
+        self.article.content = 'Edited'
+        self.article.save()
+        self.client.get(url)
+        self.assertEqual(self._revalidate(url, first).status_code, 200)
+
+    def test_home_etag_tracks_subscriptions(self):
+        self.client.login(username='reader', password='pass')
+        url = reverse('home')
+        first = self.client.get(url)
+        self.assertEqual(self._revalidate(url, first).status_code, 304)
+        self.reader.subscribed_journalists.add(self.journalist)
+        self.assertEqual(self._revalidate(url, first).status_code, 200)
+
+    def test_api_etag_tracks_subscriptions(self):
+        self.client.login(username='reader', password='pass')
+        url = reverse('get_subscribed_articles')
+        first = self.client.get(url)
+        # Swapping the publisher subscription for one to its only author
+        # keeps the feed's entry count and newest entry the same.
+        self.reader.subscribed_publishers.remove(self.publisher)
+        self.reader.subscribed_journalists.add(self.journalist)
+        self.assertEqual(self._revalidate(url, first).status_code, 200)
+
+
+class SearchIndexTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+
+    def _article(self, title, content, approved=True):
+        return Article.objects.create(
+            title=title, content=content, author=self.journalist,
+            publisher=self.publisher, approved=approved
+        )
+
+    def test_tokenize_stems_and_drops_stop_words(self):
+        self.assertEqual(tokenize('The Elections are running'), ['elect', 'run'])
+
+    def test_ranked_search_tracks_saves_and_deletes(self):
+        budget = self._article('Budget vote', 'Parliament debated the budget. Budget cuts loom.')
+        weather = self._article('Weather', 'Rain and a short note on the budget.')
+        self._article('Budget leak', 'Pending story about the budget.', approved=False)
+
+        hits = [r.object for r in search_index('budgets')]
+        self.assertEqual(hits, [budget, weather])
+
+        weather.content = 'Sunny all week.'
+        weather.save()
+        self.assertEqual([r.object for r in search_index('budget')], [budget])
+
+        budget.delete()
+        self.assertEqual(search_index('budget'), [])
+        self.assertFalse(SearchPosting.objects.filter(document__object_id=budget.id).exists())
+
+    def test_corpus_stats_follow_the_index(self):
+        # An empty index is not cached, and every index write drops the stats.
+        self.assertEqual(corpus_stats(), (0, 0.0))
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self._article('Harbour', 'Boats.')
+        self.assertEqual(corpus_stats()[0], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._article('Festival', 'Music.')
+        self.assertEqual(corpus_stats()[0], 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(corpus_stats()[0], 1)
+
+    def test_newsletters_and_rebuild_command(self):
+        article = self._article('Harbour festival', 'Boats everywhere.')
+        newsletter = Newsletter.objects.create(title='Weekly harbour notes', content='Tides.', author=self.journalist)
+        SearchPosting.objects.all().delete()
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        results = search_index('harbour')
+        self.assertEqual({(r.kind, r.object.pk) for r in results}, {('article', article.pk), ('newsletter', newsletter.pk)})
+        self.assertEqual([r.object for r in search_index('harbour', kinds=['newsletter'])], [newsletter])
+
+    def test_search_view_and_api(self):
+        article = self._article('Transit strike', 'Buses stopped.')
+        response = self.client.get(reverse('search'), {'q': 'strike'})
+        self.assertContains(response, reverse('article_detail', args=[article.id]))
+        response = self.client.get(reverse('api_search'), {'q': 'strike'})
+        self.assertEqual([r['id'] for r in response.json()['results']], [article.id])
+        self.assertEqual(self.client.get(reverse('api_search')).status_code, 400)
+
+
+class ArticleSummaryApiTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = create_user('reader', 'reader')
+        journalist = create_user('journalist', 'journalist')
+        publisher = create_publisher()
+        self.reader.subscribed_publishers.add(publisher)
+        self.articles = []
+        for i in range(3):
+            article = Article.objects.create(
+                title=f'Story {i}', content=' '.join(['word'] * 100), author=journalist,
+                publisher=publisher, approved=True
+            )
+            self.articles.append(article)
+        self.client.login(username='reader', password='pass')
+
+    def test_list_returns_summaries(self):
+        results = self.client.get(reverse('get_subscribed_articles')).json()['results']
+        self.assertEqual(
+            set(results[0]), {'id', 'title', 'excerpt', 'author', 'publisher', 'created_at'}
+        )
+        self.assertEqual(results[0]['id'], self.articles[-1].id)
+        self.assertEqual(results[0]['author'], 'journalist')
+        self.assertEqual(results[0]['publisher'], 'Daily')
+        self.assertEqual(len(results[0]['excerpt'].split()), 30)
+
+    def test_full_representation_on_request(self):
+        results = self.client.get(reverse('get_subscribed_articles'), {'full': 1}).json()['results']
+        self.assertIn('content', results[0])
+
+    def test_streaming_export(self):
+        response = self.client.get(reverse('get_subscribed_articles'), {'stream': 1})
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([r['id'] for r in rows], [a.id for a in reversed(self.articles)])
+
+
+@override_settings(TWITTER_ENABLED=True)
+class BulkModerationTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_user('editor', 'editor')
+        self.reader = create_user('reader', 'reader')
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.reader.subscribed_publishers.add(self.publisher)
+        self.client.login(username='editor', password='pass')
+
+    def _pending(self, count):
+        return [
+            Article.objects.create(
+                title=f'Draft {i}', content='Quarterly results', author=self.journalist,
+                publisher=self.publisher
+            ).id
+            for i in range(count)
+        ]
+
+    def _moderate(self, action, ids):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('bulk_moderate'), {'action': action, 'article_ids': ids})
+        self.assertRedirects(response, reverse('editor_dashboard'), fetch_redirect_response=False)
+        return len(ctx.captured_queries)
+
+    def test_bulk_approve_is_one_batch(self):
+        few = self._moderate('approve', self._pending(2))
+        many_ids = self._pending(6)
+        self.assertEqual(self._moderate('approve', many_ids), few)
+
+        self.assertFalse(Article.objects.filter(approved=False).exists())
+        self.assertEqual(FeedEntry.objects.filter(reader=self.reader).count(), 8)
+        self.assertEqual(NotificationJob.objects.count(), 8)
+        self.assertEqual(SocialPost.objects.count(), 8)
+        self.assertEqual(len(search_index('quarterly', limit=50)), 8)
+
+    def test_bulk_reject_withdraws_everything(self):
+        ids = self._pending(3)
+        self._moderate('approve', ids)
+        self._moderate('reject', ids[:2])
+
+        self.assertEqual(Article.objects.filter(approved=True).count(), 1)
+        self.assertEqual(FeedEntry.objects.count(), 1)
+        self.assertEqual(NotificationJob.objects.count(), 1)
+        self.assertEqual(len(search_index('quarterly')), 1)
+
+    def test_bulk_delete(self):
+        ids = self._pending(3)
+        self._moderate('delete', ids[:2])
+        self.assertEqual(list(Article.objects.values_list('id', flat=True)), ids[2:])
+
+    def test_requires_post_and_editor(self):
+        self.assertEqual(self.client.get(reverse('bulk_moderate')).status_code, 405)
+        self.client.login(username='reader', password='pass')
+        response = self.client.post(reverse('bulk_moderate'), {'action': 'delete', 'article_ids': self._pending(1)})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Article.objects.count(), 1)
+
+
+class LoadTestingToolsTestCase(TestCase):
+    def test_seed_and_benchmark(self):
+        call_command(
+            'seed_portal', '--readers', '20', '--journalists', '4', '--editors', '1',
+            '--publishers', '2', '--articles', '40', '--words', '20', '--seed', '7',
+            stdout=StringIO(),
+        )
+        self.assertEqual(get_user_model().objects.filter(role='reader').count(), 20)
+        self.assertEqual(Article.objects.count(), 40)
+        self.assertTrue(FeedEntry.objects.exists())
+        # Timestamps are spread out, and id order follows time order.
+        dates = list(Article.objects.order_by('id').values_list('created_at', flat=True))
+        self.assertEqual(dates, sorted(dates))
+        self.assertGreater(dates[-1] - dates[0], timedelta(days=1))
+
+        out = StringIO()
+        call_command('benchmark_portal', '--iterations', '3', '--warmup', '0', stdout=out)
+        report = json.loads(out.getvalue())
+        results = {row['name']: row for row in report['results']}
+        self.assertEqual(results['home:reader']['status'], [200])
+        self.assertEqual(results['get_subscribed_articles']['status'], [200])
+        self.assertLessEqual(results['home:reader']['p50_ms'], results['home:reader']['p99_ms'])
+        self.assertIn('approve_article', report['skipped'])
+        self.assertEqual(report['meta']['rows']['articles'], 40)
+
+        cache.set('unrelated', 1)
+        out = StringIO()
+        call_command('benchmark_portal', '--iterations', '2', '--warmup', '0', '--cold', stdout=out)
+        self.assertEqual(json.loads(out.getvalue())['meta']['cache'], 'isolated locmem')
+        self.assertEqual(cache.get('unrelated'), 1)
+
+
+class ImportExportTestCase(TestCase):
+    def setUp(self):
+        self.journalist = create_user('journalist', 'journalist')
+        self.reader = create_user('reader', 'reader')
+        self.publisher = create_publisher()
+        self.reader.subscribed_publishers.add(self.publisher)
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write(self, name, text):
+        path = f'{self.dir.name}/{name}'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def rows(self, n):
+        return [
+            {'title': f'Archived {i}', 'content': 'Body', 'author': 'journalist', 'publisher': 'Daily',
+             'approved': i % 2 == 0, 'created_at': f'2020-01-{i + 1:02d}T08:00:00+00:00'}
+            for i in range(n)
+        ]
+
+    def test_jsonl_import_and_round_trip(self):
+        rows = self.rows(5) + [dict(self.rows(1)[0], author='nobody')]
+        path = self.write('in.jsonl', ''.join(json.dumps(r) + '\n' for r in rows))
+        err = StringIO()
+        call_command('import_articles', path, '--batch-size', '2', stdout=StringIO(), stderr=err)
+
+        self.assertEqual(Article.objects.count(), 5)
+        self.assertIn("unknown journalist 'nobody'", err.getvalue())
+        self.assertEqual(Article.objects.get(title='Archived 3').created_at.day, 4)
+        # Approved rows reach feeds and search; no notifications are queued.
+        self.assertEqual(FeedEntry.objects.filter(reader=self.reader).count(), 3)
+        self.assertEqual(len(search_index('archived')), 3)
+        self.assertFalse(NotificationJob.objects.exists())
+
+        out = f'{self.dir.name}/out.csv'
+        call_command('export_articles', '--output', out, '--chunk-size', '2', stdout=StringIO())
+        Article.objects.all().delete()
+        call_command('import_articles', out, stdout=StringIO())
+        self.assertEqual(
+            sorted(Article.objects.values_list('title', 'approved')),
+            sorted((r['title'], r['approved']) for r in rows[:5]),
+        )
+
+    def test_bad_rows_fail_alone(self):
+        rows = self.rows(3)
+        lines = [json.dumps(rows[0]), '{"title": "Cut off', json.dumps(dict(rows[1], created_at='2020-13-45T00:00:00')),
+                 json.dumps(rows[2])]
+        path = self.write('in.jsonl', ''.join(line + '\n' for line in lines))
+        errors = []
+        result = import_articles(path, batch_size=10, on_error=lambda row, e: errors.append(row))
+        self.assertEqual((result['imported'], result['failed']), (2, 2))
+        self.assertEqual(errors, [2, 3])
+        self.assertEqual(sorted(Article.objects.values_list('title', flat=True)), ['Archived 0', 'Archived 2'])
+
+    def test_import_maps_ids_without_returned_keys(self):
+        # As on MySQL: bulk_create leaves pk unset. An article with the
+        # same title written meanwhile must not take an imported row's place.
+        existing = Article.objects.create(
+            title='Archived 0', content='Body', author=self.journalist, publisher=self.publisher, approved=True,
+        )
+        path = self.write('in.jsonl', ''.join(json.dumps(r) + '\n' for r in self.rows(4)))
+        with patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            call_command('import_articles', path, '--batch-size', '3', stdout=StringIO())
+        imported = Article.objects.exclude(import_key=None)
+        self.assertEqual(
+            sorted(imported.values_list('title', 'created_at__day')),
+            [(f'Archived {i}', i + 1) for i in range(4)],
+        )
+        existing.refresh_from_db()
+        self.assertEqual(existing.created_at.year, timezone.now().year)
+        # The two approved imports reach feeds and search, next to the existing article.
+        self.assertEqual(FeedEntry.objects.filter(reader=self.reader).count(), 3)
+        self.assertEqual(len(search_index('archived', limit=10)), 3)
+
+    def test_resume_from_checkpoint(self):
+        path = self.write('in.jsonl', ''.join(json.dumps(r) + '\n' for r in self.rows(4)))
+        with open(f'{path}.checkpoint', 'w') as f:
+            json.dump({'rows': 3}, f)
+        call_command('import_articles', path, '--resume', stdout=StringIO())
+        self.assertEqual(list(Article.objects.values_list('title', flat=True)), ['Archived 3'])
+
+        Article.objects.bulk_create([
+            Article(title=f'Story {i}', content='Body', author=self.journalist, publisher=self.publisher)
+            for i in range(3)
+        ])
+        first = Article.objects.order_by('id').values_list('id', flat=True)[1]
+        out = f'{self.dir.name}/out.jsonl'
+        # Rows past the checkpoint had already been flushed when it stopped.
+        with open(out, 'w') as f:
+            f.write('partial\n{"title": "Story 1"}\n')
+        with open(f'{out}.checkpoint', 'w') as f:
+            json.dump({'last_id': first, 'offset': len('partial\n')}, f)
+        call_command('export_articles', '--output', out, '--resume', stdout=StringIO())
+        with open(out) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], 'partial')
+        self.assertEqual([json.loads(line)['title'] for line in lines[1:]], ['Story 1', 'Story 2'])
+
+        # Finished: the checkpoint is gone and there is nothing to resume.
+        with self.assertRaisesMessage(CommandError, 'nothing to resume'):
+            call_command('export_articles', '--output', out, '--resume', stdout=StringIO())
+
+    def test_export_checkpoint_offset(self):
+        Article.objects.bulk_create([
+            Article(title=f'Story {i}', content='Body', author=self.journalist, publisher=self.publisher)
+            for i in range(3)
+        ])
+        out = StringIO()
+        checkpoint = f'{self.dir.name}/out.checkpoint'
+        with patch('articles.transfer.clear_checkpoint'):
+            export_articles(out, 'csv', chunk_size=2, checkpoint=checkpoint)
+        state = json.loads(open(checkpoint).read())
+        self.assertEqual(out.getvalue()[:state['offset']].count('\n'), 3)  # header and two rows
+
+
+class RecordingEmailBackend(LocmemEmailBackend):
+    opened = []
+
+    def open(self):
+        RecordingEmailBackend.opened.append(self)
+        return True
+
+    def send_messages(self, messages):
+        if any(m.to[0].startswith('bounce') for m in messages):
+            raise ConnectionError('mailbox unavailable')
+        return super().send_messages(messages)
+
+
+@override_settings(EMAIL_BACKEND='articles.tests.RecordingEmailBackend')
+class NewsletterDispatchTestCase(TestCase):
+    def setUp(self):
+        self.journalist = create_user('journalist', 'journalist')
+        self.readers = [
+            create_user(f'reader{i}', 'reader', email=f'reader{i}@example.com')
+            for i in range(5)
+        ]
+        no_email = create_user('noemail', 'reader')
+        for reader in self.readers + [no_email]:
+            reader.subscribed_journalists.add(self.journalist)
+        self.newsletter = Newsletter.objects.create(title='Weekly', content='Line one\nLine two', author=self.journalist)
+        RecordingEmailBackend.opened = []
+
+    def send(self, *args):
+        out = StringIO()
+        call_command('send_newsletters', '--chunk-size', '2', '--workers', '3', *args, stdout=out)
+        return out.getvalue()
+
+    def test_sends_to_followers_with_reused_connections(self):
+        with patch('articles.newsletters.render_to_string', wraps=render_to_string) as render:
+            output = self.send('--newsletter', str(self.newsletter.pk))
+        self.assertIn('sent 5, failed 0', output)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(r.email for r in self.readers))
+        self.assertEqual(mail.outbox[0].alternatives[0].mimetype, 'text/html')
+        # Text and HTML rendered once each; one connection per worker thread.
+        self.assertEqual(render.call_count, 2)
+        self.assertLessEqual(len(RecordingEmailBackend.opened), 3)
+
+        dispatch = NewsletterDispatch.objects.get()
+        self.assertEqual((dispatch.status, dispatch.sent_count), ('sent', 5))
+        self.assertEqual(dispatch.deliveries.filter(status='sent').count(), 5)
+        # Queueing again does not resend.
+        self.send('--newsletter', str(self.newsletter.pk))
+        self.assertEqual(len(mail.outbox), 5)
+
+    def test_interrupted_dispatch_resumes(self):
+        dispatch = queue_newsletter(self.newsletter)
+        enroll(dispatch, chunk_size=2)
+        dispatch.deliveries.filter(recipient__in=self.readers[:2]).update(status='sent')
+        dispatch.status = 'sending'
+        dispatch.save()
+        self.send()
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [r.email for r in self.readers[2:]])
+        self.assertEqual(NewsletterDispatch.objects.get().status, 'sent')
+
+    def test_failed_recipients_are_recorded_and_retried(self):
+        self.readers[0].email = 'bounce@example.com'
+        self.readers[0].save()
+        self.send('--newsletter', str(self.newsletter.pk))
+        delivery = NewsletterDelivery.objects.get(status='failed')
+        self.assertEqual(delivery.recipient, self.readers[0])
+        self.assertIn('mailbox unavailable', delivery.last_error)
+        self.assertEqual(len(mail.outbox), 4)
+
+        self.readers[0].email = 'reader0@example.com'
+        self.readers[0].save()
+        self.send('--newsletter', str(self.newsletter.pk), '--retry-failed')
+        self.assertEqual(len(mail.outbox), 5)
+        dispatch = NewsletterDispatch.objects.get()
+        self.assertEqual((dispatch.sent_count, dispatch.failed_count), (5, 0))
+
+
+    def test_lost_lease_stops_the_run(self):
+        # Another worker claimed the dispatch after this one's lease lapsed.
+        queue_newsletter(self.newsletter)
+        [dispatch] = claim_dispatches(1)
+        NewsletterDispatch.objects.filter(pk=dispatch.pk).update(leased_until=timezone.now() + timedelta(hours=1))
+        with self.assertRaises(LeaseLost):
+            run_dispatch(dispatch, chunk_size=2, workers=2)
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(NewsletterDelivery.objects.exclude(status='pending').exists())
+
+    def test_heartbeat_runs_while_a_chunk_is_sent(self):
+        # run_dispatch renews the lease from this heartbeat.
+        beats = []
+        with patch.object(SenderPool, '_send', lambda pool, part: time.sleep(0.05) or []):
+            with SenderPool(2) as pool:
+                list(pool.send([(1, None), (2, None)], heartbeat=lambda: beats.append(1), interval=0.01))
+        self.assertGreater(len(beats), 1)
+
+
+class ReaderDigestTestCase(TestCase):
+    def setUp(self):
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.readers = {}
+        for frequency in ('immediate', 'hourly', 'daily'):
+            reader = create_user(
+                frequency, 'reader', email=f'{frequency}@example.com', digest_frequency=frequency,
+            )
+            reader.subscribed_publishers.add(self.publisher)
+            self.readers[frequency] = reader
+
+    def approve(self, *titles):
+        Article.objects.bulk_create([
+            Article(title=title, content='Body', author=self.journalist, publisher=self.publisher)
+            for title in titles
+        ])
+        approve_articles(list(Article.objects.filter(title__in=titles).values_list('id', flat=True)))
+
+    def test_digest_readers_get_one_combined_email(self):
+        self.approve('First', 'Second')
+        call_command('send_notifications', stdout=StringIO())
+        self.assertEqual([m.to[0] for m in mail.outbox], ['immediate@example.com'] * 2)
+        mail.outbox = []
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(send_digests('hourly') + send_digests('daily'), 2)
+        # One feed query per frequency, however many readers are due.
+        self.assertEqual(sum('"articles_feedentry"' in q['sql'] and q['sql'].startswith('SELECT')
+                             for q in ctx.captured_queries), 2)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ['daily@example.com', 'hourly@example.com'])
+        self.assertIn('First', mail.outbox[0].body)
+        self.assertIn('Second', mail.outbox[0].body)
+        hourly = get_user_model().objects.get(username='hourly')
+        self.assertEqual(hourly.digest_watermark, FeedEntry.objects.filter(reader=hourly).latest('id').id)
+
+        # Nothing new: nothing sent. New article an hour later: hourly only.
+        mail.outbox = []
+        self.assertEqual(send_digests('hourly'), 0)
+        self.approve('Third')
+        later = hourly.last_digest_at + timedelta(hours=1)
+        self.assertEqual(send_digests('hourly', now=later) + send_digests('daily', now=later), 1)
+        self.assertEqual(mail.outbox[0].to, ['hourly@example.com'])
+        self.assertIn('Third', mail.outbox[0].body)
+        self.assertNotIn('First', mail.outbox[0].body)
+
+    def test_switching_to_digest_skips_earlier_articles(self):
+        self.approve('Old news')
+        reader = self.readers['immediate']
+        self.client.login(username='immediate', password='pass')
+        self.client.post(reverse('digest_preferences'), {'digest_frequency': 'daily'})
+        reader.refresh_from_db()
+        self.assertEqual(reader.digest_frequency, 'daily')
+        # Only the reader who was on the daily digest all along.
+        self.assertEqual(send_digests('daily'), 1)
+        self.assertEqual([m.to[0] for m in mail.outbox], ['daily@example.com'])
+
+    def test_backfilled_entries_are_not_news(self):
+        self.approve('Back catalogue')
+        send_digests('hourly')
+        mail.outbox = []
+        # Following a journalist, or a rebuild, writes new entries for old articles.
+        hourly = self.readers['hourly']
+        other = create_user('other', 'journalist')
+        weekly = create_publisher('Weekly', owner='owner2')
+        Article.objects.create(title='Archive', content='Body', author=other, publisher=weekly, approved=True)
+        self.client.login(username='hourly', password='pass')
+        self.client.get(reverse('subscribe_journalist', args=[other.id]))
+        call_command('rebuild_feeds', reader=[hourly.id], stdout=StringIO())
+        self.assertEqual(FeedEntry.objects.filter(reader=hourly).count(), 2)
+
+        later = timezone.now() + timedelta(hours=2)
+        self.assertEqual(send_digests('hourly', now=later), 0)
+        self.approve('Fresh')
+        self.assertEqual(send_digests('hourly', now=later), 1)
+        self.assertIn('Fresh', mail.outbox[0].body)
+        self.assertNotIn('Archive', mail.outbox[0].body)
+
+
+class SyndicationFeedTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.journalist = create_user('journalist', 'journalist')
+        self.other = create_user('other', 'journalist')
+        self.publisher = create_publisher()
+        self.publisher2 = create_publisher('Weekly', owner='owner2')
+        self.article = Article.objects.create(
+            title='Published', content='Body ' * 100, author=self.journalist, publisher=self.publisher, approved=True,
+        )
+        Article.objects.create(title='Pending', content='Body', author=self.journalist, publisher=self.publisher)
+
+    def test_feeds_list_approved_articles(self):
+        response = self.client.get(reverse('feed_rss'))
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertContains(response, 'Published')
+        self.assertNotContains(response, 'Pending')
+        response = self.client.get(reverse('publisher_feed_atom', args=[self.publisher.pk]))
+        self.assertEqual(response['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertContains(response, '<title>News Portal: Daily</title>')
+        self.assertContains(response, 'Published')
+        self.assertNotContains(self.client.get(reverse('journalist_feed_rss', args=[self.other.pk])), 'Published')
+        self.assertEqual(self.client.get(reverse('journalist_feed_rss', args=[self.publisher.owner.pk])).status_code, 404)
+
+    def test_polls_revalidate_without_database(self):
+        url = reverse('journalist_feed_rss', args=[self.journalist.pk])
+        first = self.client.get(url)
+        self.assertIn('public', first['Cache-Control'])
+        self.assertTrue(first.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).content, first.content)
+
+    def test_approval_and_edits_invalidate_only_affected_feeds(self):
+        urls = {
+            'site': reverse('feed_atom'),
+            'daily': reverse('publisher_feed_rss', args=[self.publisher.pk]),
+            'weekly': reverse('publisher_feed_rss', args=[self.publisher2.pk]),
+        }
+        etags = {name: self.client.get(url)['ETag'] for name, url in urls.items()}
+
+        def changed():
+            return {
+                name for name, url in urls.items()
+                if self.client.get(url, HTTP_IF_NONE_MATCH=etags[name]).status_code == 200
+            }
+
+        pending = Article.objects.get(title='Pending')
+        pending.title = 'Still pending'
+        pending.save()
+        self.assertEqual(changed(), set())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            approve_articles([pending.pk])
+        self.assertEqual(changed(), {'site', 'daily'})
+        self.assertContains(self.client.get(urls['daily']), 'Still pending')
+
+        etags = {name: self.client.get(url)['ETag'] for name, url in urls.items()}
+        self.article.publisher = self.publisher2
+        self.article.save()
+        self.assertEqual(changed(), {'site', 'daily', 'weekly'})
+
+
+class ArticleCardFragmentTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = create_user('reader', 'reader')
+        journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.reader.subscribed_publishers.add(self.publisher)
+        self.article = Article.objects.create(
+            title='Original', content='Body', author=journalist, publisher=self.publisher, approved=True,
+        )
+        self.client.login(username='reader', password='pass')
+
+    def test_cards_are_cached_but_buttons_are_not(self):
+        self.assertContains(self.client.get(reverse('home')), 'Original')
+        # A queryset update leaves updated_at alone: the cached card is served,
+        # while the subscribe button still follows the reader's state.
+        Article.objects.filter(pk=self.article.pk).update(title='Changed')
+        self.reader.subscribed_publishers.remove(self.publisher)
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Original')
+        self.assertContains(response, 'Subscribe Daily')
+
+        self.article.refresh_from_db()
+        self.article.save()
+        self.assertContains(self.client.get(reverse('home')), 'Changed')
+
+    def test_render_benchmark(self):
+        cache.set('unrelated', 1)
+        rendered = []
+
+        def capture(*args, **kwargs):
+            rendered.append(render_to_string(*args, **kwargs))
+            return rendered[-1]
+
+        with patch('articles.benchmark.render_to_string', side_effect=capture):
+            report = render_cards(cards=5, iterations=2, words=20)
+        self.assertEqual(set(report['results']), {'cold', 'warm'})
+        # Cards carry their precomputed excerpts, as saved articles do.
+        self.assertIn('word0 word1', rendered[0])
+        self.assertGreater(report['speedup'], 0)
+        # Runs against a private cache: the configured one is left alone.
+        self.assertEqual(cache.get('unrelated'), 1)
+
+
+class PrecomputedArticleFieldsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+
+    def make(self, words, **kwargs):
+        return Article(
+            title='Story', content=' '.join(['word'] * words), author=self.journalist,
+            publisher=self.publisher, approved=True, **kwargs
+        )
+
+    def test_fields_follow_content(self):
+        article = self.make(450)
+        article.save()
+        article.refresh_from_db()
+        self.assertEqual(article.word_count, 450)
+        self.assertEqual(article.reading_time, 3)
+        self.assertEqual(len(article.excerpt.split()), 30)
+
+        article.content = 'short'
+        article.save(update_fields=['content'])
+        article.refresh_from_db()
+        self.assertEqual((article.excerpt, article.word_count, article.reading_time), ('short', 1, 1))
+
+        # Saving other fields, or from a deferred instance, leaves them be.
+        Article.objects.filter(pk=article.pk).update(content='a b c')
+        article.title = 'Renamed'
+        article.save(update_fields=['title'])
+        deferred = Article.objects.defer('content').get(pk=article.pk)
+        deferred.save()
+        article.refresh_from_db()
+        self.assertEqual(article.excerpt, 'short')
+
+    def test_backfill_command(self):
+        Article.objects.bulk_create([self.make(10), self.make(250)])
+        call_command('backfill_article_excerpts', batch_size=1, stdout=StringIO())
+        self.assertEqual(
+            sorted(Article.objects.values_list('word_count', 'reading_time')), [(10, 1), (250, 2)]
+        )
+
+    def test_home_list_does_not_load_bodies(self):
+        self.make(100).save()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, '1 min read')
+        article_selects = [q['sql'] for q in queries if 'FROM "articles_article"' in q['sql']]
+        self.assertTrue(article_selects)
+        for sql in article_selects:
+            self.assertNotIn('"articles_article"."content"', sql)
+
+
+class CounterTestCase(TestCase):
+    def setUp(self):
+        self.readers = [
+            create_user(f'reader{i}', 'reader') for i in range(3)
+        ]
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.other = create_publisher('Weekly', owner='other')
+
+    def counts(self, obj):
+        obj.refresh_from_db(fields=['subscriber_count', 'approved_article_count'])
+        return obj.subscriber_count, obj.approved_article_count
+
+    def test_subscriptions_from_either_side(self):
+        first, second, third = self.readers
+        first.subscribed_publishers.add(self.publisher, self.other)
+        first.subscribed_publishers.add(self.publisher)  # already subscribed
+        self.publisher.subscribed_readers.add(second, third)
+        self.assertEqual(self.counts(self.publisher), (3, 0))
+        self.assertEqual(self.counts(self.other), (1, 0))
+
+        second.subscribed_publishers.remove(self.publisher, self.other)  # not subscribed to other
+        self.assertEqual(self.counts(self.publisher), (2, 0))
+        self.assertEqual(self.counts(self.other), (1, 0))
+        self.publisher.subscribed_readers.clear()
+        self.assertEqual(self.counts(self.publisher), (0, 0))
+
+        self.journalist.followers.add(first, second)
+        third.subscribed_journalists.add(self.journalist)
+        first.subscribed_journalists.clear()
+        self.assertEqual(self.counts(self.journalist), (2, 0))
+        second.delete()
+        self.assertEqual(self.counts(self.journalist), (1, 0))
+        self.assertEqual(self.counts(self.other), (1, 0))
+
+    def test_approved_articles(self):
+        article = Article.objects.create(
+            title='Story', content='Body', author=self.journalist, publisher=self.publisher,
+        )
+        self.assertEqual(self.counts(self.publisher), (0, 0))
+        article.approved = True
+        article.save()
+        article.title = 'Edited'
+        article.save()
+        self.assertEqual(self.counts(self.publisher), (0, 1))
+        self.assertEqual(self.counts(self.journalist), (0, 1))
+
+        article.publisher = self.other
+        article.save()
+        self.assertEqual(self.counts(self.publisher), (0, 0))
+        self.assertEqual(self.counts(self.other), (0, 1))
+
+        reject_articles([article.id])
+        self.assertEqual(self.counts(self.other), (0, 0))
+        approve_articles([article.id])
+        self.assertEqual(self.counts(self.journalist), (0, 1))
+        delete_articles([article.id])
+        self.assertEqual(self.counts(self.other), (0, 0))
+        self.assertEqual(self.counts(self.journalist), (0, 0))
+
+    def test_reconcile_repairs_drift(self):
+        self.readers[0].subscribed_publishers.add(self.publisher)
+        Article.objects.create(
+            title='Story', content='Body', author=self.journalist, publisher=self.publisher, approved=True,
+        )
+        # Paths that bypass the signals.
+        Follow = get_user_model().subscribed_journalists.through
+        Follow.objects.bulk_create([Follow(from_customuser=r, to_customuser=self.journalist) for r in self.readers])
+        Publisher.objects.filter(pk=self.other.pk).update(subscriber_count=7, approved_article_count=2)
+
+        out = StringIO()
+        call_command('reconcile_counters', batch_size=2, dry_run=True, stdout=out)
+        self.assertIn('Would repair 1 articles.Publisher rows', out.getvalue())
+        self.assertEqual(self.counts(self.other), (7, 2))
+
+        call_command('reconcile_counters', batch_size=2, stdout=StringIO())
+        self.assertEqual(self.counts(self.other), (0, 0))
+        self.assertEqual(self.counts(self.publisher), (1, 1))
+        self.assertEqual(self.counts(self.journalist), (3, 1))
+
+
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1, INSTRUMENTATION_SERVER_TIMING=True)
+class InstrumentationMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.reader = create_user('reader', 'reader')
+        self.client.login(username='reader', password='pass')
+
+    def test_server_timing_matches_captured_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('home'))
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', timing)
+        for metric in ('db;dur=', 'tpl;dur=', 'view;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+    @override_settings(INSTRUMENTATION_QUERY_BUDGET=1)
+    def test_over_budget_logs_warning(self):
+        with self.assertLogs('articles.instrumentation', level='WARNING') as logs:
+            self.client.get(reverse('home'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'home')
+        self.assertEqual(record['over_budget'], ['queries'])
+        self.assertGreater(record['template_ms'], 0)
+
+    def test_moderation_views_have_their_own_budget(self):
+        create_user('editor', 'editor')
+        journalist = create_user('journalist', 'journalist')
+        publisher = create_publisher()
+        self.reader.subscribed_publishers.add(publisher)
+        article = Article.objects.create(title='Draft', content='Body', author=journalist, publisher=publisher)
+        self.client.login(username='editor', password='pass')
+        with self.assertNoLogs('articles.instrumentation', level='WARNING'):
+            self.client.get(reverse('approve_article', args=[article.id]))
+            self.client.post(reverse('bulk_moderate'), {'action': 'reject', 'article_ids': [article.id]})
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        response = self.client.get(reverse('home'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(INSTRUMENTATION_SERVER_TIMING=False)
+    def test_server_timing_header_is_opt_in(self):
+        with self.assertLogs('articles.instrumentation', level='WARNING'):
+            with override_settings(INSTRUMENTATION_QUERY_BUDGET=1):
+                response = self.client.get(reverse('home'))
+        self.assertNotIn('Server-Timing', response)
+
+
+# Project URLs with the async read views routed first, as with ASYNC_VIEWS=true.
+urlpatterns = [
+    path('', views.home_async, name='home'),
+    path('articles/<int:pk>/', views.article_detail_async, name='article_detail'),
+    path('api/subscribed-articles/', views.get_subscribed_articles_async, name='get_subscribed_articles'),
+    path('api/events/', views.article_events, name='article_events'),
+    *project_urlpatterns,
+]
+
+
+@override_settings(ROOT_URLCONF='articles.tests')
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = create_user('reader', 'reader')
+        journalist = create_user('journalist', 'journalist')
+        publisher = create_publisher()
+        self.reader.subscribed_publishers.add(publisher)
+        self.articles = []
+        for i in range(3):
+            article = Article.objects.create(
+                title=f'Story {i}', content=' '.join(['word'] * 100), author=journalist,
+                publisher=publisher, approved=True
+            )
+            self.articles.append(article)
+
+    async def test_home_for_reader_and_anonymous(self):
+        response = await self.async_client.get(reverse('home'))
+        self.assertContains(response, 'Story 2')
+        self.assertNotContains(response, 'Unsubscribe Daily')
+
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.get(reverse('home'))
+        self.assertContains(response, 'Unsubscribe Daily')
+        response = await self.async_client.get(reverse('home'), headers={'if-none-match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_article_detail(self):
+        url = reverse('article_detail', args=[self.articles[0].pk])
+        response = await self.async_client.get(url)
+        self.assertContains(response, 'Story 0')
+        self.assertTrue(response.has_header('Last-Modified'))
+        missing = await self.async_client.get(reverse('article_detail', args=[0]))
+        self.assertEqual(missing.status_code, 404)
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=1, INSTRUMENTATION_SERVER_TIMING=True)
+    async def test_instrumentation_counts_queries_in_worker_threads(self):
+        # The ORM runs in sync_to_async threads, not the one running the
+        # middleware.
+        url = reverse('article_detail', args=[self.articles[0].pk])
+        response = await self.async_client.get(url)
+        queries = int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+
+    async def test_subscribed_articles_matches_sync_api(self):
+        url = reverse('get_subscribed_articles')
+        self.assertEqual((await self.async_client.get(url)).status_code, 403)
+
+        await self.async_client.aforce_login(self.reader)
+        await self.client.aforce_login(self.reader)
+        with override_settings(ROOT_URLCONF='news_portal.urls'):
+            expected = await sync_to_async(lambda: self.client.get(url, {'full': 1}).json())()
+        response = await self.async_client.get(url, {'full': 1})
+        self.assertEqual(response.json(), expected)
+
+        response = await self.async_client.get(url, {'stream': 1})
+        rows = json.loads(b''.join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual([r['id'] for r in rows], [a.id for a in reversed(self.articles)])
+
+
+@override_settings(ROOT_URLCONF='articles.tests', PUSH_HEARTBEAT_SECONDS=5)
+class ArticlePushTestCase(TestCase):
+    def setUp(self):
+        self.reader = create_user('reader', 'reader')
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.reader.subscribed_publishers.add(self.publisher)
+        self.article = Article.objects.create(
+            title='Breaking', content='Body', author=self.journalist, publisher=self.publisher,
+        )
+
+    def event(self, publisher_id=None, author_id=None):
+        return {
+            'type': 'article', 'id': self.article.pk, 'title': 'Breaking',
+            'publisher_id': publisher_id or self.publisher.pk, 'author_id': author_id or self.journalist.pk,
+            'url': self.article.get_absolute_url(),
+        }
+
+    async def test_events_reach_only_subscribed_connections(self):
+        by_publisher = broadcaster.connect(UserProfile(1, 'reader', [self.publisher.pk]))
+        by_journalist = broadcaster.connect(UserProfile(2, 'reader', (), [self.journalist.pk]))
+        unrelated = broadcaster.connect(UserProfile(3, 'reader', [self.publisher.pk + 100]))
+        try:
+            # Published from another thread, as a sync view would.
+            await asyncio.to_thread(broadcaster.publish, self.event())
+            await asyncio.sleep(0)
+            self.assertEqual(by_publisher.queue.qsize(), 1)
+            self.assertEqual(by_journalist.queue.qsize(), 1)
+            self.assertEqual(unrelated.queue.qsize(), 0)
+        finally:
+            for open_connection in (by_publisher, by_journalist, unrelated):
+                broadcaster.disconnect(open_connection)
+        self.assertEqual(broadcaster.connection_count(), 0)
+
+    def test_approval_publishes_after_commit(self):
+        with patch.object(broadcaster, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                approve_articles([self.article.pk])
+        publish.assert_called_once_with(self.event())
+
+    async def test_server_sent_events(self):
+        response = await self.async_client.get(reverse('article_events'))
+        self.assertEqual(response.status_code, 403)
+
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.get(reverse('article_events'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 5000\n\n')
+        await asyncio.to_thread(broadcaster.publish, self.event())
+        chunk = (await asyncio.wait_for(anext(stream), 1)).decode()
+        self.assertTrue(chunk.startswith(f'id: {self.article.pk}\nevent: article\ndata: '))
+        self.assertEqual(json.loads(chunk.split('data: ', 1)[1])['title'], 'Breaking')
+        # A client disconnect cancels the pending read, as the ASGI handler does.
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(broadcaster.connection_count(), 0)
+
+    async def test_websocket(self):
+        async def connect(cookie):
+            inbox, sent = asyncio.Queue(), []
+            scope = {'type': 'websocket', 'path': '/ws/articles/', 'headers': [
+                (b'host', b'testserver'), (b'cookie', cookie.encode()),
+            ]}
+
+            async def send(message):
+                sent.append(message)
+
+            await inbox.put({'type': 'websocket.connect'})
+            task = asyncio.create_task(websocket_application(scope, inbox.get, send))
+            while not sent and not task.done():
+                await asyncio.sleep(0.01)
+            return task, inbox, sent
+
+        task, _, sent = await connect('')
+        await task
+        self.assertEqual(sent, [{'type': 'websocket.close', 'code': 4403}])
+
+        await self.async_client.aforce_login(self.reader)
+        session = self.async_client.cookies[settings.SESSION_COOKIE_NAME].value
+        task, inbox, sent = await connect(f'{settings.SESSION_COOKIE_NAME}={session}')
+        self.assertEqual(sent, [{'type': 'websocket.accept'}])
+        await asyncio.to_thread(broadcaster.publish, self.event())
+        while len(sent) < 2:
+            await asyncio.sleep(0.01)
+        self.assertEqual(json.loads(sent[1]['text'])['id'], self.article.pk)
+        await inbox.put({'type': 'websocket.disconnect', 'code': 1000})
+        await asyncio.wait_for(task, 1)
+        self.assertEqual(broadcaster.connection_count(), 0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_use_replica_only_inside_marked_views(self):
+        self.assertEqual(self.router.db_for_read(Article), 'default')
+        read = read_replica(lambda request: self.router.db_for_read(Article))
+        self.assertEqual(read(None), 'replica')
+
+    def test_write_pins_rest_of_request_to_primary(self):
+        def view(request):
+            before = self.router.db_for_read(Article)
+            self.router.db_for_write(Article)
+            return before, self.router.db_for_read(Article)
+
+        self.assertEqual(read_replica(view)(None), ('replica', 'default'))
+
+
+# Needs a "replica" alias backed by its own database (no TEST MIRROR),
+# e.g. two SQLite files, so replica-only rows prove where reads went.
+SEPARATE_REPLICA = (
+    'replica' in settings.DATABASES
+    and not settings.DATABASES['replica'].get('TEST', {}).get('MIRROR')
+)
+
+
+@skipUnless(SEPARATE_REPLICA, 'requires a separate "replica" database')
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaReadYourWritesTestCase(TransactionTestCase):
+    databases = {'default', 'replica'} if SEPARATE_REPLICA else {'default'}
+
+    def test_reads_follow_pin_cookie(self):
+        User = get_user_model()
+        create_user('reader', 'reader')
+        # Rows that exist only on the replica (bulk_create: no signals
+        # writing to the primary).
+        journalist, owner = User.objects.using('replica').bulk_create([
+            User(username='journalist', role='journalist'), User(username='owner', role='publisher'),
+        ])
+        [publisher] = Publisher.objects.using('replica').bulk_create([Publisher(name='Daily', owner=owner)])
+        [article] = Article.objects.using('replica').bulk_create([
+            Article(title='Replica story', content='Body', author=journalist, publisher=publisher, approved=True)
+        ])
+        url = reverse('article_detail', args=[article.pk])
+        cache.clear()
+
+        self.assertContains(self.client.get(url), 'Replica story')
+
+        response = self.client.post(reverse('login'), {'username': 'reader', 'password': 'pass'})
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        cache.clear()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.cookies.pop(settings.REPLICA_PIN_COOKIE)
+        cache.clear()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class UserProfileCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = create_user('reader', 'reader')
+        self.journalist = create_user('journalist', 'journalist')
+        self.publisher = create_publisher()
+        self.reader.subscribed_publishers.add(self.publisher)
+
+    def test_profile_is_cached_and_immutable(self):
+        profile = get_profile(self.reader)
+        self.assertEqual(profile.role, 'reader')
+        self.assertEqual(profile.publisher_ids, frozenset([self.publisher.pk]))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_profile(self.reader).publisher_ids, profile.publisher_ids)
+        with self.assertRaises(AttributeError):
+            profile.role = 'editor'
+
+    def test_m2m_changes_invalidate(self):
+        get_profile(self.reader)
+        self.reader.subscribed_journalists.add(self.journalist)
+        self.assertTrue(get_profile(self.reader).follows_journalist(self.journalist.pk))
+
+        # Reverse side, including clear(), which carries no pk_set.
+        self.publisher.subscribed_readers.clear()
+        self.assertFalse(get_profile(self.reader).follows_publisher(self.publisher.pk))
+        self.journalist.followers.remove(self.reader)
+        self.assertEqual(get_profile(self.reader).journalist_ids, frozenset())
+
+    def test_stale_profile_does_not_block_subscription_writes(self):
+        Article.objects.create(
+            title='Story', content='Body', author=self.journalist, publisher=self.publisher, approved=True,
+        )
+        self.client.login(username='reader', password='pass')
+        self.assertTrue(get_profile(self.reader).follows_publisher(self.publisher.pk))
+        # Dropped behind the cache's back: the profile still says subscribed.
+        self.reader.subscribed_publishers.through.objects.filter(customuser=self.reader).delete()
+        FeedEntry.objects.filter(reader=self.reader).delete()
+
+        self.client.get(reverse('subscribe_publisher', args=[self.publisher.id]))
+        self.assertTrue(self.reader.subscribed_publishers.filter(pk=self.publisher.pk).exists())
+        self.assertEqual(FeedEntry.objects.filter(reader=self.reader).count(), 1)
+
+        # And the other way round: a row the cached profile never saw.
+        get_profile(self.reader)
+        Follow = get_user_model().subscribed_journalists.through
+        Follow.objects.create(from_customuser=self.reader, to_customuser=self.journalist)
+        self.assertFalse(get_profile(self.reader).follows_journalist(self.journalist.pk))
+        self.client.get(reverse('unsubscribe_journalist', args=[self.journalist.id]))
+        self.assertFalse(self.reader.subscribed_journalists.exists())
+
+    def test_warm_profile_saves_queries_on_home(self):
+        self.client.login(username='reader', password='pass')
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get(reverse('home'))
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get(reverse('home'))
+        # subscribed publisher ids and followed journalist ids come from cache
+        self.assertEqual(len(warm), len(cold) - 2)
+
+
+class ScalableAdminTestCase(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(username='admin', password='pass', email='a@example.com')
+        journalist = create_user('journalist', 'journalist')
+        publisher = create_publisher()
+        Article.objects.bulk_create([
+            Article(title=f'Story {i}', content='Body', author=journalist, publisher=publisher, approved=i % 2 == 0)
+            for i in range(5)
+        ])
+        self.client.login(username='admin', password='pass')
+
+    def test_changelists_render_with_filters(self):
+        url = reverse('admin:articles_article_changelist')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {'approved__exact': '1'})
+        self.assertContains(response, 'Story 0')
+        self.assertNotContains(response, 'Story 1')
+        # One count, no second "full result" count.
+        self.assertEqual(sum('COUNT(' in q['sql'] for q in ctx.captured_queries), 1)
+
+        year = Article.objects.first().created_at.year
+        self.assertContains(self.client.get(url, {'created_at__year': year}), 'Story 4')
+        for name in ('customuser', 'publisher', 'newsletter'):
+            self.assertEqual(self.client.get(reverse(f'admin:articles_{name}_changelist')).status_code, 200)
+
+    def test_change_form_uses_autocomplete(self):
+        article = Article.objects.first()
+        response = self.client.get(reverse('admin:articles_article_change', args=[article.pk]))
+        self.assertContains(response, 'admin-autocomplete')
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'articles', 'model_name': 'article', 'field_name': 'author', 'term': 'jour',
+        })
+        self.assertEqual([r['text'] for r in response.json()['results']], ['journalist (journalist)'])
+
+    def test_estimated_count_is_capped(self):
+        self.assertEqual(estimated_count(Article.objects.filter(approved=False), cap=1), 1)
+        self.assertEqual(estimated_count(Article.objects.all()), 5)
@@ -0,0 +1,271 @@
+import csv
+import json
+import os
+import time
+import uuid
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import invalidate_site
+from .counters import count_articles
+from .fanout import fan_out_articles
+from .models import Article, CustomUser, Publisher
+from .search import index_articles
+
+# Bulk article import/export. Files are read and written one row at a time,
+# so memory stays flat however large the archive is. Imports bypass the
+# per-row post_save handlers (notifications, tweets, per-article indexing):
+# feeds, counters and the search index are updated once per batch instead, and
+# subscribers are not notified about archived content.
+
+FIELDS = ("id", "title", "content", "author", "publisher", "approved", "created_at", "updated_at")
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "csv" if str(path).lower().endswith(".csv") else "jsonl"
+
+
+# ---------------------------
+# Checkpoints
+# ---------------------------
+# A small JSON file next to the data file, rewritten atomically after each
+# committed batch. A crash between a commit and the checkpoint write
+# repeats at most that one batch on resume. Export checkpoints also record
+# the output's byte offset: rows flushed after it are cut off on resume.
+def read_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_checkpoint(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def clear_checkpoint(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class Rate:
+    def __init__(self):
+        self.started = time.monotonic()
+
+    def __call__(self, rows):
+        elapsed = time.monotonic() - self.started
+        return rows / elapsed if elapsed else 0.0
+
+
+# ---------------------------
+# Import
+# ---------------------------
+def read_rows(f, fmt):
+    # JSON lines come back undecoded: decode_row runs inside the importer's
+    # per-row error handling, so one malformed line fails only itself.
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+    else:
+        for line in f:
+            if line.strip():
+                yield line
+
+
+def decode_row(record, fmt):
+    return record if fmt == "csv" else json.loads(record)
+
+
+class RowError(ValueError):
+    pass
+
+
+def _parse(row, authors, publishers):
+    try:
+        author_id = authors[row["author"]]
+    except KeyError:
+        raise RowError(f"unknown journalist {row.get('author')!r}")
+    try:
+        publisher_id = publishers[row["publisher"]]
+    except KeyError:
+        raise RowError(f"unknown publisher {row.get('publisher')!r}")
+    if not row.get("title"):
+        raise RowError("missing title")
+
+    approved = row.get("approved", False)
+    if isinstance(approved, str):
+        approved = approved.strip().lower() in TRUE_VALUES
+    created_at = row.get("created_at") or None
+    if created_at:
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise RowError(f"bad created_at {row['created_at']!r}")
+        if timezone.is_naive(created_at):
+            created_at = timezone.make_aware(created_at)
+    article = Article(
+        title=row["title"][:200],
+        content=row.get("content") or "",
+        author_id=author_id,
+        publisher_id=publisher_id,
+        approved=bool(approved),
+    )
+    article.refresh_precomputed()  # bulk_create skips save()
+    return article, created_at
+
+
+def _inserted(batch):
+    # bulk_create only sets primary keys where the backend can return them
+    # (not MySQL); otherwise read them back by each row's import key. Ids
+    # are not assumed consecutive: concurrent inserts and interleaved
+    # auto-increment locking both leave gaps.
+    if all(article.pk for article, _ in batch):
+        return batch
+    ids = dict(
+        Article.objects.filter(import_key__in=[article.import_key for article, _ in batch])
+        .values_list("import_key", "id")
+    )
+    for article, _ in batch:
+        article.pk = ids[article.import_key]
+    return batch
+
+
+def _write_batch(batch, update_feeds, update_index):
+    with transaction.atomic():
+        Article.objects.bulk_create([article for article, _ in batch])
+        batch = _inserted(batch)
+
+        # auto_now_add stamped "now"; restore the archive's timestamps.
+        dated = []
+        for article, created_at in batch:
+            if created_at:
+                article.created_at = article.updated_at = created_at
+                dated.append(article)
+        if dated:
+            Article.objects.bulk_update(dated, ["created_at", "updated_at"])
+
+        approved = [article for article, _ in batch if article.approved]
+        count_articles(added=[(a.publisher_id, a.author_id) for a in approved])
+        if approved and update_feeds:
+            fan_out_articles(approved, backfilled=True)
+        if approved and update_index:
+            index_articles(approved)
+
+
+def import_articles(
+    path, fmt=None, batch_size=1000, checkpoint=None, resume=False,
+    update_feeds=True, update_index=True, progress=None, on_error=None,
+):
+    fmt = detect_format(path, fmt)
+    checkpoint = checkpoint or f"{path}.checkpoint"
+    skip = read_checkpoint(checkpoint).get("rows", 0) if resume else 0
+
+    # Lookup maps: one query each instead of one per row.
+    authors = dict(
+        CustomUser.objects.filter(role="journalist").values_list("username", "id")
+    )
+    publishers = dict(Publisher.objects.values_list("name", "id"))
+
+    run = None if connection.features.can_return_rows_from_bulk_insert else uuid.uuid4().hex
+    rate = Rate()
+    consumed = imported = failed = 0
+    batch = []
+    with open(path, newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        for consumed, row in enumerate(read_rows(f, fmt), 1):
+            if consumed <= skip:
+                continue
+            try:
+                article, created_at = _parse(decode_row(row, fmt), authors, publishers)
+                if run:
+                    article.import_key = f"{run}:{consumed}"
+                batch.append((article, created_at))
+            # ValueError covers RowError, JSONDecodeError and impossible
+            # dates from parse_datetime.
+            except (ValueError, KeyError, TypeError) as e:
+                failed += 1
+                if on_error:
+                    on_error(consumed, e)
+            if len(batch) >= batch_size:
+                _write_batch(batch, update_feeds, update_index)
+                imported += len(batch)
+                batch = []
+                write_checkpoint(checkpoint, {"rows": consumed})
+                if progress:
+                    progress(consumed, imported, rate(imported))
+        if batch:
+            _write_batch(batch, update_feeds, update_index)
+            imported += len(batch)
+
+    clear_checkpoint(checkpoint)
+    if imported:
+        invalidate_site()
+    return {"rows": consumed, "skipped": skip, "imported": imported,
+            "failed": failed, "rows_per_second": rate(imported)}
+
+
+# ---------------------------
+# Export
+# ---------------------------
+EXPORT_COLUMNS = {
+    "id": "id",
+    "title": "title",
+    "content": "content",
+    "author": "author__username",
+    "publisher": "publisher__name",
+    "approved": "approved",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+
+
+def export_rows(approved_only=False, after_id=0, chunk_size=2000):
+    queryset = Article.objects.filter(id__gt=after_id)
+    if approved_only:
+        queryset = queryset.filter(approved=True)
+    # Ascending id: the checkpoint is simply the last id written.
+    rows = queryset.order_by("id").values(*EXPORT_COLUMNS.values()).iterator(chunk_size=chunk_size)
+    for row in rows:
+        row = {name: row[column] for name, column in EXPORT_COLUMNS.items()}
+        row["created_at"] = row["created_at"].isoformat()
+        row["updated_at"] = row["updated_at"].isoformat()
+        yield row
+
+
+def export_articles(
+    out, fmt="jsonl", approved_only=False, chunk_size=2000,
+    checkpoint=None, resume=False, progress=None,
+):
+    after_id = read_checkpoint(checkpoint).get("last_id", 0) if checkpoint and resume else 0
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        if not after_id:
+            writer.writeheader()
+
+    rate = Rate()
+    written = 0
+    for row in export_rows(approved_only, after_id, chunk_size):
+        if writer:
+            writer.writerow(row)
+        else:
+            out.write(json.dumps(row) + "\n")
+        written += 1
+        if written % chunk_size == 0:
+            out.flush()
+            if checkpoint:
+                write_checkpoint(checkpoint, {"last_id": row["id"], "offset": out.tell()})
+            if progress:
+                progress(written, rate(written))
+    out.flush()
+    if checkpoint:
+        clear_checkpoint(checkpoint)
+    return {"exported": written, "resumed_after_id": after_id, "rows_per_second": rate(written)}
@@ -1,14 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import syndication, views
+
+# Read paths served by native async views under ASGI (ASYNC_VIEWS=true).
+if settings.ASYNC_VIEWS:
+    home = views.home_async
+    article_detail = views.article_detail_async
+    get_subscribed_articles = views.get_subscribed_articles_async
+else:
+    home = views.home
+    article_detail = views.article_detail
+    get_subscribed_articles = views.get_subscribed_articles
 
 urlpatterns = [
     # Homepage & registration
-    path('', views.home, name='home'),
+    path('', home, name='home'),
     path('register/', views.register, name='register'),
 
     # Articles
     path('articles/create/', views.create_article, name='create_article'),
-    path('articles/<int:pk>/', views.article_detail, name='article_detail'),
+    path('articles/<int:pk>/', article_detail, name='article_detail'),
     path('articles/<int:pk>/edit/', views.update_article, name='update_article'),
     path('articles/<int:pk>/delete/', views.delete_article, name='delete_article'),
 
@@ -24,9 +35,11 @@ urlpatterns = [
     # Editor dashboard & approvals
     path('editor/', views.editor_dashboard, name='editor_dashboard'),
     path('editor/approve/<int:article_id>/', views.approve_article, name='approve_article'),
+    path('editor/bulk/', views.bulk_moderate, name='bulk_moderate'),
 
     # Subscriptions page
     path('subscriptions/', views.subscriptions, name='subscriptions'),
+    path('subscriptions/digest/', views.digest_preferences, name='digest_preferences'),
 
     # Newsletter CRUD (journalists only)
     path('newsletters/', views.newsletter_list, name='newsletter_list'),
@@ -34,11 +47,24 @@ urlpatterns = [
     path('newsletters/<int:pk>/edit/', views.newsletter_update, name='newsletter_update'),
     path('newsletters/<int:pk>/delete/', views.newsletter_delete, name='newsletter_delete'),
 
-    # API
-    path('api/subscribed-articles/', views.get_subscribed_articles, name='get_subscribed_articles'),
-]
-
-
+    # Search
+    path('search/', views.search, name='search'),
 
+    # RSS / Atom
+    path('feeds/rss/', syndication.latest_rss, name='feed_rss'),
+    path('feeds/atom/', syndication.latest_atom, name='feed_atom'),
+    path('feeds/publishers/<int:pk>/rss/', syndication.publisher_rss, name='publisher_feed_rss'),
+    path('feeds/publishers/<int:pk>/atom/', syndication.publisher_atom, name='publisher_feed_atom'),
+    path('feeds/journalists/<int:pk>/rss/', syndication.journalist_rss, name='journalist_feed_rss'),
+    path('feeds/journalists/<int:pk>/atom/', syndication.journalist_atom, name='journalist_feed_atom'),
 
+    # API
+    path('api/subscribed-articles/', get_subscribed_articles, name='get_subscribed_articles'),
+    path('api/search/', views.api_search, name='api_search'),
+]
 
+# Push channel: held-open connections, so only under ASGI.
+if settings.ASYNC_VIEWS:
+    urlpatterns += [
+        path('api/events/', views.article_events, name='article_events'),
+    ]
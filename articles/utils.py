@@ -1,18 +1,39 @@
-import tweepy
 from django.conf import settings
+from django.utils.module_loading import import_string
+
+_client = None
+
+
+def build_twitter_client():
+    import tweepy
+
+    auth = tweepy.OAuth1UserHandler(
+        settings.TWITTER_API_KEY,
+        settings.TWITTER_API_SECRET,
+        settings.TWITTER_ACCESS_TOKEN,
+        settings.TWITTER_ACCESS_SECRET
+    )
+    return tweepy.API(auth)
+
+
+def get_twitter_client():
+    # Built once per process and reused for every post.
+    global _client
+    if _client is None:
+        _client = import_string(settings.TWITTER_CLIENT_FACTORY)()
+    return _client
+
+
+def reset_twitter_client():
+    global _client
+    _client = None
+
+
+def tweet_text(article):
+    return f"{settings.TWITTER_PREFIX} {article.title} {settings.SITE_URL}{article.get_absolute_url()}"
+
 
 def post_to_twitter(article):
-    try:
-        auth = tweepy.OAuth1UserHandler(
-            settings.TWITTER_API_KEY,
-            settings.TWITTER_API_SECRET,
-            settings.TWITTER_ACCESS_TOKEN,
-            settings.TWITTER_ACCESS_SECRET
-        )
-        api = tweepy.API(auth)
-
-        tweet_text = f"📰 New article: {article.title} {article.get_absolute_url()}"
-        api.update_status(status=tweet_text)
-        print("Tweet posted successfully!")
-    except Exception as e:
-        print("Twitter post failed:", e)
+    # Returns the id of the created status; errors propagate to the caller.
+    status = get_twitter_client().update_status(status=tweet_text(article))
+    return str(getattr(status, "id", "") or "")
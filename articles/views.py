@@ -1,18 +1,66 @@
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib import messages
 from django.contrib.auth import login
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from .models import Article, Publisher, CustomUser, Newsletter
 from .forms import (
     ArticleForm,
     CustomUserCreationForm,
+    DigestPreferenceForm,
     PublisherForm,
     NewsletterForm,
 )
-from .serializers import ArticleSerializer
+from .serializers import (
+    ArticleSerializer,
+    summary_values,
+    article_summary,
+    iter_json_array,
+    aiter_json_array,
+)
+from .fanout import (
+    reader_feed,
+    backfill_publisher,
+    backfill_journalist,
+    remove_publisher,
+    remove_journalist,
+)
+from .instrumentation import query_budget
+from .pagination import paginate, apaginate
+from .moderation import ACTIONS as MODERATION_ACTIONS, approve_articles, moderate
+from .profiles import JournalistSubscription, PublisherSubscription, aget_profile
+from .push import sse_stream
+from .routers import read_replica
+from .search import search as search_index
+from .subscriptions import get_subscription_state
+from .cache import (
+    article_snapshot,
+    homepage_key,
+    get_or_build,
+    aarticle_snapshot,
+    ahomepage_key,
+    aget_or_build,
+)
+from .conditional import (
+    acondition,
+    home_etag,
+    article_etag,
+    article_last_modified,
+    subscribed_articles_etag,
+)
+
+# Feed rows are paged on the denormalized sort key of the feed index.
+FEED_KEYS = ("sort_key", "article_id")
+FEED_PREFIX = "article__"
 
 
 # ---------------------------
@@ -49,30 +97,43 @@ def register(request):
 # ---------------------------
 # Homepage
 # ---------------------------
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=home_etag)
 def home(request):
+    cursor = request.GET.get("cursor")
     if is_reader(request.user):
-        articles = (
-            Article.objects.filter(
-                approved=True,
-                publisher__in=request.user.subscribed_publishers.all(),
-            )
-            | Article.objects.filter(
-                approved=True,
-                author__in=request.user.subscribed_journalists.all(),
-            )
-        ).distinct().order_by("-id")
-    else:
-        articles = Article.objects.filter(approved=True).order_by("-id")
+        page = paginate(reader_feed(request.user), cursor, keys=FEED_KEYS)
+        articles = [entry.article for entry in page]
+        return render(request, "homepage.html", {"articles": articles, "page": page})
 
-    return render(request, "homepage.html", {"articles": articles})
+    # Everyone else sees the same public list, so it is cached as a fragment.
+    def build():
+        page = paginate(
+            Article.objects.filter(approved=True).select_related("author", "publisher").defer("content"),
+            cursor,
+        )
+        return render_to_string("article_list.html", {"articles": page.items, "page": page})
+
+    article_list = get_or_build(homepage_key(cursor), build)
+    return render(request, "homepage.html", {"article_list": mark_safe(article_list)})
 
 
 # ---------------------------
 # Article detail
 # ---------------------------
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=article_etag, last_modified_func=article_last_modified)
 def article_detail(request, pk):
-    article = get_object_or_404(Article, pk=pk)
-    return render(request, "article_detail.html", {"article": article})
+    snapshot = article_snapshot(pk)
+    if snapshot is None:
+        raise Http404("No Article matches the given query.")
+    return render(
+        request,
+        "article_detail.html",
+        {"article": snapshot["article"], "article_body": mark_safe(snapshot["body"])},
+    )
 
 
 # ---------------------------
@@ -117,27 +178,53 @@ def register_publisher(request):
 @login_required
 @user_passes_test(is_editor)
 def editor_dashboard(request):
-    articles = Article.objects.filter(approved=False).order_by("-id")
-    return render(request, "editor_dashboard.html", {"articles": articles})
+    page = paginate(
+        Article.objects.filter(approved=False).select_related("author").defer("content"),
+        request.GET.get("cursor"),
+    )
+    return render(
+        request, "editor_dashboard.html", {"articles": page.items, "page": page}
+    )
 
 
 # ---------------------------
 # Approve article (editors only)
 # ---------------------------
+# Approval writes the feeds, both outboxes, the search index and the
+# counters in one transaction: a fixed ~25 queries however many readers
+# follow the article.
+@query_budget(30)
 @login_required
 @user_passes_test(is_editor)
 def approve_article(request, article_id):
     article = get_object_or_404(Article, id=article_id)
-    article.approved = True
-    article.save()
+    # Feed fan-out, notification and Twitter/X jobs are queued in the same
+    # transaction as the approval (see articles.moderation).
+    approve_articles([article.id])
+    return redirect("editor_dashboard")
+
 
-    # Hook for Twitter/X integration
-    try:
-        from .utils import post_to_twitter
-        post_to_twitter(article)
-    except Exception as e:
-        print("[Twitter] Post failed:", e)
+# ---------------------------
+# Bulk moderation (editors only)
+# ---------------------------
+MODERATION_DONE = {"approve": "Approved", "reject": "Rejected", "delete": "Deleted"}
 
+
+# Approve/reject cost the same fixed queries for any selection (see
+# BulkModerationTestCase); delete runs the per-row delete signals, so its
+# count grows with the selection and no fixed budget applies.
+@query_budget(0)
+@login_required
+@user_passes_test(is_editor)
+@require_POST
+def bulk_moderate(request):
+    action = request.POST.get("action")
+    ids = [int(pk) for pk in request.POST.getlist("article_ids") if pk.isdigit()]
+    if action not in MODERATION_ACTIONS or not ids:
+        messages.error(request, "Select at least one article and an action.")
+        return redirect("editor_dashboard")
+    count = moderate(action, ids)
+    messages.success(request, f"{MODERATION_DONE[action]} {count} article(s).")
     return redirect("editor_dashboard")
 
 
@@ -228,51 +315,258 @@ def newsletter_delete(request, pk):
 # ---------------------------
 # API: Subscribed articles
 # ---------------------------
+def _cursor_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params["cursor"] = cursor
+    return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+@read_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=subscribed_articles_etag)
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_subscribed_articles(request):
     user = request.user
+    if not is_reader(user):
+        return Response({"detail": "Not a reader"}, status=403)
+
+    params = request.query_params
+    if params.get("stream"):
+        # Whole feed, streamed row by row instead of paged.
+        rows = summary_values(reader_feed(user), FEED_PREFIX).iterator(chunk_size=2000)
+        return StreamingHttpResponse(
+            iter_json_array(article_summary(row, FEED_PREFIX) for row in rows),
+            content_type="application/json",
+        )
+
+    cursor = params.get("cursor")
+    if params.get("full"):
+        # The full representation includes the body.
+        page = paginate(reader_feed(user).defer(None), cursor, keys=FEED_KEYS)
+        results = ArticleSerializer([entry.article for entry in page], many=True).data
+    else:
+        page = paginate(
+            summary_values(reader_feed(user), FEED_PREFIX, FEED_KEYS), cursor, keys=FEED_KEYS
+        )
+        results = [article_summary(row, FEED_PREFIX) for row in page]
+    return Response(
+        {
+            "next": _cursor_url(request, page.next_cursor),
+            "previous": _cursor_url(request, page.previous_cursor),
+            "results": results,
+        }
+    )
+
+
+# ---------------------------
+# Async read paths (ASGI)
+# ---------------------------
+# Same responses as home, article_detail and get_subscribed_articles, with
+# database and cache I/O awaited so that, under uvicorn, a slow query parks
+# the request instead of a worker. Routed instead of the sync views when
+# ASYNC_VIEWS is on (see articles/urls.py).
+async def _auser(request):
+    # Resolve the user without a blocking query; templates and context
+    # processors then read the resolved object from request.user.
+    request.user = await request.auser()
+    return request.user
+
+
+def _json(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), content_type="application/json", status=status)
+
+
+@read_replica
+@cache_control(private=True, no_cache=True)
+@acondition(etag_func=home_etag)
+async def home_async(request):
+    user = await _auser(request)
+    cursor = request.GET.get("cursor")
     if is_reader(user):
-        articles = (
-            Article.objects.filter(
-                publisher__in=user.subscribed_publishers.all(), approved=True
-            )
-            | Article.objects.filter(
-                author__in=user.subscribed_journalists.all(), approved=True
-            )
-        ).distinct().order_by("-id")
-        serializer = ArticleSerializer(articles, many=True)
-        return Response(serializer.data)
-    return Response({"detail": "Not a reader"}, status=403)
+        page = await apaginate(reader_feed(user), cursor, keys=FEED_KEYS)
+        await get_subscription_state(request).aload()
+        articles = [entry.article for entry in page]
+        return render(request, "homepage.html", {"articles": articles, "page": page})
+
+    async def build():
+        page = await apaginate(
+            Article.objects.filter(approved=True).select_related("author", "publisher").defer("content"),
+            cursor,
+        )
+        return render_to_string("article_list.html", {"articles": page.items, "page": page})
+
+    article_list = await aget_or_build(await ahomepage_key(cursor), build)
+    return render(request, "homepage.html", {"article_list": mark_safe(article_list)})
+
+
+@read_replica
+@cache_control(private=True, no_cache=True)
+@acondition(etag_func=article_etag, last_modified_func=article_last_modified)
+async def article_detail_async(request, pk):
+    user = await _auser(request)
+    snapshot = await aarticle_snapshot(pk)
+    if snapshot is None:
+        raise Http404("No Article matches the given query.")
+    if is_reader(user):
+        await get_subscription_state(request).aload()
+    return render(
+        request,
+        "article_detail.html",
+        {"article": snapshot["article"], "article_body": mark_safe(snapshot["body"])},
+    )
+
+
+@read_replica
+@cache_control(private=True, no_cache=True)
+@acondition(etag_func=subscribed_articles_etag)
+@require_GET
+async def get_subscribed_articles_async(request):
+    # Plain Django view: DRF's @api_view has no async support. Responses
+    # are rendered with DRF's JSONRenderer so the payload is identical.
+    user = await _auser(request)
+    if not user.is_authenticated:
+        return _json({"detail": "Authentication credentials were not provided."}, status=403)
+    if not is_reader(user):
+        return _json({"detail": "Not a reader"}, status=403)
+
+    params = request.GET
+    if params.get("stream"):
+        rows = summary_values(reader_feed(user), FEED_PREFIX).aiterator(chunk_size=2000)
+        return StreamingHttpResponse(
+            aiter_json_array(article_summary(row, FEED_PREFIX) async for row in rows),
+            content_type="application/json",
+        )
+
+    cursor = params.get("cursor")
+    if params.get("full"):
+        page = await apaginate(reader_feed(user).defer(None), cursor, keys=FEED_KEYS)
+        results = ArticleSerializer([entry.article for entry in page], many=True).data
+    else:
+        page = await apaginate(
+            summary_values(reader_feed(user), FEED_PREFIX, FEED_KEYS), cursor, keys=FEED_KEYS
+        )
+        results = [article_summary(row, FEED_PREFIX) for row in page]
+    return _json(
+        {
+            "next": _cursor_url(request, page.next_cursor),
+            "previous": _cursor_url(request, page.previous_cursor),
+            "results": results,
+        }
+    )
+
+
+@require_GET
+async def article_events(request):
+    # Server-Sent Events: one "article" event per newly approved article
+    # from a followed publisher or journalist (see articles.push).
+    user = await _auser(request)
+    if not user.is_authenticated:
+        return _json({"detail": "Authentication credentials were not provided."}, status=403)
+    if not is_reader(user):
+        return _json({"detail": "Not a reader"}, status=403)
+    response = StreamingHttpResponse(
+        sse_stream(await aget_profile(user)), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx: do not buffer the stream
+    return response
+
+
+# ---------------------------
+# Search
+# ---------------------------
+SEARCH_KINDS = {"article", "newsletter"}
+
+
+def _search_params(params):
+    query = params.get("q", "").strip()
+    kinds = [k for k in params.getlist("kind") if k in SEARCH_KINDS] or None
+    return query, kinds
+
+
+def search(request):
+    query, kinds = _search_params(request.GET)
+    results = search_index(query, kinds) if query else []
+    return render(request, "search.html", {"query": query, "results": results})
+
+
+@api_view(["GET"])
+def api_search(request):
+    query, kinds = _search_params(request.query_params)
+    if not query:
+        return Response({"detail": "Missing query parameter 'q'."}, status=400)
+    return Response(
+        {
+            "query": query,
+            "results": [
+                {
+                    "kind": result.kind,
+                    "id": result.object.pk,
+                    "title": result.object.title,
+                    "author": result.object.author.username,
+                    "created_at": result.object.created_at,
+                    "score": round(result.score, 4),
+                }
+                for result in search_index(query, kinds)
+            ],
+        }
+    )
 
 
 # ---------------------------
 # Subscriptions page
 # ---------------------------
+@read_replica
 @login_required
 def subscriptions(request):
-    publishers = request.user.subscribed_publishers.all()
-    journalists = request.user.subscribed_journalists.all()
+    # Counts come from the denormalized counter columns (articles.counters).
+    publishers = request.user.subscribed_publishers.order_by("-subscriber_count", "name")
+    journalists = request.user.subscribed_journalists.order_by("-subscriber_count", "username")
     return render(
         request,
         "subscriptions.html",
-        {"publishers": publishers, "journalists": journalists},
+        {
+            "publishers": publishers,
+            "journalists": journalists,
+            "digest_form": DigestPreferenceForm(instance=request.user),
+        },
     )
 
 
+@login_required
+@require_POST
+def digest_preferences(request):
+    form = DigestPreferenceForm(request.POST, instance=request.user)
+    if form.is_valid():
+        form.save()
+        messages.success(request, "Email preference saved.")
+    return redirect("subscriptions")
+
+
 # ---------------------------
 # Subscribe / Unsubscribe to publisher
 # ---------------------------
+# The write decision reads the subscription table, never the cached
+# profile: a stale profile must not turn a click into a no-op. add() and
+# remove() are idempotent, and so is clearing feed rows.
 @login_required
 def subscribe_publisher(request, publisher_id):
     publisher = get_object_or_404(Publisher, id=publisher_id)
+    subscribed = PublisherSubscription.objects.filter(
+        customuser_id=request.user.id, publisher_id=publisher.id
+    ).exists()
     request.user.subscribed_publishers.add(publisher)
+    if not subscribed:
+        backfill_publisher(request.user, publisher)
     return redirect("subscriptions")
 
 @login_required
 def unsubscribe_publisher(request, publisher_id):
     publisher = get_object_or_404(Publisher, id=publisher_id)
     request.user.subscribed_publishers.remove(publisher)
+    remove_publisher(request.user, publisher)
     return redirect("subscriptions")
 
 
@@ -282,19 +576,17 @@ def unsubscribe_publisher(request, publisher_id):
 @login_required
 def subscribe_journalist(request, journalist_id):
     journalist = get_object_or_404(CustomUser, id=journalist_id, role="journalist")
+    following = JournalistSubscription.objects.filter(
+        from_customuser_id=request.user.id, to_customuser_id=journalist.id
+    ).exists()
     request.user.subscribed_journalists.add(journalist)
+    if not following:
+        backfill_journalist(request.user, journalist)
     return redirect("subscriptions")
 
 @login_required
 def unsubscribe_journalist(request, journalist_id):
     journalist = get_object_or_404(CustomUser, id=journalist_id, role="journalist")
     request.user.subscribed_journalists.remove(journalist)
+    remove_journalist(request.user, journalist)
     return redirect("subscriptions")
-
-
-
-
-
-
-
-
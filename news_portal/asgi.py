@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'news_portal.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up.
+from articles.push import websocket_application  # noqa: E402
+
+
+async def application(scope, receive, send):
+    # Django serves HTTP (including Server-Sent Events); WebSocket
+    # connections go to the article push channel.
+    if scope["type"] == "websocket":
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
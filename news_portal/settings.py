@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "articles.instrumentation.InstrumentationMiddleware",
+    "articles.routers.ReplicaPinMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -61,22 +63,56 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "news_portal.urls"
 
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+if not DEBUG:
+    # Parse each template once per process instead of on every render.
+    TEMPLATE_LOADERS = [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)]
+
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # DjangoTemplates plus render timing for InstrumentationMiddleware
+        "BACKEND": "articles.instrumentation.InstrumentedDjangoTemplates",
         "DIRS": [BASE_DIR / "templates"],  # global templates directory
-        "APP_DIRS": True,
+        # APP_DIRS is implied by the app_directories loader above.
+        "APP_DIRS": False,
         "OPTIONS": {
+            "loaders": TEMPLATE_LOADERS,
             "context_processors": [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "articles.context_processors.subscriptions",
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = "news_portal.wsgi.application"
+ASGI_APPLICATION = "news_portal.asgi.application"
+# Serve home, article detail and the subscribed-articles API from native
+# async views. Turn on when running under uvicorn (see README).
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "false").lower() == "true"
+# Push of approved articles (/api/events/, /ws/articles/; needs ASYNC_VIEWS).
+# The in-process backend reaches readers connected to the same process.
+PUSH_BACKEND = os.getenv("PUSH_BACKEND", "articles.push.InProcessBackend")
+PUSH_HEARTBEAT_SECONDS = int(os.getenv("PUSH_HEARTBEAT_SECONDS", 25))
+PUSH_QUEUE_SIZE = int(os.getenv("PUSH_QUEUE_SIZE", 100))
+
+# ---------------------------
+# Request instrumentation
+# ---------------------------
+# Fraction of requests that record query count, DB/template/view time
+# (0 disables, 1 measures every request).
+INSTRUMENTATION_SAMPLE_RATE = float(os.getenv("INSTRUMENTATION_SAMPLE_RATE", 0.01))
+# The Server-Timing header exposes query counts and DB timings to clients:
+# on with DEBUG, otherwise only when explicitly enabled.
+INSTRUMENTATION_SERVER_TIMING = os.getenv("INSTRUMENTATION_SERVER_TIMING", str(DEBUG)).lower() in ["1", "true"]
+# Sampled requests above either budget are logged as warnings (0 = no budget).
+INSTRUMENTATION_QUERY_BUDGET = int(os.getenv("INSTRUMENTATION_QUERY_BUDGET", 20))
+INSTRUMENTATION_LATENCY_BUDGET_MS = int(os.getenv("INSTRUMENTATION_LATENCY_BUDGET_MS", 500))
 
 # ---------------------------
 # Database (MySQL)
@@ -89,8 +125,65 @@ DATABASES = {
         "PASSWORD": os.getenv("DB_PASSWORD", "newspass"),
         "HOST": os.getenv("DB_HOST", "127.0.0.1"),
         "PORT": int(os.getenv("DB_PORT", 3306)),
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Read replicas: DB_REPLICA_HOSTS=host1,host2 adds aliases replica1,
+# replica2, ... with the primary's credentials. Reads from views marked
+# @read_replica go there (articles.routers.ReplicaRouter); tests mirror
+# the primary instead of creating replica databases.
+for i, host in enumerate(filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), 1):
+    DATABASES[f"replica{i}"] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "PORT": int(os.getenv("DB_REPLICA_PORT", DATABASES["default"]["PORT"])),
+        "CONN_MAX_AGE": int(os.getenv("DB_REPLICA_CONN_MAX_AGE", 60)),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith("replica")]
+DATABASE_ROUTERS = ["articles.routers.ReplicaRouter"]
+# After a write, the user's reads stay on the primary this long.
+REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 10))
+REPLICA_PIN_COOKIE = "primary_pin"
+
+# ---------------------------
+# Cache
+# ---------------------------
+# Defaults to per-process locmem. For production point CACHE_BACKEND at a
+# shared backend, e.g. django.core.cache.backends.redis.RedisCache with
+# CACHE_LOCATION=redis://cache:6379/1, or FileBasedCache with a directory.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "news-portal"),
+        "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "news"),
     }
 }
+PAGE_CACHE_ALIAS = "default"
+# Lifetime of the version stamps (articles.cache) behind cached pages,
+# profiles and ETag/Last-Modified validators. On a shared backend they never
+# expire. Locmem gives each worker process its own copy that a bump in
+# another worker never reaches, so there they age out instead, bounding how
+# long other workers keep serving stale pages and 304s after a write.
+CACHE_STAMP_TIMEOUT = (
+    int(os.environ["CACHE_STAMP_TIMEOUT"]) if os.getenv("CACHE_STAMP_TIMEOUT")
+    else 60 if CACHES["default"]["BACKEND"].endswith(".LocMemCache") else None
+)
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", 600))
+# Public RSS/Atom feeds: entries per feed, and how long feed readers and
+# proxies may reuse a response before revalidating.
+FEED_ITEMS = int(os.getenv("FEED_ITEMS", 20))
+FEED_MAX_AGE = int(os.getenv("FEED_MAX_AGE", 300))
+# Article card fragments ({% cache %} in article_card.html). Bump
+# FRAGMENT_CACHE_VERSION when a deploy changes the card markup.
+CARD_CACHE_TIMEOUT = int(os.getenv("CARD_CACHE_TIMEOUT", 3600))
+FRAGMENT_CACHE_VERSION = os.getenv("FRAGMENT_CACHE_VERSION", "1")
+# Cached per-user role + subscription IDs (articles.profiles)
+PROFILE_CACHE_TIMEOUT = int(os.getenv("PROFILE_CACHE_TIMEOUT", 3600))
 
 # ---------------------------
 # Password validation
@@ -131,10 +224,31 @@ REST_FRAMEWORK = {
     ]
 }
 
+# ---------------------------
+# Pagination (keyset, newest first)
+# ---------------------------
+ARTICLES_PAGE_SIZE = int(os.getenv("ARTICLES_PAGE_SIZE", 20))
+
 # ---------------------------
 # Email
 # ---------------------------
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "no-reply@example.com")
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
+
+# Subscriber notifications (drained by `manage.py send_notifications`)
+NOTIFICATION_BATCH_SIZE = int(os.getenv("NOTIFICATION_BATCH_SIZE", 100))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", 5))
+NOTIFICATION_RETRY_BASE_SECONDS = int(os.getenv("NOTIFICATION_RETRY_BASE_SECONDS", 60))
+NOTIFICATION_RETRY_MAX_SECONDS = int(os.getenv("NOTIFICATION_RETRY_MAX_SECONDS", 3600))
+
+# Newsletter dispatch (drained by `manage.py send_newsletters`)
+NEWSLETTER_CHUNK_SIZE = int(os.getenv("NEWSLETTER_CHUNK_SIZE", 500))
+NEWSLETTER_WORKERS = int(os.getenv("NEWSLETTER_WORKERS", 4))
+
+# Reader digests (sent by `manage.py send_digests`)
+DIGEST_MAX_ARTICLES = int(os.getenv("DIGEST_MAX_ARTICLES", 20))
 
 # ---------------------------
 # Twitter / X API Integration
@@ -145,4 +259,34 @@ TWITTER_API_SECRET = os.getenv("TWITTER_API_SECRET", "")
 TWITTER_ACCESS_TOKEN = os.getenv("TWITTER_ACCESS_TOKEN", "")
 TWITTER_ACCESS_SECRET = os.getenv("TWITTER_ACCESS_SECRET", "")
 TWITTER_PREFIX = os.getenv("TWITTER_PREFIX", "📰 New article:")
+TWITTER_CLIENT_FACTORY = os.getenv(
+    "TWITTER_CLIENT_FACTORY", "articles.utils.build_twitter_client"
+)
+# Posting quota (drained by `manage.py post_social`)
+TWITTER_POSTS_PER_WINDOW = int(os.getenv("TWITTER_POSTS_PER_WINDOW", 50))
+TWITTER_RATE_WINDOW_SECONDS = int(os.getenv("TWITTER_RATE_WINDOW_SECONDS", 900))
+TWITTER_MAX_ATTEMPTS = int(os.getenv("TWITTER_MAX_ATTEMPTS", 5))
+TWITTER_RETRY_BASE_SECONDS = int(os.getenv("TWITTER_RETRY_BASE_SECONDS", 60))
+TWITTER_RETRY_MAX_SECONDS = int(os.getenv("TWITTER_RETRY_MAX_SECONDS", 3600))
+
+# Absolute URL prefix for links leaving the site (tweets, emails, feeds)
+SITE_URL = os.getenv("SITE_URL", "http://localhost:8000")
 
+# ---------------------------
+# Logging
+# ---------------------------
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # One JSON line per sampled request at INFO; budget overruns at WARNING.
+        "articles.instrumentation": {
+            "handlers": ["console"],
+            "level": os.getenv("INSTRUMENTATION_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
+}
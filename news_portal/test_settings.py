@@ -0,0 +1,28 @@
+# Settings for the test suite: python manage.py test --settings=news_portal.test_settings
+#
+# SQLite instead of MySQL, and a "replica" alias backed by its own
+# database (not a TEST MIRROR), so ReplicaReadYourWritesTestCase can tell
+# which database a read went to. Replica routing stays off except in the
+# tests that enable it with DATABASE_REPLICAS. The database files live in
+# the system temp directory, not the working tree.
+import tempfile
+from pathlib import Path
+
+from .settings import *  # noqa: F401,F403
+
+TEST_DB_DIR = Path(tempfile.gettempdir())
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": TEST_DB_DIR / "news-portal-test-default.sqlite3",
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": TEST_DB_DIR / "news-portal-test-replica.sqlite3",
+    },
+}
+DATABASE_REPLICAS = []
+
+# Fast hashing for the many create_user() calls.
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]